@@ -2,71 +2,245 @@
 """
 OCR Image Analysis Script
 Usage: python script.py img.jpeg
+       python script.py img.jpeg --modes raw,processed,psm6,psm8,osd
+       python script.py --batch scans/ "more/**/*.png" --output results.jsonl [--workers N] [--resume]
 """
 
+import argparse
+import glob
+import json
 import sys
 import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from PIL import Image
 import pytesseract
 import cv2
 import numpy as np
 
-def preprocess_image(image_path):
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp', '.webp'}
+MIN_CONFIDENCE = 30
+
+# Tesseract configurations a caller can ask for. Each one costs a full OCR pass.
+OCR_MODES = {
+    'raw': {'variant': 'rgb', 'config': ''},
+    'processed': {'variant': 'thresholded', 'config': ''},
+    'psm6': {'variant': 'rgb', 'config': '--oem 3 --psm 6'},  # Single uniform block of text
+    'psm8': {'variant': 'rgb', 'config': '--oem 3 --psm 8'},  # Single word
+    'osd': {'variant': 'rgb', 'config': None},  # Orientation and script detection
+}
+DEFAULT_MODES = ('raw', 'processed')
+
+# Preprocessing profiles: 'quality' denoises at full resolution (slow on phone photos),
+# 'fast' downscales to the target DPI and uses cheap filters, 'auto' picks per image.
+PREPROCESS_PROFILES = ('fast', 'quality', 'auto')
+DEFAULT_PROFILE = 'auto'
+TARGET_DPI = 300
+RECEIPT_WIDTH_INCHES = 3.15  # 80 mm thermal paper, used when the image has no usable DPI metadata
+# DPI metadata outside this range is a camera or editor default (72, 96), not a scan
+MIN_SCAN_DPI = 150
+MAX_SCAN_DPI = 1200
+MAX_LONG_EDGE = 3500  # pixels, about 30 cm of receipt at the target DPI
+AUTO_MAX_QUALITY_MEGAPIXELS = 4.0
+AUTO_NOISE_THRESHOLD = 8.0
+
+class DecodedImage:
+    """
+    An image decoded once into a shared NumPy buffer.
+
+    The grayscale and thresholded variants are derived lazily from that buffer
+    and cached, so every OCR pass reuses the same decode.
+    """
+
+    def __init__(self, image_path, profile=DEFAULT_PROFILE):
+        self.path = image_path
+        self.profile = profile
+        with Image.open(image_path) as img:
+            self.format = img.format
+            self.mode = img.mode
+            self.dpi = img.info.get('dpi')
+            self.rgb = np.asarray(img.convert('RGB'))
+        self.height, self.width = self.rgb.shape[:2]
+        self.preprocess_report = None
+        self._gray = None
+        self._thresholded = None
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    @property
+    def thresholded(self):
+        if self._thresholded is None:
+            self._thresholded, self.preprocess_report = threshold_image(
+                self.gray, profile=self.profile, dpi=self.dpi
+            )
+        return self._thresholded
+
+    def variant(self, name):
+        return getattr(self, name)
+
+def estimate_noise(gray):
+    """
+    Estimate the standard deviation of image noise (Immerkaer's method)
+    """
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(gray.astype(np.float32), -1, kernel)
+    height, width = gray.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    return float(np.sqrt(np.pi / 2) * np.abs(response[1:-1, 1:-1]).sum() / (6 * (width - 2) * (height - 2)))
+
+def choose_profile(gray):
+    """
+    Pick 'fast' for large or clean images and 'quality' for small noisy ones
+    """
+    megapixels = gray.shape[0] * gray.shape[1] / 1e6
+    noise = estimate_noise(gray)
+    if megapixels <= AUTO_MAX_QUALITY_MEGAPIXELS and noise >= AUTO_NOISE_THRESHOLD:
+        return 'quality', {'megapixels': round(megapixels, 2), 'noise': round(noise, 2)}
+    return 'fast', {'megapixels': round(megapixels, 2), 'noise': round(noise, 2)}
+
+def downscale_to_dpi(gray, dpi=None, target_dpi=TARGET_DPI, max_long_edge=MAX_LONG_EDGE):
+    """
+    Downscale an image to the target DPI (never upscales)
+
+    Implausible DPI metadata falls back to the receipt-width estimate, and the
+    long edge is clamped to max_long_edge either way.
+    """
+    height, width = gray.shape[:2]
+    if dpi and dpi[0] and MIN_SCAN_DPI <= float(dpi[0]) <= MAX_SCAN_DPI:
+        scale = target_dpi / float(dpi[0])
+    else:
+        scale = target_dpi * RECEIPT_WIDTH_INCHES / width
+    scale = min(scale, max_long_edge / float(max(height, width)))
+    if scale >= 1.0:
+        return gray, 1.0
+    resized = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+def threshold_image(gray, profile=DEFAULT_PROFILE, dpi=None):
+    """
+    Denoise a grayscale image and binarize it for OCR.
+
+    Returns the binary image and a report with the chosen profile and per-stage timings.
+    """
+    timings = {}
+    report = {'requested': profile, 'timings': timings}
+
+    if profile == 'auto':
+        start = time.perf_counter()
+        profile, report['measured'] = choose_profile(gray)
+        timings['analyze'] = round(time.perf_counter() - start, 4)
+    if profile not in ('fast', 'quality'):
+        raise ValueError(f"Unknown preprocessing profile: {profile}")
+    report['profile'] = profile
+
+    if profile == 'quality':
+        # Apply denoising
+        start = time.perf_counter()
+        denoised = cv2.fastNlMeansDenoising(gray)
+        timings['denoise'] = round(time.perf_counter() - start, 4)
+        
+        # Apply threshold to get binary image
+        start = time.perf_counter()
+        _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        timings['threshold'] = round(time.perf_counter() - start, 4)
+        return thresh, report
+
+    start = time.perf_counter()
+    small, report['scale'] = downscale_to_dpi(gray, dpi)
+    timings['downscale'] = round(time.perf_counter() - start, 4)
+
+    start = time.perf_counter()
+    filtered = cv2.medianBlur(small, 3)
+    timings['denoise'] = round(time.perf_counter() - start, 4)
+
+    # Adaptive threshold copes with the uneven lighting of phone photos
+    start = time.perf_counter()
+    thresh = cv2.adaptiveThreshold(
+        filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10
+    )
+    timings['threshold'] = round(time.perf_counter() - start, 4)
+    return thresh, report
+
+def preprocess_image(image_path, profile=DEFAULT_PROFILE):
     """
     Preprocess the image to improve OCR accuracy
     """
-    # Read image with OpenCV
-    img = cv2.imread(image_path)
-    
-    if img is None:
-        raise ValueError(f"Could not load image: {image_path}")
-    
-    # Convert to grayscale
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Apply denoising
-    denoised = cv2.fastNlMeansDenoising(gray)
-    
-    # Apply threshold to get binary image
-    _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    
-    return thresh
+    try:
+        return DecodedImage(image_path, profile=profile).thresholded
+    except OSError as e:
+        raise ValueError(f"Could not load image: {image_path} ({e})")
+
+def parse_tesseract_data(data):
+    """
+    Turn one image_to_data result into text (with line breaks), words and confidences
+    """
+    lines = {}
+    words = []
+    for i, raw_text in enumerate(data['text']):
+        text = raw_text.strip()
+        if not text:
+            continue
+        conf = float(data['conf'][i])
+        words.append({'text': text, 'conf': conf})
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(text)
+
+    return {
+        'text': '\n'.join(' '.join(line) for line in lines.values()),
+        'words': words,
+    }
 
-def extract_text_with_confidence(image_path):
+def run_ocr(image, modes=DEFAULT_MODES):
+    """
+    Run only the requested Tesseract configurations on a decoded image.
+
+    Text and confidences of a mode come from a single image_to_data call.
+    """
+    results = {}
+    for mode in modes:
+        spec = OCR_MODES[mode]
+        pixels = image.variant(spec['variant'])
+        start = time.perf_counter()
+        if spec['config'] is None:
+            try:
+                result = {'osd': pytesseract.image_to_osd(pixels)}
+            except pytesseract.TesseractError as e:
+                result = {'osd': None, 'error': str(e)}
+        else:
+            data = pytesseract.image_to_data(
+                pixels, config=spec['config'], output_type=pytesseract.Output.DICT
+            )
+            result = parse_tesseract_data(data)
+        result['seconds'] = round(time.perf_counter() - start, 4)
+        results[mode] = result
+    return results
+
+def confident_words(words):
+    """
+    Words and confidences above the minimum confidence
+    """
+    kept = [w for w in words if w['conf'] > MIN_CONFIDENCE]
+    return ' '.join(w['text'] for w in kept), [w['conf'] for w in kept]
+
+def extract_text_with_confidence(image_path, profile=DEFAULT_PROFILE):
     """
     Extract text from image with confidence scores
     """
     try:
-        processed_img = preprocess_image(image_path)
-        # Preprocess image
-        
-        # Convert back to PIL Image for pytesseract
-        pil_img = Image.fromarray(processed_img)
-        
-        # Extract text with detailed data
-        data = pytesseract.image_to_data(pil_img, output_type=pytesseract.Output.DICT)
-        
-        # Extract text with confidence
-        extracted_text = []
-        confidences = []
-        
-        for i in range(len(data['text'])):
-            text = data['text'][i].strip()
-            conf = int(data['conf'][i])
-            
-            if text and conf > 30:  # Only include text with reasonable confidence
-                extracted_text.append(text)
-                confidences.append(conf)
-        
-        return ' '.join(extracted_text), confidences
-        
+        results = run_ocr(DecodedImage(image_path, profile=profile), modes=('processed',))
+        return confident_words(results['processed']['words'])
     except Exception as e:
         print(f"Error during OCR processing: {e}")
         return None, []
 
-def analyze_image_content(image_path):
+def analyze_image_content(image_path, modes=DEFAULT_MODES, profile=DEFAULT_PROFILE):
     """
-    Analyze the image and extract comprehensive information
+    Analyze the image and print the results of the requested OCR modes
     """
     print(f"Analyzing image: {image_path}")
     print("=" * 50)
@@ -77,21 +251,21 @@ def analyze_image_content(image_path):
         return
     
     try:
-        # Get image information
-        with Image.open(image_path) as img:
-            print(f"Image Format: {img.format}")
-            print(f"Image Size: {img.size[0]}x{img.size[1]} pixels")
-            print(f"Image Mode: {img.mode}")
+        # Decode the image once, every OCR mode reuses the buffer
+        image = DecodedImage(image_path, profile=profile)
+        print(f"Image Format: {image.format}")
+        print(f"Image Size: {image.width}x{image.height} pixels")
+        print(f"Image Mode: {image.mode}")
         
         print("\n" + "=" * 50)
         print("OCR RESULTS:")
         print("=" * 50)
         
-        # Extract text using simple method
-        simple_text = pytesseract.image_to_string(Image.open(image_path))
-        
-        # Extract text with preprocessing and confidence
-        processed_text, confidences = extract_text_with_confidence(image_path)
+        results = run_ocr(image, modes=modes)
+        simple_text = results['raw']['text'] if 'raw' in results else ''
+        processed_text, confidences = (
+            confident_words(results['processed']['words']) if 'processed' in results else ('', [])
+        )
         
         if simple_text.strip():
             print("\n--- Raw OCR Output ---")
@@ -107,29 +281,33 @@ def analyze_image_content(image_path):
                 print(f"Min Confidence: {min(confidences)}%")
                 print(f"Max Confidence: {max(confidences)}%")
         
-        # Try different OCR Engine Modes (OEM) and Page Segmentation Modes (PSM)
-        print("\n--- Alternative OCR Configurations ---")
+        if 'psm6' in results or 'psm8' in results:
+            print("\n--- Alternative OCR Configurations ---")
+        
+        if 'psm6' in results:
+            alt_text = results['psm6']['text']
+            if alt_text.strip() and alt_text.strip() != simple_text.strip():
+                print("PSM 6 (Single text block):")
+                print(alt_text.strip())
         
-        # PSM 6: Assume a single uniform block of text
-        custom_config = r'--oem 3 --psm 6'
-        alt_text = pytesseract.image_to_string(Image.open(image_path), config=custom_config)
-        if alt_text.strip() and alt_text.strip() != simple_text.strip():
-            print("PSM 6 (Single text block):")
-            print(alt_text.strip())
+        if 'psm8' in results:
+            word_text = results['psm8']['text']
+            if word_text.strip() and len(word_text.strip().split()) <= 3:
+                print(f"\nPSM 8 (Single word): {word_text.strip()}")
         
-        # PSM 8: Treat the image as a single word
-        custom_config = r'--oem 3 --psm 8'
-        word_text = pytesseract.image_to_string(Image.open(image_path), config=custom_config)
-        if word_text.strip() and len(word_text.strip().split()) <= 3:
-            print(f"\nPSM 8 (Single word): {word_text.strip()}")
+        if 'osd' in results:
+            if results['osd'].get('osd'):
+                print(f"\n--- Image Orientation & Script Detection ---")
+                print(results['osd']['osd'])
+            else:
+                print("\n--- Could not detect orientation/script ---")
         
-        # Detect orientation and script
-        try:
-            osd = pytesseract.image_to_osd(Image.open(image_path))
-            print(f"\n--- Image Orientation & Script Detection ---")
-            print(osd)
-        except:
-            print("\n--- Could not detect orientation/script ---")
+        timings = ', '.join(f"{mode} {result['seconds']:.2f}s" for mode, result in results.items())
+        print(f"\nOCR passes: {len(results)} ({timings})")
+        if image.preprocess_report:
+            report = image.preprocess_report
+            stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['timings'].items())
+            print(f"Preprocessing profile: {report['profile']} (requested {report['requested']}; {stages})")
         
         if not simple_text.strip() and not processed_text:
             print("\nNo text detected in the image.")
@@ -141,18 +319,144 @@ def analyze_image_content(image_path):
     except Exception as e:
         print(f"Error analyzing image: {e}")
 
-def main():
+def collect_images(inputs):
     """
-    Main function to handle command line arguments
+    Expand files, directories and glob patterns into a sorted list of image paths
+    """
+    paths = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            candidates = (
+                os.path.join(root, name)
+                for root, _, files in os.walk(entry)
+                for name in files
+            )
+        elif glob.has_magic(entry):
+            candidates = glob.glob(entry, recursive=True)
+        else:
+            candidates = [entry]
+
+        for path in sorted(candidates):
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.abspath(path))
+
+    # Remove duplicates while keeping the order
+    return list(dict.fromkeys(paths))
+
+def ocr_image_record(image_path, profile=DEFAULT_PROFILE):
+    """
+    OCR a single image for batch mode and return a JSON-serializable record
+    """
+    start = time.perf_counter()
+    record = {'path': image_path}
+    try:
+        image = DecodedImage(image_path, profile=profile)
+        image.thresholded  # Preprocess up front so the timings separate the stages
+        preprocessed = time.perf_counter()
+
+        result = run_ocr(image, modes=('processed',))['processed']
+        recognized = time.perf_counter()
+
+        record.update({
+            'ok': True,
+            'text': confident_words(result['words'])[0],
+            'words': result['words'],
+            'preprocess': image.preprocess_report,
+            'timings': {
+                'preprocess': round(preprocessed - start, 4),
+                'ocr': round(recognized - preprocessed, 4),
+            },
+        })
+    except Exception as e:
+        record.update({'ok': False, 'error': str(e)})
+
+    record.setdefault('timings', {})['total'] = round(time.perf_counter() - start, 4)
+    return record
+
+def load_processed_paths(output_path):
+    """
+    Read the paths that were already processed successfully from a JSON Lines file
+    """
+    processed = set()
+    if not os.path.exists(output_path):
+        return processed
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written line from an interrupted run
+            if record.get('ok'):
+                processed.add(record['path'])
+    return processed
+
+def default_worker_count():
+    """
+    Number of cores available to this process
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def init_worker():
+    """
+    Keep Tesseract single-threaded inside each worker to avoid oversubscribing cores
+    """
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+def run_batch(inputs, output_path, workers, resume, profile=DEFAULT_PROFILE):
+    """
+    OCR many images in parallel and append one JSON line per image to output_path
+    """
+    image_paths = collect_images(inputs)
+    if resume:
+        done = load_processed_paths(output_path)
+        skipped = len(image_paths)
+        image_paths = [path for path in image_paths if path not in done]
+        skipped -= len(image_paths)
+        print(f"Resuming: skipping {skipped} already processed images", file=sys.stderr)
+
+    total = len(image_paths)
+    print(f"Processing {total} images with {workers} workers", file=sys.stderr)
+    started = time.perf_counter()
+    failures = 0
+
+    with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        # Keep a bounded number of images in flight so huge batches don't pile up in memory
+        pending = set()
+        remaining = iter(image_paths)
+        completed = 0
+        while True:
+            for path in remaining:
+                pending.add(executor.submit(ocr_image_record, path, profile))
+                if len(pending) >= workers * 4:
+                    break
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                completed += 1
+                if not record['ok']:
+                    failures += 1
+                    print(f"[{completed}/{total}] FAILED {record['path']}: {record['error']}", file=sys.stderr)
+                else:
+                    print(f"[{completed}/{total}] {record['path']} ({record['timings']['total']:.2f}s)", file=sys.stderr)
+            out.flush()
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {total - failures} succeeded, {failures} failed in {elapsed:.1f}s ({rate:.2f} images/s)", file=sys.stderr)
+    return failures
+
+def check_tesseract():
+    """
+    Exit with installation instructions if Tesseract is missing
     """
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <image_file>")
-        print("Example: python script.py img.jpeg")
-        sys.exit(1)
-    
-    image_path = sys.argv[1]
-    
-    # Check if tesseract is installed
     try:
         pytesseract.get_tesseract_version()
     except pytesseract.TesseractNotFoundError:
@@ -162,8 +466,46 @@ def main():
         print("- macOS: brew install tesseract")
         print("- Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki")
         sys.exit(1)
-    
-    analyze_image_content(image_path)
+
+def main():
+    """
+    Main function to handle command line arguments
+    """
+    parser = argparse.ArgumentParser(description="OCR image analysis")
+    parser.add_argument('image', nargs='?', help="Image file to analyze")
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help="Image files, directories or glob patterns to process in batch mode")
+    parser.add_argument('--output', default='ocr_results.jsonl',
+                        help="JSON Lines output file for batch mode (default: ocr_results.jsonl)")
+    parser.add_argument('--workers', type=int, default=default_worker_count(),
+                        help="Worker processes for batch mode (default: available cores)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip images already processed successfully in the output file")
+    parser.add_argument('--profile', choices=PREPROCESS_PROFILES, default=DEFAULT_PROFILE,
+                        help=f"Preprocessing profile (default: {DEFAULT_PROFILE})")
+    parser.add_argument('--modes', default=','.join(DEFAULT_MODES),
+                        help=f"Comma-separated OCR modes for single-image mode: {', '.join(OCR_MODES)} "
+                             f"or 'all' (default: {','.join(DEFAULT_MODES)})")
+    args = parser.parse_args()
+
+    if not args.image and not args.batch:
+        print("Usage: python script.py <image_file>")
+        print("Example: python script.py img.jpeg")
+        print("Batch:   python script.py --batch scans/ --output results.jsonl")
+        sys.exit(1)
+
+    modes = list(OCR_MODES) if args.modes == 'all' else [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in modes if m not in OCR_MODES]
+    if unknown:
+        parser.error(f"Unknown OCR modes: {', '.join(unknown)}")
+
+    check_tesseract()
+
+    if args.batch:
+        failures = run_batch(args.batch, args.output, max(1, args.workers), args.resume, args.profile)
+        sys.exit(1 if failures else 0)
+
+    analyze_image_content(args.image, modes=modes, profile=args.profile)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -8,11 +8,13 @@ from prisma.errors import UniqueViolationError
 
 from app.core.auth import (
     authenticate_user,
+    build_token_claims,
     create_access_token,
     get_current_user,
-    get_password_hash,
+    hash_password,
 )
 from app.core.database import get_database
+from app.core.passwords import PasswordPoolSaturatedError
 from app.schemas.users import (
     AuthResponse,
     ErrorResponse,
@@ -24,6 +26,15 @@ from app.schemas.users import (
 router = APIRouter()
 
 
+def password_pool_unavailable() -> HTTPException:
+    """Fast rejection when the password worker pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=AuthResponse)
 async def register(
     user_data: UserCreate,
@@ -40,7 +51,7 @@ async def register(
             )
         
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         
         # Create the user
         user = await db.user.create(
@@ -51,21 +62,27 @@ async def register(
             }
         )
         
+        new_user = User(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+        )
+        
         # Create access token
-        access_token = create_access_token(data={"sub": user.id})
+        access_token = create_access_token(data=build_token_claims(new_user))
         
         # Return response
         return AuthResponse(
             success=True,
-            user=User(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-            ),
+            user=new_user,
             token=access_token,
             message="User registered successfully"
         )
         
+    except HTTPException:
+        raise
+    except PasswordPoolSaturatedError:
+        raise password_pool_unavailable()
     except UniqueViolationError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,7 +116,7 @@ async def login(
             )
         
         # Create access token
-        access_token = create_access_token(data={"sub": user.id})
+        access_token = create_access_token(data=build_token_claims(user))
         
         # Return response
         return AuthResponse(
@@ -111,6 +128,8 @@ async def login(
         
     except HTTPException:
         raise
+    except PasswordPoolSaturatedError:
+        raise password_pool_unavailable()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,27 @@
+"""
+API routes for liveness and readiness probes.
+"""
+
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from prisma import Prisma
+
+from app.core.database import get_database
+from app.core.health import readiness
+
+router = APIRouter()
+
+
+@router.get("")
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is answering."""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness_check(db: Prisma = Depends(get_database)):
+    """Readiness probe: answers 503 while the replica should not receive traffic."""
+    report = await readiness(db)
+    status_code = status.HTTP_200_OK if not report["problems"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=status_code, content=report)
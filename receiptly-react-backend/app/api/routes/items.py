@@ -2,62 +2,83 @@
 API routes for item operations.
 """
 
-from typing import List
+from datetime import datetime
+from typing import Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from prisma import Prisma
 
+from app.core.analytics import get_cached_analytics, query_item_spend, set_cached_analytics
 from app.core.auth import get_current_user
 from app.core.database import get_database
-from app.schemas.items import Item, ItemCreate, ItemUpdate
+from app.core.pagination import decode_cursor, paginate
+from app.core.versions import RECEIPTS, bump_data_version, get_data_versions
+from app.schemas.items import Item, ItemAnalytics, ItemCreate, ItemMonthSpend, ItemSpend, ItemUpdate
+from app.schemas.pagination import Page
 from app.schemas.users import User
 
 router = APIRouter()
 
 
+def owned_items_filter(user_id: str) -> dict:
+    """Prisma filter for items on receipts of the given user (joined in the same query)."""
+    return {"receipt": {"is": {"userId": user_id}}}
+
+
 async def verify_receipt_ownership(receipt_id: str, user_id: str, db: Prisma) -> bool:
     """Verify that a receipt belongs to the given user."""
-    receipt = await db.receipt.find_unique(where={"id": receipt_id})
-    return receipt and receipt.userId == user_id
+    receipt = await db.receipt.find_first(where={"id": receipt_id, "userId": user_id})
+    return receipt is not None
 
 
-@router.get("/", response_model=List[Item])
+@router.get("/", response_model=Union[List[Item], Page[Item]])
 async def get_items(
     skip: int = 0,
     limit: int = 100,
     receipt_id: str = None,
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor (empty for the first page); returns a page envelope",
+    ),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
-    """Get items with optional filtering by receipt ID (only for user's receipts)."""
+    """Get items with optional filtering by receipt ID (only for user's receipts).
+    
+    Items have no timestamp, so cursor pagination is keyed on the item ID alone.
+    """
     try:
-        where_clause = {}
+        where_clause = owned_items_filter(current_user.id)
         if receipt_id:
-            # Verify that the receipt belongs to the current user
-            if not await verify_receipt_ownership(receipt_id, current_user.id, db):
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Receipt with ID {receipt_id} not found",
-                )
             where_clause["receiptId"] = receipt_id
+        
+        next_cursor = None
+        if cursor is not None:
+            if cursor:
+                _, last_id = decode_cursor(cursor)
+                where_clause["id"] = {"gt": last_id}
+            items = await db.item.find_many(
+                where=where_clause,
+                take=limit + 1,
+                order={"id": "asc"},
+            )
+            items, next_cursor = paginate(items, limit, key=lambda item: (None, item.id))
         else:
-            # If no receipt_id specified, only get items from user's receipts
-            user_receipts = await db.receipt.find_many(
-                where={"userId": current_user.id},
-                select={"id": True},
+            items = await db.item.find_many(
+                where=where_clause,
+                skip=skip,
+                take=limit,
             )
-            receipt_ids = [receipt.id for receipt in user_receipts]
-            if receipt_ids:
-                where_clause["receiptId"] = {"in": receipt_ids}
-            else:
-                # User has no receipts, return empty list
-                return []
-            
-        items = await db.item.find_many(
-            where=where_clause,
-            skip=skip,
-            take=limit,
-        )
+        
+        # An empty result for a receipt filter may mean the receipt is not the user's
+        if receipt_id and not items and not await verify_receipt_ownership(receipt_id, current_user.id, db):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Receipt with ID {receipt_id} not found",
+            )
+        
+        if cursor is not None:
+            return Page[Item](items=items, next_cursor=next_cursor)
         return items
     except HTTPException:
         raise
@@ -68,6 +89,55 @@ async def get_items(
         )
 
 
+@router.get("/analytics", response_model=ItemAnalytics)
+async def get_item_analytics(
+    top: int = Query(10, ge=1, le=100, description="Number of items by spend to return"),
+    name: Optional[str] = Query(None, description="Only this item name (case and whitespace insensitive)"),
+    purchased_from: Optional[datetime] = Query(None, description="Only receipts purchased at or after this time"),
+    purchased_to: Optional[datetime] = Query(None, description="Only receipts purchased at or before this time"),
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Get spend per item name with monthly spend and price series, computed in the database."""
+    cache_key = (top, name, purchased_from, purchased_to)
+    try:
+        # Read before the query, so a write committed meanwhile leaves a stale result unreachable
+        version = (await get_data_versions(db, current_user.id)).receipts
+        cached = get_cached_analytics(current_user.id, cache_key, version)
+        if cached is not None:
+            return cached
+        
+        rows = await query_item_spend(
+            db,
+            current_user.id,
+            top,
+            name=name,
+            purchased_from=purchased_from,
+            purchased_to=purchased_to,
+        )
+        
+        items: Dict[str, ItemSpend] = {}
+        for row in rows:
+            item = items.get(row["name"])
+            if item is None:
+                item = items[row["name"]] = ItemSpend(
+                    name=row["name"],
+                    spend=row["totalSpend"],
+                    quantity=row["totalQuantity"],
+                    purchases=row["totalPurchases"],
+                )
+            item.months.append(ItemMonthSpend.model_validate(row))
+        
+        analytics = ItemAnalytics(items=list(items.values()))
+        set_cached_analytics(current_user.id, cache_key, analytics, version)
+        return analytics
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to compute item analytics: {str(e)}",
+        )
+
+
 @router.get("/{item_id}", response_model=Item)
 async def get_item(
     item_id: str,
@@ -76,9 +146,8 @@ async def get_item(
 ):
     """Get a specific item by ID (only if it belongs to user's receipt)."""
     try:
-        item = await db.item.find_unique(
-            where={"id": item_id},
-            include={"receipt": True},
+        item = await db.item.find_first(
+            where={"id": item_id, **owned_items_filter(current_user.id)},
         )
         if not item:
             raise HTTPException(
@@ -86,13 +155,6 @@ async def get_item(
                 detail=f"Item with ID {item_id} not found",
             )
         
-        # Verify that the item's receipt belongs to the current user
-        if not await verify_receipt_ownership(item.receiptId, current_user.id, db):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Item with ID {item_id} not found",
-            )
-        
         return item
     except HTTPException:
         raise
@@ -119,7 +181,9 @@ async def create_item(
                     detail=f"Receipt with ID {item_data.receiptId} not found",
                 )
         
-        item = await db.item.create(data=item_data.model_dump())
+        async with db.tx() as tx:
+            item = await tx.item.create(data=item_data.model_dump())
+            await bump_data_version(tx, current_user.id, RECEIPTS)
         return item
     except HTTPException:
         raise
@@ -139,14 +203,6 @@ async def update_item(
 ):
     """Update an existing item (only if it belongs to user's receipt)."""
     try:
-        # Check if item exists and belongs to user's receipt
-        existing_item = await db.item.find_unique(where={"id": item_id})
-        if not existing_item or not await verify_receipt_ownership(existing_item.receiptId, current_user.id, db):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Item with ID {item_id} not found",
-            )
-        
         # Verify that the receipt exists and belongs to user if receiptId is being updated
         update_data = item_data.model_dump(exclude_unset=True)
         if "receiptId" in update_data and update_data["receiptId"]:
@@ -156,10 +212,18 @@ async def update_item(
                     detail=f"Receipt with ID {update_data['receiptId']} not found",
                 )
         
-        item = await db.item.update(
-            where={"id": item_id},
-            data=update_data,
-        )
+        async with db.tx() as tx:
+            # Ownership is part of the filter, so a foreign item updates nothing
+            item = await tx.item.update(
+                where={"id": item_id, **owned_items_filter(current_user.id)},
+                data=update_data,
+            )
+            if not item:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item with ID {item_id} not found",
+                )
+            await bump_data_version(tx, current_user.id, RECEIPTS)
         return item
     except HTTPException:
         raise
@@ -178,15 +242,16 @@ async def delete_item(
 ):
     """Delete an item (only if it belongs to user's receipt)."""
     try:
-        # Check if item exists and belongs to user's receipt
-        existing_item = await db.item.find_unique(where={"id": item_id})
-        if not existing_item or not await verify_receipt_ownership(existing_item.receiptId, current_user.id, db):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Item with ID {item_id} not found",
+        async with db.tx() as tx:
+            deleted = await tx.item.delete_many(
+                where={"id": item_id, **owned_items_filter(current_user.id)},
             )
-        
-        await db.item.delete(where={"id": item_id})
+            if not deleted:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Item with ID {item_id} not found",
+                )
+            await bump_data_version(tx, current_user.id, RECEIPTS)
         return None
     except HTTPException:
         raise
@@ -0,0 +1,91 @@
+"""
+API routes for background jobs.
+"""
+
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from prisma import Prisma
+
+from app.core.auth import get_current_user
+from app.core.database import get_database
+from app.core.jobs import get_job_queue
+from app.schemas.jobs import Job
+from app.schemas.users import User
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle event stream
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+# Seconds between reads of a job running on another worker process
+EVENT_POLL_SECONDS = 1.0
+
+
+async def get_owned_job(db: Prisma, job_id: str, current_user: User):
+    """Return a job of the current user or raise 404."""
+    job = await get_job_queue().load(db, job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found",
+        )
+    return job
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(
+    job_id: str,
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Get the status and result of a job (only if owned by current user)."""
+    return Job.from_job(await get_owned_job(db, job_id, current_user))
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream job status changes as server-sent events until the job finishes."""
+    job = await get_owned_job(db, job_id, current_user)
+    queue = get_job_queue()
+
+    async def events():
+        current = job
+        sent = None
+        last_event = time.monotonic()
+        while True:
+            # A job running on this worker is read from memory and wakes the stream itself
+            local = queue.get(job_id)
+            if local is not None:
+                current = local
+            payload = Job.from_job(current).model_dump_json()
+            if payload != sent:
+                sent = payload
+                last_event = time.monotonic()
+                yield f"event: status\ndata: {payload}\n\n"
+                if current.finished:
+                    return
+            elif time.monotonic() - last_event >= EVENT_KEEPALIVE_SECONDS:
+                last_event = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            if local is not None:
+                await queue.wait_for_change(local, local.version, EVENT_KEEPALIVE_SECONDS)
+            else:
+                await asyncio.sleep(EVENT_POLL_SECONDS)
+                current = await queue.load(db, job_id, current_user.id)
+                if current is None:
+                    # Pruned after its TTL
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,37 +2,279 @@
 API routes for receipt operations.
 """
 
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+import json
 import logging
+import os
+import tempfile
+import time
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from prisma import Prisma
+from pydantic import ValidationError
 
 from app.core.auth import get_current_user
-from app.core.database import get_database
-from app.schemas.receipts import Receipt, ReceiptCreate, ReceiptUpdate
+from app.core.bank_import import transaction_fingerprint
+from app.core.config import get_settings
+from app.core.database import get_database, parse_raw_datetime
+from app.core.dates import parse_purchased_at
+from app.core.http_cache import (
+    PRIVATE_REVALIDATE,
+    cache_headers,
+    etag_matches,
+    not_modified,
+    receipts_etag,
+)
+from app.core.ids import cuid
+from app.core.jobs import JobQueueFullError, get_job_queue
+from app.core.ocr import ocr_available, ocr_script_path, run_ocr_job
+from app.core.pagination import decode_cursor, paginate
+from app.core.rollups import add_many_to_rollup, add_to_rollup, apply_rollup_delta
+from app.core.streaming import RecordParseError, iter_json_array, iter_ndjson
+from app.core.uploads import MultipartUploadError, spool_multipart_file
+from app.core.versions import RECEIPTS, TRANSACTIONS, bump_data_version
+from app.core.storage import (
+    DEFAULT_CONTENT_TYPE,
+    BlobNotFoundError,
+    BlobStore,
+    BlobTooLargeError,
+    decode_image_data,
+    get_blob_store,
+)
+from app.schemas.jobs import Job
+from app.schemas.pagination import Page
+from app.schemas.receipts import Receipt, ReceiptCreate, ReceiptSummary, ReceiptUpdate
 from app.schemas.users import User
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
+settings = get_settings()
 
+# SQL expressions for the fields that can be requested from the receipt list
+RECEIPT_LIST_FIELDS = {
+    "id": 'r."id"',
+    "date": 'r."date"',
+    "time": 'r."time"',
+    "total": 'r."total"',
+    "purchasedAt": 'r."purchasedAt"',
+    "createdAt": 'r."createdAt"',
+    "updatedAt": 'r."updatedAt"',
+    "imageSha256": 'r."imageSha256"',
+    "imageContentType": 'r."imageContentType"',
+    "imageSize": 'r."imageSize"',
+    "hasImage": '(r."imageSha256" IS NOT NULL OR r."imageData" IS NOT NULL)',
+    "itemCount": '(SELECT COUNT(*) FROM "public"."items" i WHERE i."receiptId" = r."id")::int',
+}
+DEFAULT_RECEIPT_LIST_FIELDS = (
+    "id,date,time,total,purchasedAt,createdAt,updatedAt,imageSha256,imageContentType,imageSize,hasImage,itemCount"
+)
+RECEIPT_LIST_INCLUDES = {"items"}
+# Timestamp columns the receipt list can be sorted by (newest first)
+RECEIPT_SORT_COLUMNS = {
+    "createdAt": 'r."createdAt"',
+    "purchasedAt": 'r."purchasedAt"',
+}
 
-@router.get("/", response_model=List[Receipt])
+
+def parse_field_list(value: Optional[str], allowed, name: str) -> List[str]:
+    """Parse a comma-separated field list and reject unknown names."""
+    fields = [field.strip() for field in (value or "").split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {name}: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+        )
+    return list(dict.fromkeys(fields))
+
+
+async def store_image_data(image_data: str, store: BlobStore) -> dict:
+    """Move inline base64 image data into the blob store and return the receipt fields."""
+    try:
+        content, content_type = decode_image_data(image_data)
+        blob = await run_in_threadpool(store.put, content, settings.max_image_upload_bytes)
+    except BlobTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    return {
+        "imageData": None,
+        "imageSha256": blob.sha256,
+        "imageContentType": content_type,
+        "imageSize": blob.size,
+    }
+
+
+async def lock_receipt_transactions(db: Prisma, receipt_id: str, user_id: str) -> List[dict]:
+    """Lock the user's transactions linked to a receipt for the rest of the database transaction."""
+    rows = await db.query_raw(
+        """
+        SELECT "id", "type", "amount", "date"
+        FROM "public"."transactions"
+        WHERE "receiptId" = $1 AND "userId" = $2
+        FOR UPDATE
+        """,
+        receipt_id,
+        user_id,
+    )
+    for row in rows:
+        # Raw queries return timestamps as ISO strings
+        row["date"] = parse_raw_datetime(row["date"])
+    return rows
+
+
+def remove_temp_file(path: str) -> None:
+    """Delete a temporary upload if it still exists."""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def parse_range_header(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range `Range` header into inclusive (start, end) offsets.
+
+    Returns None when the header should be ignored and raises ValueError when the
+    range cannot be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            start = max(size - length, 0)
+            end = size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {range_header}")
+    if start >= size or start > end:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    return start, min(end, size - 1)
+
+
+@router.get(
+    "/",
+    response_model=Union[List[ReceiptSummary], Page[ReceiptSummary]],
+    response_model_exclude_unset=True,
+)
 async def get_receipts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor (empty for the first page); returns a page envelope",
+    ),
+    fields: Optional[str] = Query(
+        DEFAULT_RECEIPT_LIST_FIELDS,
+        description=f"Comma-separated receipt fields to return: {', '.join(RECEIPT_LIST_FIELDS)}",
+    ),
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated relations to include: items (none by default, itemCount is projected)",
+    ),
+    sort: str = Query(
+        "createdAt",
+        description=f"Sort key, newest first: {', '.join(RECEIPT_SORT_COLUMNS)}",
+    ),
+    purchased_from: Optional[datetime] = Query(None, description="Only receipts purchased at or after this time"),
+    purchased_to: Optional[datetime] = Query(None, description="Only receipts purchased at or before this time"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
-    """Get user's receipts with pagination."""
+    """Get user's receipts with offset or cursor pagination, returning only the requested fields."""
+    selected_fields = parse_field_list(fields, RECEIPT_LIST_FIELDS, "fields")
+    includes = parse_field_list(include, RECEIPT_LIST_INCLUDES, "include")
+    if "id" not in selected_fields:
+        selected_fields.insert(0, "id")
+    if sort not in RECEIPT_SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sort: {sort}. Allowed: {', '.join(RECEIPT_SORT_COLUMNS)}",
+        )
+    sort_column = RECEIPT_SORT_COLUMNS[sort]
+    
+    # The cursor key is read from internal columns that are dropped before returning
+    key_columns = [f'{sort_column} AS "_cursorSortKey"'] if cursor is not None else []
+    conditions = ['r."userId" = $1']
+    params: list = [current_user.id]
+    if purchased_from:
+        params.append(purchased_from)
+        conditions.append(f'r."purchasedAt" >= ${len(params)}::timestamp(3)')
+    if purchased_to:
+        params.append(purchased_to)
+        conditions.append(f'r."purchasedAt" <= ${len(params)}::timestamp(3)')
+    if cursor:
+        sort_value, receipt_id = decode_cursor(cursor)
+        params.extend([sort_value, receipt_id])
+        conditions.append(f'({sort_column}, r."id") < (${len(params) - 1}::timestamp(3), ${len(params)})')
+    if cursor is not None:
+        params.append(limit + 1)
+        page_clause = f"LIMIT ${len(params)}"
+    else:
+        params.extend([limit, skip])
+        page_clause = f"LIMIT ${len(params) - 1} OFFSET ${len(params)}"
+    
     try:
-        receipts = await db.receipt.find_many(
-            where={"userId": current_user.id},
-            skip=skip,
-            take=limit,
-            include={"items": True},
-            order={"createdAt": "desc"},
+        # Answer revalidations before loading or serializing anything
+        etag = await receipts_etag(db, current_user.id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, PRIVATE_REVALIDATE)
+        response.headers.update(cache_headers(etag, PRIVATE_REVALIDATE))
+        
+        columns = ", ".join(
+            [f'{RECEIPT_LIST_FIELDS[field]} AS "{field}"' for field in selected_fields] + key_columns
+        )
+        rows = await db.query_raw(
+            f"""
+            SELECT {columns}
+            FROM "public"."receipts" r
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {sort_column} DESC, r."id" DESC
+            {page_clause}
+            """,
+            *params,
         )
+        
+        next_cursor = None
+        if cursor is not None:
+            rows, next_cursor = paginate(
+                rows, limit, key=lambda row: (row["_cursorSortKey"], row["id"])
+            )
+            for row in rows:
+                row.pop("_cursorSortKey")
+        
+        items_by_receipt: Dict[str, list] = {}
+        if "items" in includes and rows:
+            items = await db.item.find_many(
+                where={"receiptId": {"in": [row["id"] for row in rows]}},
+            )
+            for item in items:
+                items_by_receipt.setdefault(item.receiptId, []).append(item)
+        
+        receipts = []
+        for row in rows:
+            if "items" in includes:
+                row["items"] = items_by_receipt.get(row["id"], [])
+            receipts.append(ReceiptSummary.model_validate(row, from_attributes=True))
+        
+        if cursor is not None:
+            return Page[ReceiptSummary](items=receipts, next_cursor=next_cursor)
         return receipts
     except Exception as e:
         raise HTTPException(
@@ -44,11 +286,22 @@ async def get_receipts(
 @router.get("/{receipt_id}", response_model=Receipt)
 async def get_receipt(
     receipt_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
     """Get a specific receipt by ID (only if owned by current user)."""
     try:
+        # A match still needs the receipt to exist for this user: "If-None-Match: *"
+        # matches any ETag, and must not turn a missing or foreign receipt into a 304
+        etag = await receipts_etag(db, current_user.id, receipt_id)
+        if etag_matches(if_none_match, etag) and await db.receipt.count(
+            where={"id": receipt_id, "userId": current_user.id}
+        ):
+            return not_modified(etag, PRIVATE_REVALIDATE)
+        response.headers.update(cache_headers(etag, PRIVATE_REVALIDATE))
+        
         receipt = await db.receipt.find_unique(
             where={"id": receipt_id},
             include={"items": True},
@@ -87,62 +340,55 @@ async def create_receipt(
         # Extract items data
         items_data = [item.model_dump(exclude={"receiptId"}) for item in receipt_data.items]
         
-        # Create receipt with items
-        receipt = await db.receipt.create(
-            data={
-                "date": receipt_data.date,
-                "time": receipt_data.time,
-                "total": receipt_data.total,
-                "imageData": receipt_data.imageData,
-                "userId": current_user.id,
-                "items": {
-                    "create": items_data
-                } if items_data else {},
-            },
-            include={"items": True},
-        )
+        # Store the image in the blob store, the row only keeps a reference
+        image_fields = {}
+        if receipt_data.imageData:
+            image_fields = await store_image_data(receipt_data.imageData, get_blob_store())
         
-        # Auto-create an expense transaction for this receipt
-        try:
-            from datetime import datetime
-            import logging
-            
-            logger_tx = logging.getLogger(__name__)
-            
-            # Parse the receipt date - handle both ISO format and simple date strings
-            try:
-                if 'T' in receipt_data.date:
-                    # ISO format datetime string
-                    receipt_datetime = datetime.fromisoformat(receipt_data.date.replace('Z', '+00:00'))
-                else:
-                    # Simple date string (YYYY-MM-DD)
-                    receipt_datetime = datetime.strptime(receipt_data.date, '%Y-%m-%d')
-            except (ValueError, AttributeError) as parse_error:
-                logger_tx.warning(f"Could not parse date '{receipt_data.date}': {parse_error}, using current time")
-                receipt_datetime = datetime.now()
-            
-            logger_tx.info(f"Creating transaction for receipt: user={current_user.id}, amount={receipt_data.total}, date={receipt_datetime}")
-            
-            # Create transaction linked to this receipt
-            transaction = await db.transaction.create(
+        purchased_at = receipt_data.purchasedAt or parse_purchased_at(receipt_data.date, receipt_data.time)
+        if purchased_at is None:
+            logger.warning(f"Could not parse receipt date '{receipt_data.date}', using current time")
+            purchased_at = datetime.now(timezone.utc)
+        
+        description = f"Receipt from {purchased_at.strftime('%Y-%m-%d')}"
+        
+        # The receipt, its items, the linked expense transaction and the rollup
+        # delta are committed together or not at all
+        async with db.tx() as tx:
+            receipt = await tx.receipt.create(
+                data={
+                    "date": receipt_data.date,
+                    "time": receipt_data.time,
+                    "purchasedAt": purchased_at,
+                    "total": receipt_data.total,
+                    **image_fields,
+                    "userId": current_user.id,
+                    "items": {
+                        "create": items_data
+                    } if items_data else {},
+                },
+                include={"items": True},
+            )
+            transaction = await tx.transaction.create(
                 data={
                     "userId": current_user.id,
                     "type": "expense",
                     "amount": float(receipt_data.total),
                     "category": "Receipt",
-                    "description": f"Receipt from {receipt_datetime.strftime('%Y-%m-%d')}",
-                    "date": receipt_datetime,
+                    "description": description,
+                    "date": purchased_at,
                     "receiptId": receipt.id,
+                    "fingerprint": transaction_fingerprint(
+                        current_user.id, purchased_at, "expense", receipt_data.total, description
+                    ),
                 }
             )
-            logger_tx.info(f"Transaction created successfully: {transaction.id}")
-        except Exception as transaction_error:
-            # Log but don't fail the receipt creation
-            import traceback
-            logger_tx.error(f"Failed to create transaction for receipt: {transaction_error}")
-            logger_tx.error(traceback.format_exc())
+            await add_to_rollup(tx, transaction)
+            await bump_data_version(tx, current_user.id, RECEIPTS, TRANSACTIONS)
         
         return receipt
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -150,6 +396,163 @@ async def create_receipt(
         )
 
 
+class BulkImportReport:
+    """Per-row status report of a bulk import, spooled to disk when it grows large."""
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+")
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+
+    def ok(self, row: int, receipt_id: str) -> None:
+        self.rows += 1
+        self.created += 1
+        self._write({"row": row, "status": "created", "id": receipt_id})
+
+    def error(self, row: Optional[int], error: str) -> None:
+        self.rows += 1 if row is not None else 0
+        self.failed += 1
+        self._write({"row": row, "status": "error", "error": error})
+
+    def _write(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry) + "\n")
+
+    def stream(self, summary: dict):
+        """Yield the report lines followed by the summary line, then close the file."""
+        try:
+            self.file.seek(0)
+            yield from self.file
+            yield json.dumps({"summary": summary}) + "\n"
+        finally:
+            self.file.close()
+
+
+def validation_message(error: ValidationError) -> str:
+    """Summarize pydantic validation errors in one line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def import_receipt_chunk(
+    db: Prisma, user_id: str, chunk: List[Tuple[int, ReceiptCreate, dict]], report: BulkImportReport
+) -> None:
+    """Insert a chunk of validated receipts with their items and expense transactions."""
+    receipts_data, items_data, transactions_data, created = [], [], [], []
+    for row, receipt_data, image_fields in chunk:
+        purchased_at = receipt_data.purchasedAt or parse_purchased_at(receipt_data.date, receipt_data.time)
+        if purchased_at is None:
+            purchased_at = datetime.now(timezone.utc)
+        
+        # IDs are assigned here so items and transactions can reference their receipt
+        receipt_id = cuid()
+        receipts_data.append({
+            "id": receipt_id,
+            "date": receipt_data.date,
+            "time": receipt_data.time,
+            "purchasedAt": purchased_at,
+            "total": receipt_data.total,
+            **image_fields,
+            "userId": user_id,
+        })
+        items_data.extend(
+            {**item.model_dump(exclude={"receiptId"}), "receiptId": receipt_id}
+            for item in receipt_data.items
+        )
+        description = f"Receipt from {purchased_at.strftime('%Y-%m-%d')}"
+        transactions_data.append({
+            "userId": user_id,
+            "type": "expense",
+            "amount": float(receipt_data.total),
+            "category": "Receipt",
+            "description": description,
+            "date": purchased_at,
+            "receiptId": receipt_id,
+            "fingerprint": transaction_fingerprint(
+                user_id, purchased_at, "expense", receipt_data.total, description
+            ),
+        })
+        created.append((row, receipt_id))
+    
+    if not created:
+        return
+    try:
+        async with db.tx(timeout=timedelta(seconds=60)) as tx:
+            await tx.receipt.create_many(data=receipts_data)
+            if items_data:
+                await tx.item.create_many(data=items_data)
+            await tx.transaction.create_many(data=transactions_data)
+            await add_many_to_rollup(
+                tx, user_id, ((t["date"], t["type"], t["amount"]) for t in transactions_data)
+            )
+            await bump_data_version(tx, user_id, RECEIPTS, TRANSACTIONS)
+    except Exception as e:
+        logger.error(f"Bulk import chunk failed: {e}")
+        for row, _ in created:
+            report.error(row, f"Failed to insert: {str(e)}")
+        return
+    for row, receipt_id in created:
+        report.ok(row, receipt_id)
+
+
+@router.post("/bulk")
+async def bulk_import_receipts(
+    request: Request,
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Import receipts from an NDJSON (default) or JSON-array body and return an NDJSON status report.
+    
+    Rows are validated with the receipt create schema and inserted in chunks, each
+    in its own database transaction. The report has one line per row followed by a
+    summary line.
+    """
+    started = time.perf_counter()
+    content_type = request.headers.get("content-type", "")
+    parse = iter_json_array if content_type.startswith("application/json") else iter_ndjson
+    report = BulkImportReport()
+    chunk: List[Tuple[int, ReceiptCreate, dict]] = []
+    store = get_blob_store()
+    
+    try:
+        async for row, record in parse(request.stream(), settings.bulk_import_max_row_bytes):
+            if isinstance(record, ValueError):
+                report.error(row, str(record))
+                continue
+            try:
+                receipt_data = ReceiptCreate.model_validate(record)
+                # Images go to the blob store right away so the chunk only holds references
+                image_fields = {}
+                if receipt_data.imageData:
+                    image_fields = await store_image_data(receipt_data.imageData, store)
+                    receipt_data.imageData = None
+            except ValidationError as e:
+                report.error(row, validation_message(e))
+                continue
+            except HTTPException as e:
+                report.error(row, str(e.detail))
+                continue
+            chunk.append((row, receipt_data, image_fields))
+            if len(chunk) >= settings.bulk_import_chunk_size:
+                await import_receipt_chunk(db, current_user.id, chunk, report)
+                chunk = []
+    except RecordParseError as e:
+        # The body cannot be read past this point; rows parsed so far are still imported
+        report.error(None, str(e))
+    if chunk:
+        await import_receipt_chunk(db, current_user.id, chunk, report)
+    
+    summary = {
+        "rows": report.rows,
+        "created": report.created,
+        "failed": report.failed,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info(f"Bulk receipt import for user {current_user.id}: {summary}")
+    return StreamingResponse(report.stream(summary), media_type="application/x-ndjson")
+
+
 @router.put("/{receipt_id}", response_model=Receipt)
 async def update_receipt(
     receipt_id: str,
@@ -159,21 +562,44 @@ async def update_receipt(
 ):
     """Update an existing receipt (only if owned by current user)."""
     try:
-        # Check if receipt exists and is owned by user
-        existing_receipt = await db.receipt.find_unique(where={"id": receipt_id})
-        if not existing_receipt or existing_receipt.userId != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Receipt with ID {receipt_id} not found",
-            )
-        
         # Update receipt with only provided fields
         update_data = receipt_data.model_dump(exclude_unset=True)
-        receipt = await db.receipt.update(
-            where={"id": receipt_id},
-            data=update_data,
-            include={"items": True},
-        )
+        if update_data.get("purchasedAt") is None:
+            update_data.pop("purchasedAt", None)
+        if "purchasedAt" not in update_data and ("date" in update_data or "time" in update_data):
+            date, time_of_day = update_data.get("date"), update_data.get("time")
+            if date is None or time_of_day is None:
+                # Only one half changed, the other one has to be read first
+                existing_receipt = await db.receipt.find_first(
+                    where={"id": receipt_id, "userId": current_user.id}
+                )
+                if not existing_receipt:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=f"Receipt with ID {receipt_id} not found",
+                    )
+                date = existing_receipt.date if date is None else date
+                time_of_day = existing_receipt.time if time_of_day is None else time_of_day
+            purchased_at = parse_purchased_at(date, time_of_day)
+            if purchased_at is not None:
+                update_data["purchasedAt"] = purchased_at
+        if update_data.get("imageData"):
+            update_data.update(await store_image_data(update_data["imageData"], get_blob_store()))
+        else:
+            update_data.pop("imageData", None)
+        async with db.tx() as tx:
+            # Ownership is part of the filter, so a foreign receipt updates nothing
+            receipt = await tx.receipt.update(
+                where={"id": receipt_id, "userId": current_user.id},
+                data=update_data,
+                include={"items": True},
+            )
+            if not receipt:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Receipt with ID {receipt_id} not found",
+                )
+            await bump_data_version(tx, current_user.id, RECEIPTS)
         return receipt
     except HTTPException:
         raise
@@ -192,33 +618,248 @@ async def delete_receipt(
 ):
     """Delete a receipt and all its items (only if owned by current user)."""
     try:
-        # Check if receipt exists and is owned by user
-        existing_receipt = await db.receipt.find_unique(where={"id": receipt_id})
-        if not existing_receipt or existing_receipt.userId != current_user.id:
+        async with db.tx() as tx:
+            # Delete linked transactions first (filtered by user, so foreign receipts match none).
+            # They stay locked until commit, so a concurrent update cannot change an amount
+            # between reading it here and taking it out of the rollup.
+            linked_transactions = await lock_receipt_transactions(tx, receipt_id, current_user.id)
+            if linked_transactions:
+                await tx.transaction.delete_many(
+                    where={"id": {"in": [t["id"] for t in linked_transactions]}}
+                )
+                for transaction in linked_transactions:
+                    await apply_rollup_delta(
+                        tx, current_user.id, transaction["date"], transaction["type"], -transaction["amount"], -1
+                    )
+            
+            # Delete receipt (items will be deleted due to cascade)
+            deleted = await tx.receipt.delete_many(where={"id": receipt_id, "userId": current_user.id})
+            if not deleted:
+                # Raising inside the block rolls the transaction back
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Receipt with ID {receipt_id} not found",
+                )
+            await bump_data_version(tx, current_user.id, RECEIPTS, TRANSACTIONS)
+        return None
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete receipt: {str(e)}",
+        )
+
+
+@router.put("/{receipt_id}/image", response_model=Receipt)
+async def upload_receipt_image(
+    receipt_id: str,
+    file: UploadFile = File(..., description="Receipt image"),
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Upload the image of a receipt as a raw multipart file (only if owned by current user)."""
+    try:
+        store = get_blob_store()
+        try:
+            blob = await run_in_threadpool(
+                store.put_stream, file.file, settings.max_image_upload_bytes
+            )
+        except BlobTooLargeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(e),
+            )
+        
+        async with db.tx() as tx:
+            receipt = await tx.receipt.update(
+                where={"id": receipt_id, "userId": current_user.id},
+                data={
+                    "imageData": None,
+                    "imageSha256": blob.sha256,
+                    "imageContentType": file.content_type or DEFAULT_CONTENT_TYPE,
+                    "imageSize": blob.size,
+                },
+                include={"items": True},
+            )
+            if not receipt:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Receipt with ID {receipt_id} not found",
+                )
+            await bump_data_version(tx, current_user.id, RECEIPTS)
+        return receipt
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload receipt image: {str(e)}",
+        )
+
+
+@router.get("/{receipt_id}/image")
+async def get_receipt_image(
+    receipt_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the image of a receipt with ETag and Range support (only if owned by current user)."""
+    try:
+        receipt = await db.receipt.find_unique(where={"id": receipt_id})
+        if not receipt or receipt.userId != current_user.id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Receipt with ID {receipt_id} not found",
             )
         
-        # Delete linked transactions first
-        try:
-            deleted_transactions = await db.transaction.delete_many(
-                where={
-                    "receiptId": receipt_id,
-                    "userId": current_user.id,
-                }
+        if not receipt.imageSha256:
+            if not receipt.imageData:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Receipt with ID {receipt_id} has no image",
+                )
+            # Legacy row that still stores the image inline
+            content, content_type = decode_image_data(receipt.imageData)
+            return Response(content=content, media_type=content_type)
+        
+        etag = f'"{receipt.imageSha256}"'
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+        }
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        store = get_blob_store()
+        size = await run_in_threadpool(store.size, receipt.imageSha256)
+        media_type = receipt.imageContentType or DEFAULT_CONTENT_TYPE
+        
+        byte_range = None
+        if range_header:
+            try:
+                byte_range = parse_range_header(range_header, size)
+            except ValueError:
+                return Response(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={**headers, "Content-Range": f"bytes */{size}"},
+                )
+        
+        if byte_range is None:
+            chunks = await run_in_threadpool(store.iter_range, receipt.imageSha256)
+            return StreamingResponse(
+                chunks,
+                media_type=media_type,
+                headers={**headers, "Content-Length": str(size)},
             )
-            logger.info(f"Deleted {deleted_transactions} transactions linked to receipt {receipt_id}")
-        except Exception as tx_error:
-            logger.warning(f"Failed to delete transactions for receipt {receipt_id}: {tx_error}")
         
-        # Delete receipt (items will be deleted due to cascade)
-        await db.receipt.delete(where={"id": receipt_id})
-        return None
+        start, end = byte_range
+        chunks = await run_in_threadpool(store.iter_range, receipt.imageSha256, start, end)
+        return StreamingResponse(
+            chunks,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers={
+                **headers,
+                "Content-Length": str(end - start + 1),
+                "Content-Range": f"bytes {start}-{end}/{size}",
+            },
+        )
     except HTTPException:
         raise
+    except BlobNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Image for receipt {receipt_id} is missing from storage",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete receipt: {str(e)}",
+            detail=f"Failed to fetch receipt image: {str(e)}",
+        )
+
+
+# The upload is read by the route itself, so describe the form for the API docs
+OCR_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "Receipt image to run OCR on"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+@router.post("/analyze", response_model=Job, status_code=status.HTTP_202_ACCEPTED, openapi_extra=OCR_UPLOAD_BODY)
+async def analyze_receipt_image(
+    request: Request,
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue OCR of a receipt image; poll /api/jobs/{id} or stream /api/jobs/{id}/events for the result."""
+    if not ocr_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OCR is not available on this server",
+        )
+
+    queue = get_job_queue()
+    if queue.pending >= queue.max_pending:
+        # The body is read below, so a full queue answers without receiving the upload
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many OCR jobs in progress, try again later",
+            headers={"Retry-After": "5"},
+        )
+
+    try:
+        path, _ = await spool_multipart_file(
+            request, "file", settings.max_image_upload_bytes, prefix="receiptly-ocr-"
+        )
+    except BlobTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e),
+        )
+    except MultipartUploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+
+    try:
+        job = await queue.submit(
+            db,
+            current_user.id,
+            "ocr",
+            run_ocr_job,
+            ocr_script_path(),
+            path,
+            settings.ocr_profile,
+            on_done=lambda job: remove_temp_file(path),
+        )
+    except JobQueueFullError:
+        remove_temp_file(path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many OCR jobs in progress, try again later",
+            headers={"Retry-After": "5"},
+        )
+    except Exception as e:
+        remove_temp_file(path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue OCR job: {str(e)}",
         )
+    return Job.from_job(job)
@@ -2,41 +2,106 @@
 API routes for transaction operations.
 """
 
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+import io
+import time
 import traceback
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, Header, HTTPException, status, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from prisma import Prisma
 
 from app.core.auth import get_current_user
-from app.core.database import get_database
+from app.core.bank_import import (
+    BankImportError,
+    CsvMapping,
+    iter_csv_transactions,
+    iter_ofx_transactions,
+    transaction_fingerprint,
+)
+from app.core.config import get_settings
+from app.core.database import get_database, parse_raw_datetime
+from app.core.http_cache import (
+    PRIVATE_REVALIDATE,
+    cache_headers,
+    etag_matches,
+    not_modified,
+    transactions_etag,
+)
+from app.core.pagination import keyset_where, paginate
+from app.core.rollups import (
+    add_many_to_rollup,
+    add_to_rollup,
+    apply_rollup_delta,
+    month_key,
+    remove_from_rollup,
+)
+from app.core.versions import TRANSACTIONS, bump_data_version
+from app.schemas.pagination import Page
 from app.schemas.transactions import (
     Transaction,
     TransactionCreate,
     TransactionUpdate,
     TransactionStats,
     MonthlyStats,
+    TransactionImportError,
+    TransactionImportResult,
 )
 from app.schemas.users import User
 
 router = APIRouter()
+settings = get_settings()
+
+# Errors returned in an import result; the counts cover all of them
+MAX_REPORTED_IMPORT_ERRORS = 100
+
 
+async def lock_transaction(db: Prisma, transaction_id: str, user_id: str) -> Optional[dict]:
+    """Lock a user's transaction row for the rest of the database transaction."""
+    row = await db.query_first(
+        """
+        SELECT "id", "userId", "type", "amount", "date", "description"
+        FROM "public"."transactions"
+        WHERE "id" = $1 AND "userId" = $2
+        FOR UPDATE
+        """,
+        transaction_id,
+        user_id,
+    )
+    if row:
+        # Raw queries return timestamps as ISO strings
+        row["date"] = parse_raw_datetime(row["date"])
+    return row
 
-@router.get("/", response_model=List[Transaction])
+
+@router.get("/", response_model=Union[List[Transaction], Page[Transaction]])
 async def get_transactions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor (empty for the first page); returns a page envelope",
+    ),
     type: Optional[str] = Query(None, description="Filter by type: income or expense"),
     category: Optional[str] = Query(None, description="Filter by category"),
     start_date: Optional[datetime] = Query(None, description="Filter by start date"),
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
-    """Get user's transactions with optional filters and pagination."""
+    """Get user's transactions with optional filters and offset or cursor pagination."""
     try:
+        # Answer revalidations before loading or serializing anything
+        etag = await transactions_etag(db, current_user.id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, PRIVATE_REVALIDATE)
+        response.headers.update(cache_headers(etag, PRIVATE_REVALIDATE))
+        
         # Build filter conditions
         where_conditions = {"userId": current_user.id}
         
@@ -52,6 +117,18 @@ async def get_transactions(
                 date_filter["lte"] = end_date
             where_conditions["date"] = date_filter
         
+        if cursor is not None:
+            where_conditions.update(keyset_where("date", cursor))
+            transactions = await db.transaction.find_many(
+                where=where_conditions,
+                take=limit + 1,
+                order=[{"date": "desc"}, {"id": "desc"}],
+            )
+            transactions, next_cursor = paginate(
+                transactions, limit, key=lambda transaction: (transaction.date, transaction.id)
+            )
+            return Page[Transaction](items=transactions, next_cursor=next_cursor)
+        
         transactions = await db.transaction.find_many(
             where=where_conditions,
             skip=skip,
@@ -59,6 +136,8 @@ async def get_transactions(
             order={"date": "desc"},
         )
         return transactions
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching transactions: {str(e)}")
         logging.error(traceback.format_exc())
@@ -68,43 +147,73 @@ async def get_transactions(
         )
 
 
+def build_transaction_stats(rows: List[dict]) -> TransactionStats:
+    """Build transaction statistics from per-type total and count rows."""
+    totals = {row["type"]: row for row in rows}
+    
+    total_income = totals["income"]["total"] if "income" in totals else 0.0
+    total_expenses = totals["expense"]["total"] if "expense" in totals else 0.0
+    
+    return TransactionStats(
+        totalIncome=total_income,
+        totalExpenses=total_expenses,
+        netBalance=total_income - total_expenses,
+        transactionCount=sum(row["count"] for row in rows),
+        incomeCount=totals["income"]["count"] if "income" in totals else 0,
+        expenseCount=totals["expense"]["count"] if "expense" in totals else 0,
+    )
+
+
 @router.get("/stats", response_model=TransactionStats)
 async def get_transaction_stats(
+    response: Response,
     start_date: Optional[datetime] = Query(None, description="Start date for stats"),
     end_date: Optional[datetime] = Query(None, description="End date for stats"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
     """Get transaction statistics for a date range."""
     try:
-        # Build filter conditions
-        where_conditions = {"userId": current_user.id}
+        etag = await transactions_etag(db, current_user.id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, PRIVATE_REVALIDATE)
+        response.headers.update(cache_headers(etag, PRIVATE_REVALIDATE))
         
-        if start_date or end_date:
-            date_filter = {}
-            if start_date:
-                date_filter["gte"] = start_date
-            if end_date:
-                date_filter["lte"] = end_date
-            where_conditions["date"] = date_filter
-        
-        # Fetch all transactions in range
-        transactions = await db.transaction.find_many(where=where_conditions)
+        if not start_date and not end_date:
+            # All-time totals come straight from the monthly rollup
+            rows = await db.query_raw(
+                """
+                SELECT "type", COALESCE(SUM("total"), 0)::float8 AS "total", SUM("count")::int AS "count"
+                FROM "public"."user_monthly_totals"
+                WHERE "userId" = $1
+                GROUP BY "type"
+                """,
+                current_user.id,
+            )
+            return build_transaction_stats(rows)
         
-        # Calculate statistics
-        total_income = sum(t.amount for t in transactions if t.type == "income")
-        total_expenses = sum(t.amount for t in transactions if t.type == "expense")
-        income_count = sum(1 for t in transactions if t.type == "income")
-        expense_count = sum(1 for t in transactions if t.type == "expense")
+        # Build filter conditions
+        conditions = ['"userId" = $1']
+        params: list = [current_user.id]
+        if start_date:
+            params.append(start_date)
+            conditions.append(f'"date" >= ${len(params)}::timestamp(3)')
+        if end_date:
+            params.append(end_date)
+            conditions.append(f'"date" <= ${len(params)}::timestamp(3)')
         
-        return TransactionStats(
-            totalIncome=total_income,
-            totalExpenses=total_expenses,
-            netBalance=total_income - total_expenses,
-            transactionCount=len(transactions),
-            incomeCount=income_count,
-            expenseCount=expense_count,
+        # Aggregate per type in the database
+        rows = await db.query_raw(
+            f"""
+            SELECT "type", COALESCE(SUM("amount"), 0)::float8 AS "total", COUNT(*)::int AS "count"
+            FROM "public"."transactions"
+            WHERE {" AND ".join(conditions)}
+            GROUP BY "type"
+            """,
+            *params,
         )
+        return build_transaction_stats(rows)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -114,57 +223,93 @@ async def get_transaction_stats(
 
 @router.get("/monthly", response_model=List[MonthlyStats])
 async def get_monthly_stats(
+    response: Response,
     months: int = Query(12, description="Number of months to retrieve", ge=1, le=24),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     db: Prisma = Depends(get_database),
     current_user: User = Depends(get_current_user),
 ):
-    """Get monthly transaction statistics for the past N months."""
+    """Get monthly transaction statistics for the past N months.
+    
+    The window is the exact range from `months * 31` days ago until now. Whole
+    months inside it are read from the monthly rollup; the partial months at
+    either edge are summed from the raw transactions, so neither days before
+    the window nor future-dated transactions of the current month are counted.
+    """
     try:
         # Calculate date range
-        end_date = datetime.now()
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=months * 31)  # Approximate
         
-        # Fetch all transactions in range
-        transactions = await db.transaction.find_many(
-            where={
-                "userId": current_user.id,
-                "date": {"gte": start_date, "lte": end_date},
-            },
-            order={"date": "asc"},
+        # The window moves with today, so the date is part of the version
+        etag = await transactions_etag(db, current_user.id, end_date.date())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, PRIVATE_REVALIDATE)
+        response.headers.update(cache_headers(etag, PRIVATE_REVALIDATE))
+        
+        # Months strictly between the start and end month are complete
+        start_year, start_month = month_key(start_date)
+        end_year, end_month = month_key(end_date)
+        after_start_month = datetime(
+            start_year + start_month // 12, start_month % 12 + 1, 1, tzinfo=timezone.utc
         )
+        end_month_start = datetime(end_year, end_month, 1, tzinfo=timezone.utc)
         
-        # Group by month
-        monthly_data = {}
-        for transaction in transactions:
-            key = (transaction.date.year, transaction.date.month)
-            if key not in monthly_data:
-                monthly_data[key] = {
-                    "income": 0.0,
-                    "expenses": 0.0,
-                    "count": 0,
-                }
-            
-            if transaction.type == "income":
-                monthly_data[key]["income"] += transaction.amount
-            else:
-                monthly_data[key]["expenses"] += transaction.amount
-            monthly_data[key]["count"] += 1
+        rows = await db.query_raw(
+            """
+            WITH buckets AS (
+                SELECT "year", "month", "type", "total"::float8 AS "total", "count"
+                FROM "public"."user_monthly_totals"
+                WHERE "userId" = $1
+                  AND ("year", "month") > ($6, $7)
+                  AND ("year", "month") < ($8, $9)
+                UNION ALL
+                SELECT
+                    EXTRACT(YEAR FROM "date")::int,
+                    EXTRACT(MONTH FROM "date")::int,
+                    "type",
+                    SUM("amount")::float8,
+                    COUNT(*)::int
+                FROM "public"."transactions"
+                WHERE "userId" = $1
+                  AND (("date" >= $2::timestamp(3) AND "date" < $3::timestamp(3))
+                    OR ("date" >= $4::timestamp(3) AND "date" <= $5::timestamp(3)))
+                GROUP BY 1, 2, 3
+            )
+            SELECT
+                "year",
+                "month",
+                COALESCE(SUM("total") FILTER (WHERE "type" = 'income'), 0)::float8 AS "income",
+                COALESCE(SUM("total") FILTER (WHERE "type" <> 'income'), 0)::float8 AS "expenses",
+                SUM("count")::int AS "count"
+            FROM buckets
+            GROUP BY "year", "month"
+            HAVING SUM("count") > 0
+            ORDER BY "year", "month"
+            """,
+            current_user.id,
+            start_date,
+            after_start_month,
+            end_month_start,
+            end_date,
+            start_year,
+            start_month,
+            end_year,
+            end_month,
+        )
         
         # Convert to response format
-        result = []
-        for (year, month), data in sorted(monthly_data.items()):
-            result.append(
-                MonthlyStats(
-                    year=year,
-                    month=month,
-                    totalIncome=data["income"],
-                    totalExpenses=data["expenses"],
-                    netBalance=data["income"] - data["expenses"],
-                    transactionCount=data["count"],
-                )
+        return [
+            MonthlyStats(
+                year=row["year"],
+                month=row["month"],
+                totalIncome=row["income"],
+                totalExpenses=row["expenses"],
+                netBalance=row["income"] - row["expenses"],
+                transactionCount=row["count"],
             )
-        
-        return result
+            for row in rows
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -172,6 +317,159 @@ async def get_monthly_stats(
         )
 
 
+def detect_import_format(filename: Optional[str], requested: Optional[str]) -> str:
+    """Return the import format from the query parameter or the file extension."""
+    fmt = (requested or (filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt in ("ofx", "qfx"):
+        return "ofx"
+    if fmt in ("csv", "txt"):
+        return "csv"
+    raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Unknown import format, pass format=csv or format=ofx",
+    )
+
+
+@router.post("/import", response_model=TransactionImportResult)
+async def import_transactions(
+    file: UploadFile = File(..., description="CSV or OFX bank export"),
+    import_format: Optional[str] = Query(
+        None, alias="format", description="csv or ofx (detected from the file name when omitted)"
+    ),
+    date_column: str = Query("date", description="CSV column with the booking date"),
+    amount_column: str = Query("amount", description="CSV column with the signed amount"),
+    description_column: Optional[str] = Query("description", description="CSV column with the description"),
+    category_column: Optional[str] = Query(None, description="CSV column with the category"),
+    type_column: Optional[str] = Query(None, description="CSV column with income/expense (sign of amount otherwise)"),
+    date_format: Optional[str] = Query(None, description="strptime format of the CSV dates (auto-detected otherwise)"),
+    delimiter: Optional[str] = Query(None, description="CSV delimiter (sniffed otherwise)"),
+    default_category: str = Query("Imported", min_length=1, description="Category for rows without one"),
+    db: Prisma = Depends(get_database),
+    current_user: User = Depends(get_current_user),
+):
+    """Import transactions from a CSV or OFX bank export, skipping ones that already exist."""
+    started = time.perf_counter()
+    fmt = detect_import_format(file.filename, import_format)
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    if fmt == "ofx":
+        records = iter_ofx_transactions(text)
+    else:
+        records = iter_csv_transactions(
+            text,
+            CsvMapping(
+                date=date_column,
+                amount=amount_column,
+                description=description_column,
+                category=category_column,
+                type=type_column,
+                date_format=date_format,
+                delimiter=delimiter,
+            ),
+        )
+    
+    result = TransactionImportResult(
+        format=fmt, rows=0, imported=0, duplicates=0, failed=0, seconds=0.0, rowsPerSecond=0.0
+    )
+    
+    def fail(row: Optional[int], error: str) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_IMPORT_ERRORS:
+            result.errors.append(TransactionImportError(row=row, error=error))
+    
+    # The n-th occurrence of a fingerprint in this import is new only if fewer than
+    # n rows with it existed before, so repeated identical rows (two coffees on one
+    # day) are kept while re-importing the same file stays idempotent
+    occurrences: Dict[str, int] = {}
+    existing_counts: Dict[str, int] = {}
+    try:
+        while True:
+            # Parse the next batch off the event loop
+            try:
+                batch = await run_in_threadpool(
+                    lambda: list(islice(records, settings.bulk_import_chunk_size))
+                )
+            except ValueError as e:
+                if not result.rows:
+                    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+                fail(None, str(e))
+                break
+            if not batch:
+                break
+            result.rows += len(batch)
+            
+            candidates = []
+            for record in batch:
+                if isinstance(record, BankImportError):
+                    fail(record.row, record.error)
+                    continue
+                if not record.amount:
+                    fail(record.row, "Amount is zero")
+                    continue
+                transaction_type = record.transaction_type
+                fingerprint = transaction_fingerprint(
+                    current_user.id, record.date, transaction_type, abs(record.amount), record.description
+                )
+                candidates.append({
+                    "userId": current_user.id,
+                    "type": transaction_type,
+                    "amount": float(abs(record.amount)),
+                    "category": record.category or default_category,
+                    "description": record.description,
+                    "date": record.date,
+                    "fingerprint": fingerprint,
+                })
+            if not candidates:
+                continue
+            
+            # Count stored rows once per fingerprint, before this import inserts any of them
+            unknown = list({row["fingerprint"] for row in candidates} - existing_counts.keys())
+            if unknown:
+                existing_counts.update(dict.fromkeys(unknown, 0))
+                existing = await db.transaction.find_many(
+                    where={"userId": current_user.id, "fingerprint": {"in": unknown}},
+                )
+                for transaction in existing:
+                    existing_counts[transaction.fingerprint] += 1
+            
+            rows = []
+            for row in candidates:
+                fingerprint = row["fingerprint"]
+                occurrences[fingerprint] = occurrences.get(fingerprint, 0) + 1
+                if occurrences[fingerprint] <= existing_counts[fingerprint]:
+                    result.duplicates += 1
+                else:
+                    rows.append(row)
+            if not rows:
+                continue
+            
+            async with db.tx(timeout=timedelta(seconds=60)) as tx:
+                await tx.transaction.create_many(data=rows)
+                await add_many_to_rollup(
+                    tx, current_user.id, ((row["date"], row["type"], row["amount"]) for row in rows)
+                )
+                await bump_data_version(tx, current_user.id, TRANSACTIONS)
+            result.imported += len(rows)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Transaction import failed: {str(e)}")
+        logging.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import transactions after {result.imported} rows: {str(e)}",
+        )
+    finally:
+        text.detach()
+    
+    result.seconds = round(time.perf_counter() - started, 3)
+    result.rowsPerSecond = round(result.rows / result.seconds, 1) if result.seconds else 0.0
+    logging.info(
+        f"Imported {result.imported} of {result.rows} transactions for user {current_user.id} "
+        f"({result.duplicates} duplicates, {result.failed} failed) in {result.seconds}s"
+    )
+    return result
+
+
 @router.get("/{transaction_id}", response_model=Transaction)
 async def get_transaction(
     transaction_id: str,
@@ -213,16 +511,26 @@ async def create_transaction(
 ):
     """Create a new transaction for the current user."""
     try:
-        transaction = await db.transaction.create(
-            data={
-                "type": transaction_data.type,
-                "amount": transaction_data.amount,
-                "category": transaction_data.category,
-                "description": transaction_data.description,
-                "date": transaction_data.date,
-                "userId": current_user.id,
-            }
-        )
+        async with db.tx() as tx:
+            transaction = await tx.transaction.create(
+                data={
+                    "type": transaction_data.type,
+                    "amount": transaction_data.amount,
+                    "category": transaction_data.category,
+                    "description": transaction_data.description,
+                    "date": transaction_data.date,
+                    "userId": current_user.id,
+                    "fingerprint": transaction_fingerprint(
+                        current_user.id,
+                        transaction_data.date,
+                        transaction_data.type,
+                        transaction_data.amount,
+                        transaction_data.description,
+                    ),
+                }
+            )
+            await add_to_rollup(tx, transaction)
+            await bump_data_version(tx, current_user.id, TRANSACTIONS)
         return transaction
     except Exception as e:
         raise HTTPException(
@@ -240,22 +548,32 @@ async def update_transaction(
 ):
     """Update an existing transaction (only if owned by current user)."""
     try:
-        # Check if transaction exists and is owned by user
-        existing_transaction = await db.transaction.find_unique(
-            where={"id": transaction_id}
-        )
-        if not existing_transaction or existing_transaction.userId != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Transaction with ID {transaction_id} not found",
+        async with db.tx() as tx:
+            # Check if transaction exists and is owned by user
+            existing = await lock_transaction(tx, transaction_id, current_user.id)
+            if not existing:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Transaction with ID {transaction_id} not found",
+                )
+            
+            # Update transaction with only provided fields
+            update_data = transaction_data.model_dump(exclude_unset=True)
+            merged = {**existing, **update_data}
+            update_data["fingerprint"] = transaction_fingerprint(
+                current_user.id, merged["date"], merged["type"], merged["amount"], merged["description"]
             )
-        
-        # Update transaction with only provided fields
-        update_data = transaction_data.model_dump(exclude_unset=True)
-        transaction = await db.transaction.update(
-            where={"id": transaction_id},
-            data=update_data,
-        )
+            transaction = await tx.transaction.update(
+                where={"id": transaction_id},
+                data=update_data,
+            )
+            
+            # Move the old amount out of the rollup and the new one in
+            await apply_rollup_delta(
+                tx, current_user.id, existing["date"], existing["type"], -existing["amount"], -1
+            )
+            await add_to_rollup(tx, transaction)
+            await bump_data_version(tx, current_user.id, TRANSACTIONS)
         return transaction
     except HTTPException:
         raise
@@ -274,18 +592,18 @@ async def delete_transaction(
 ):
     """Delete a transaction (only if owned by current user)."""
     try:
-        # Check if transaction exists and is owned by user
-        existing_transaction = await db.transaction.find_unique(
-            where={"id": transaction_id}
-        )
-        if not existing_transaction or existing_transaction.userId != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Transaction with ID {transaction_id} not found",
+        async with db.tx() as tx:
+            # Ownership is part of the filter; the deleted row carries the rollup delta
+            transaction = await tx.transaction.delete(
+                where={"id": transaction_id, "userId": current_user.id}
             )
-        
-        # Delete transaction
-        await db.transaction.delete(where={"id": transaction_id})
+            if not transaction:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Transaction with ID {transaction_id} not found",
+                )
+            await remove_from_rollup(tx, transaction)
+            await bump_data_version(tx, current_user.id, TRANSACTIONS)
         return None
     except HTTPException:
         raise
@@ -0,0 +1,118 @@
+"""
+Item spend analytics computed in the database.
+
+Items are grouped by their normalized name (lower case, collapsed whitespace) and
+by purchase month over the receipts of a single user. Results are cached per user
+in process, tagged with the user's receipts version from `user_data_versions`
+(see app/core/versions.py).
+
+The version is read before the query and a cached result is only served while
+it is still current. Every write bumps the version in its own transaction, so a
+write handled by any worker process invalidates the caches of all of them, and a
+query that read the old rows stores its result under the old version, where no
+later request will find it.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from prisma import Prisma
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import register_cache
+
+settings = get_settings()
+
+# user ID -> (receipts version, {query parameters -> result}), so a new version drops every variant
+analytics_cache: TTLCache[str, Tuple[int, Dict[Tuple, Any]]] = TTLCache(
+    max_size=settings.analytics_cache_max_users,
+    ttl_seconds=settings.analytics_cache_ttl_seconds,
+)
+register_cache("analytics", analytics_cache)
+
+NORMALIZED_ITEM_NAME = """LOWER(REGEXP_REPLACE(TRIM(i."name"), '\\s+', ' ', 'g'))"""
+
+
+def get_cached_analytics(user_id: str, key: Tuple, version: int) -> Optional[Any]:
+    """Return cached analytics of a user if they were computed at `version`."""
+    entry = analytics_cache.get(user_id)
+    if entry is None or entry[0] != version:
+        return None
+    return entry[1].get(key)
+
+
+def set_cached_analytics(user_id: str, key: Tuple, value: Any, version: int) -> None:
+    """Cache analytics of a user computed from their data at `version`."""
+    entry = analytics_cache.get(user_id)
+    if entry is not None and entry[0] > version:
+        # A newer result is already cached, this one is stale
+        return
+    entries = entry[1] if entry is not None and entry[0] == version else {}
+    entries[key] = value
+    analytics_cache.set(user_id, (version, entries))
+
+
+async def query_item_spend(
+    db: Prisma,
+    user_id: str,
+    top: int,
+    name: Optional[str] = None,
+    purchased_from: Optional[datetime] = None,
+    purchased_to: Optional[datetime] = None,
+) -> List[dict]:
+    """Return per-month spend and price rows for the user's top items by spend.
+
+    Each row carries the month aggregates of one item along with the item's
+    totals over the whole period, ordered by item name, year and month.
+    """
+    conditions = ['r."userId" = $1']
+    params: list = [user_id]
+    if name:
+        params.append(" ".join(name.lower().split()))
+        conditions.append(f"{NORMALIZED_ITEM_NAME} = ${len(params)}")
+    if purchased_from:
+        params.append(purchased_from)
+        conditions.append(f'r."purchasedAt" >= ${len(params)}::timestamp(3)')
+    if purchased_to:
+        params.append(purchased_to)
+        conditions.append(f'r."purchasedAt" <= ${len(params)}::timestamp(3)')
+    params.append(top)
+
+    return await db.query_raw(
+        f"""
+        WITH user_items AS (
+            SELECT {NORMALIZED_ITEM_NAME} AS "name", i."price", i."quantity",
+                   i."price" * i."quantity" AS "spend", r."purchasedAt"
+            FROM "public"."items" i
+            JOIN "public"."receipts" r ON r."id" = i."receiptId"
+            WHERE {" AND ".join(conditions)}
+        ),
+        top_items AS (
+            SELECT "name", SUM("spend") AS "spend", SUM("quantity") AS "quantity",
+                   COUNT(*)::int AS "purchases"
+            FROM user_items
+            GROUP BY "name"
+            ORDER BY SUM("spend") DESC, "name"
+            LIMIT ${len(params)}
+        )
+        SELECT
+            u."name",
+            EXTRACT(YEAR FROM u."purchasedAt")::int AS "year",
+            EXTRACT(MONTH FROM u."purchasedAt")::int AS "month",
+            SUM(u."spend") AS "spend",
+            SUM(u."quantity") AS "quantity",
+            COUNT(*)::int AS "purchases",
+            AVG(u."price") AS "avgPrice",
+            MIN(u."price") AS "minPrice",
+            MAX(u."price") AS "maxPrice",
+            t."spend" AS "totalSpend",
+            t."quantity" AS "totalQuantity",
+            t."purchases" AS "totalPurchases"
+        FROM user_items u
+        JOIN top_items t ON t."name" = u."name"
+        GROUP BY u."name", 2, 3, t."spend", t."quantity", t."purchases"
+        ORDER BY t."spend" DESC, u."name", 2, 3
+        """,
+        *params,
+    )
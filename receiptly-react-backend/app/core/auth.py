@@ -12,8 +12,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from prisma import Prisma
 
+from app.core.cache import TTLCache
 from app.core.config import get_settings
 from app.core.database import get_database
+from app.core.metrics import register_cache
+from app.core.passwords import PasswordHasher, PasswordPoolSaturatedError
 from app.schemas.users import User
 
 
@@ -25,21 +28,40 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
 
 # HTTP Bearer token extractor
 security = HTTPBearer()
 
+# Authenticated users by ID, saves the user lookup on most requests. No route
+# changes or deletes users yet; one that does must drop the entry with
+# user_cache.invalidate(), until then the TTL bounds staleness of manual edits.
+user_cache: TTLCache[str, User] = TTLCache(
+    max_size=settings.user_cache_max_size,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
+register_cache("users", user_cache)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
+    """Verify a password against its hash (blocking, for scripts)."""
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password."""
+    """Hash a password (blocking, for scripts)."""
     return pwd_context.hash(password)
 
 
+async def hash_password(password: str) -> str:
+    """Hash a password on the password worker pool."""
+    return await password_hasher.hash(password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -53,18 +75,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify a JWT token and return the subject (user ID)."""
+def build_token_claims(user: User) -> dict:
+    """Build the JWT claims for a user.
+    
+    In trust-token-claims mode the name and email are embedded so that
+    authenticated requests don't need to look the user up.
+    """
+    claims = {"sub": user.id}
+    if settings.trust_token_claims:
+        claims.update({"name": user.name, "email": user.email})
+    return claims
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT token and return its claims."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             return None
-        return user_id
+        return payload
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[str]:
+    """Verify a JWT token and return the subject (user ID)."""
+    payload = decode_token(token)
+    return payload["sub"] if payload else None
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Prisma = Depends(get_database),
@@ -78,10 +117,19 @@ async def get_current_user(
     
     # Extract token from credentials
     token = credentials.credentials
-    user_id = verify_token(token)
+    payload = decode_token(token)
     
-    if user_id is None:
+    if payload is None:
         raise credentials_exception
+    user_id = payload["sub"]
+    
+    # Trust the identity embedded in the token, no lookup needed
+    if settings.trust_token_claims and payload.get("name") and payload.get("email"):
+        return User(id=user_id, name=payload["name"], email=payload["email"])
+    
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
     
     # Get user from database
     try:
@@ -90,11 +138,13 @@ async def get_current_user(
             raise credentials_exception
         
         # Convert to User schema (without password)
-        return User(
+        current_user = User(
             id=user.id,
             name=user.name,
             email=user.email,
         )
+        user_cache.set(user_id, current_user)
+        return current_user
     except Exception:
         raise credentials_exception
 
@@ -103,13 +153,17 @@ async def authenticate_user(email: str, password: str, db: Prisma) -> Optional[U
     """Authenticate a user by email and password."""
     try:
         user = await db.user.find_unique(where={"email": email})
-        if not user or not verify_password(password, user.password):
+        if not user or not await password_hasher.verify(password, user.password):
             return None
         
-        return User(
+        authenticated_user = User(
             id=user.id,
             name=user.name,
             email=user.email,
         )
+        user_cache.set(user.id, authenticated_user)
+        return authenticated_user
+    except PasswordPoolSaturatedError:
+        raise
     except Exception:
         return None
\ No newline at end of file
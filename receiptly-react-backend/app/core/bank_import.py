@@ -0,0 +1,169 @@
+"""
+Parsing and de-duplication of bank statement exports (CSV and OFX).
+
+Both formats are read record by record from a text stream, so large exports are
+never loaded into memory at once. Every transaction gets a fingerprint over
+(user, day, signed amount, normalized description). An import skips the n-th
+occurrence of a fingerprint in the file when the user already had at least n
+transactions with it, so identical rows are kept and re-imports add nothing.
+"""
+
+import csv
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterator, Optional, TextIO, Union
+
+from app.core.dates import parse_receipt_date
+from app.core.numbers import parse_money
+
+_OFX_TRANSACTION_RE = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_OFX_FIELD_RE = re.compile(r"<(\w+)>([^<\r\n]*)")
+_OFX_DATE_RE = re.compile(r"^(\d{8})(\d{6})?")
+OFX_READ_SIZE = 64 * 1024
+OFX_MAX_RECORD_CHARS = 64 * 1024
+
+
+@dataclass
+class BankTransaction:
+    """A transaction read from a bank export, with the row it came from."""
+    row: int
+    date: datetime
+    amount: Decimal
+    description: Optional[str]
+    category: Optional[str] = None
+    type: Optional[str] = None
+
+    @property
+    def transaction_type(self) -> str:
+        """Explicit type if the export has one, otherwise derived from the sign."""
+        if self.type in ("income", "expense"):
+            return self.type
+        return "income" if self.amount > 0 else "expense"
+
+
+@dataclass
+class BankImportError:
+    """A row of a bank export that could not be read."""
+    row: int
+    error: str
+
+
+@dataclass
+class CsvMapping:
+    """Names of the CSV columns holding each transaction field."""
+    date: str = "date"
+    amount: str = "amount"
+    description: Optional[str] = "description"
+    category: Optional[str] = None
+    type: Optional[str] = None
+    date_format: Optional[str] = None
+    delimiter: Optional[str] = None
+
+
+def normalize_description(description: Optional[str]) -> str:
+    """Lower-case a description and collapse whitespace for fingerprinting."""
+    return " ".join((description or "").lower().split())
+
+
+def transaction_fingerprint(
+    user_id: str, date: datetime, type: str, amount: Union[float, Decimal], description: Optional[str]
+) -> str:
+    """Return the de-duplication fingerprint of a transaction.
+
+    Must stay in sync with the SQL backfill in the add_transaction_fingerprint
+    migration: md5 of "userId|YYYY-MM-DD|signed amount with 2 decimals|description".
+    """
+    signed = float(amount) if type == "income" else -float(amount)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    key = f"{user_id}|{date:%Y-%m-%d}|{signed:.2f}|{normalize_description(description)}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def _parse_date(value: str, date_format: Optional[str]) -> datetime:
+    value = (value or "").strip()
+    parsed = datetime.strptime(value, date_format) if date_format else parse_receipt_date(value)
+    if parsed is None:
+        raise ValueError(f"Cannot parse date {value!r}")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def iter_csv_transactions(
+    stream: TextIO, mapping: CsvMapping
+) -> Iterator[Union[BankTransaction, BankImportError]]:
+    """Yield transactions (or per-row errors) from a CSV export with a header row."""
+    delimiter = mapping.delimiter
+    if not delimiter:
+        sample = stream.read(8192)
+        stream.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+        except csv.Error:
+            delimiter = ","
+
+    reader = csv.DictReader(stream, delimiter=delimiter)
+    missing = [
+        column
+        for column in (mapping.date, mapping.amount, mapping.description, mapping.category, mapping.type)
+        if column and column not in (reader.fieldnames or [])
+    ]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    for record in reader:
+        # Header is line 1
+        row = reader.line_num
+        try:
+            yield BankTransaction(
+                row=row,
+                date=_parse_date(record[mapping.date], mapping.date_format),
+                amount=parse_money(record[mapping.amount]),
+                description=(record[mapping.description] or None) if mapping.description else None,
+                category=(record[mapping.category] or None) if mapping.category else None,
+                type=(record[mapping.type] or "").strip().lower() or None if mapping.type else None,
+            )
+        except (ValueError, TypeError) as e:
+            yield BankImportError(row=row, error=str(e))
+
+
+def _parse_ofx_date(value: str) -> datetime:
+    match = _OFX_DATE_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Cannot parse OFX date {value!r}")
+    return datetime.strptime(match.group(1) + (match.group(2) or "000000"), "%Y%m%d%H%M%S").replace(
+        tzinfo=timezone.utc
+    )
+
+
+def iter_ofx_transactions(stream: TextIO) -> Iterator[Union[BankTransaction, BankImportError]]:
+    """Yield transactions (or per-record errors) from an OFX 1.x (SGML) or 2.x (XML) export."""
+    buffer = ""
+    row = 0
+    while True:
+        chunk = stream.read(OFX_READ_SIZE)
+        buffer += chunk
+        end = 0
+        for match in _OFX_TRANSACTION_RE.finditer(buffer):
+            end = match.end()
+            row += 1
+            fields = {name.upper(): value.strip() for name, value in _OFX_FIELD_RE.findall(match.group(1))}
+            try:
+                yield BankTransaction(
+                    row=row,
+                    date=_parse_ofx_date(fields.get("DTPOSTED", "")),
+                    amount=parse_money(fields.get("TRNAMT", "")),
+                    description=fields.get("NAME") or fields.get("MEMO") or None,
+                )
+            except ValueError as e:
+                yield BankImportError(row=row, error=str(e))
+        # Keep only the unfinished tail, starting at the next transaction if there is one
+        buffer = buffer[end:]
+        start = buffer.upper().find("<STMTTRN>")
+        buffer = buffer[start:] if start >= 0 else buffer[-len("<STMTTRN>"):]
+        if len(buffer) > OFX_MAX_RECORD_CHARS:
+            raise ValueError(f"OFX transaction {row + 1} exceeds {OFX_MAX_RECORD_CHARS} characters")
+        if not chunk:
+            return
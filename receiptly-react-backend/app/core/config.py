@@ -21,6 +21,58 @@ class Settings(BaseSettings):
     host: str = Field(default="0.0.0.0", description="Server host")
     port: int = Field(default=8000, description="Server port")
     debug: bool = Field(default=True, description="Enable debug mode")
+    web_workers: int = Field(
+        default=0,
+        description="Worker processes started by serve.py (0 = one per CPU)",
+    )
+    db_connection_budget: int = Field(
+        default=80,
+        description="Database connections shared by all workers; keep below Postgres max_connections",
+    )
+    db_pool_timeout: int = Field(
+        default=10,
+        description="Seconds a query waits for a free pooled connection",
+    )
+    graceful_shutdown_seconds: int = Field(
+        default=25,
+        description="Seconds in-flight requests may take to finish on shutdown",
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        description="Record request, query and job metrics and expose them on /metrics",
+    )
+    metrics_token: str = Field(
+        default="",
+        description="Bearer token a scraper must send to read /metrics; empty keeps /metrics closed",
+    )
+    metrics_dir: str = Field(
+        default="",
+        description="Directory where the web workers of one server share their metrics; serve.py sets it for several workers",
+    )
+    query_timing_enabled: bool = Field(
+        default=False,
+        description="Count and time database queries per request and send a Server-Timing header",
+    )
+    query_budget: int = Field(
+        default=10,
+        description="Database queries per request above which a warning is logged in debug mode",
+    )
+    health_db_timeout_seconds: float = Field(
+        default=2.0,
+        description="Seconds the readiness database ping may take before the replica is unready",
+    )
+    health_cache_seconds: float = Field(
+        default=1.0,
+        description="Seconds a readiness database ping result is reused by later probes",
+    )
+    health_max_query_p99_seconds: float = Field(
+        default=2.0,
+        description="Recent query p99 latency above which the replica reports unready",
+    )
+    health_max_loop_lag_seconds: float = Field(
+        default=0.5,
+        description="Event-loop lag since the last probe above which the replica reports unready",
+    )
     
     # CORS
     cors_origins: str = Field(
@@ -33,6 +85,80 @@ class Settings(BaseSettings):
         default="your-secret-key-here-change-in-production-make-it-long-and-random",
         description="JWT secret key for authentication",
     )
+    password_hash_workers: int = Field(
+        default=2,
+        description="Worker threads dedicated to bcrypt hashing and verification",
+    )
+    password_hash_max_queue: int = Field(
+        default=32,
+        description="Password operations allowed to wait for a worker before rejecting with 503",
+    )
+    user_cache_max_size: int = Field(
+        default=1024,
+        description="Maximum number of authenticated users kept in the in-process cache",
+    )
+    user_cache_ttl_seconds: float = Field(
+        default=60.0,
+        description="Seconds an authenticated user stays in the in-process cache",
+    )
+    trust_token_claims: bool = Field(
+        default=False,
+        description="Embed name and email in JWTs and skip the user lookup on each request",
+    )
+    analytics_cache_max_users: int = Field(
+        default=1024,
+        description="Maximum number of users whose item analytics are kept in the in-process cache",
+    )
+    analytics_cache_ttl_seconds: float = Field(
+        default=300.0,
+        description="Seconds cached item analytics stay valid if no write invalidates them",
+    )
+    
+    # Blob storage
+    blob_storage_backend: str = Field(
+        default="local",
+        description="Blob storage backend for receipt images",
+    )
+    blob_storage_path: str = Field(
+        default="./storage/blobs",
+        description="Root directory of the local blob storage backend",
+    )
+    max_image_upload_bytes: int = Field(
+        default=20 * 1024 * 1024,
+        description="Maximum accepted size of an uploaded receipt image in bytes",
+    )
+    
+    # Bulk imports
+    bulk_import_chunk_size: int = Field(
+        default=500,
+        description="Rows inserted per database transaction during bulk imports",
+    )
+    bulk_import_max_row_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        description="Maximum size of a single row in a bulk import body",
+    )
+    
+    # OCR jobs
+    ocr_script_path: str = Field(
+        default="../ocr_script.py",
+        description="Path to the OCR script whose pipeline the analyze endpoint runs",
+    )
+    ocr_profile: str = Field(
+        default="auto",
+        description="Preprocessing profile for server-side OCR: fast, quality or auto",
+    )
+    ocr_workers: int = Field(
+        default=2,
+        description="Worker processes running OCR jobs concurrently, per web worker",
+    )
+    ocr_max_pending_jobs: int = Field(
+        default=16,
+        description="Queued or running OCR jobs per web worker before new ones are rejected with 503",
+    )
+    ocr_job_ttl_seconds: int = Field(
+        default=3600,
+        description="Seconds finished OCR jobs are kept for polling",
+    )
     
     def get_cors_origins(self) -> List[str]:
         """Parse CORS origins from comma-separated string."""
@@ -2,8 +2,15 @@
 Database connection and utility functions.
 """
 
+import time
+from datetime import datetime
+from typing import Any, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from prisma import Prisma
 
+from app.core.metrics import record_query
+
 # This will be set by main.py with the connected instance
 db: Prisma = None
 
@@ -14,8 +21,47 @@ def set_database(database: Prisma):
     db = database
 
 
+class InstrumentedPrisma(Prisma):
+    """Prisma client that times every query for the metrics endpoint.
+
+    All model actions and raw queries go through `_execute`, and transaction
+    clients are copies of this class, so queries inside `db.tx()` are recorded too.
+    """
+
+    async def _execute(self, *, method: str, arguments: dict, model: Any = None, **kwargs) -> Any:
+        model_name = model.__name__ if model is not None else "raw"
+        start = time.perf_counter()
+        try:
+            result = await super()._execute(method=method, arguments=arguments, model=model, **kwargs)
+        except Exception:
+            record_query(model_name, method, time.perf_counter() - start, failed=True)
+            raise
+        record_query(model_name, method, time.perf_counter() - start)
+        return result
+
+
 async def get_database() -> Prisma:
     """Get the database connection."""
     if db is None:
         raise RuntimeError("Database not initialized. Call set_database() first.")
     return db
+
+
+def parse_raw_datetime(value: Union[str, datetime]) -> datetime:
+    """Parse a timestamp returned by a raw query (ISO string) into a datetime."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def with_connection_limit(url: str, connection_limit: int, pool_timeout: int) -> str:
+    """Set the Prisma pool size and timeout on a database URL.
+
+    Values already present in the URL win, so an explicit `connection_limit` in
+    DATABASE_URL is never overridden.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault("connection_limit", str(connection_limit))
+    query.setdefault("pool_timeout", str(pool_timeout))
+    return urlunsplit(parts._replace(query=urlencode(query)))
@@ -0,0 +1,69 @@
+"""
+Parsing of the free-form receipt date and time strings.
+
+Receipts carry the purchase date and time as typed in or OCR'd. They are parsed
+once when a receipt is written and stored as the `purchasedAt` timestamp, so
+reads can filter and sort on an indexed column.
+"""
+
+from datetime import datetime, time, timezone
+from typing import Optional
+
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+    "%d.%m.%y",
+    "%d/%m/%Y",
+    "%d/%m/%y",
+    "%d-%m-%Y",
+)
+TIME_FORMATS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M:%S %p")
+
+
+def parse_receipt_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse a receipt date (ISO timestamps and common day-first formats)."""
+    if not value:
+        return None
+    value = value.strip()
+    if "T" in value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_receipt_time(value: Optional[str]) -> Optional[time]:
+    """Parse a receipt time such as "14:05", "14:05:30" or "2:05 PM"."""
+    if not value:
+        return None
+    value = value.strip().upper()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_purchased_at(date: Optional[str], time_of_day: Optional[str]) -> Optional[datetime]:
+    """Combine a receipt's date and time strings into a UTC timestamp.
+
+    Returns None if the date cannot be parsed. Dates without a timezone are
+    treated as UTC, and the time is only applied to plain dates.
+    """
+    purchased_at = parse_receipt_date(date)
+    if purchased_at is None:
+        return None
+    if purchased_at.tzinfo is None:
+        parsed_time = parse_receipt_time(time_of_day)
+        if parsed_time is not None and purchased_at.time() == time.min:
+            purchased_at = datetime.combine(purchased_at.date(), parsed_time)
+        return purchased_at.replace(tzinfo=timezone.utc)
+    return purchased_at.astimezone(timezone.utc)
@@ -0,0 +1,171 @@
+"""
+Liveness and readiness checks.
+
+Readiness pings the database with a `SELECT 1` under a timeout and combines it
+with pool usage, recent query latency and event-loop lag. The database ping is
+cached for a short time and shared by concurrent probes, so frequent checks from
+several load balancers cost at most one query per cache window.
+"""
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from prisma import Prisma
+
+from app.core.config import get_settings
+from app.core.metrics import probe_queries, query_latency_quantiles
+
+logger = logging.getLogger(__name__)
+
+# Seconds between event-loop lag samples
+LOOP_LAG_INTERVAL = 0.25
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep.
+
+    The largest delay seen since the previous `take_max_lag()` call is reported,
+    so each probe covers the whole interval since the last one.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sample())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._max_lag = max(self._max_lag, loop.time() - expected)
+
+    def take_max_lag(self) -> float:
+        """Return the largest lag since the last call and start a new window."""
+        lag, self._max_lag = self._max_lag, 0.0
+        return max(lag, 0.0)
+
+
+@lru_cache()
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    """Get the process-wide event-loop lag monitor."""
+    return LoopLagMonitor()
+
+
+def configured_pool_size(database_url: str) -> Optional[int]:
+    """Return the Prisma `connection_limit` of a database URL, if set."""
+    value = dict(parse_qsl(urlsplit(database_url).query)).get("connection_limit")
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+class DatabaseProbe:
+    """Cached `SELECT 1` round trip shared by concurrent readiness probes."""
+
+    def __init__(self, timeout: float, cache_seconds: float):
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._checked_at = 0.0
+        self._result: Dict[str, Any] = {}
+        self._lock = asyncio.Lock()
+
+    async def check(self, db: Prisma) -> Dict[str, Any]:
+        """Return `{"ok", "latency_ms", "error"}` of the latest ping."""
+        async with self._lock:
+            if self._result and time.monotonic() - self._checked_at < self.cache_seconds:
+                return self._result
+
+            start = time.perf_counter()
+            try:
+                with probe_queries():
+                    await asyncio.wait_for(db.query_raw("SELECT 1"), self.timeout)
+                latency_ms = round((time.perf_counter() - start) * 1000, 2)
+                result = {"ok": True, "latency_ms": latency_ms, "error": None}
+            except asyncio.TimeoutError:
+                result = {"ok": False, "latency_ms": None, "error": f"timed out after {self.timeout}s"}
+            except Exception as e:
+                logger.warning(f"Readiness database check failed: {e}")
+                result = {"ok": False, "latency_ms": None, "error": str(e)}
+
+            self._result = result
+            self._checked_at = time.monotonic()
+            return result
+
+
+@lru_cache()
+def get_database_probe() -> DatabaseProbe:
+    """Get the process-wide database probe."""
+    settings = get_settings()
+    return DatabaseProbe(
+        timeout=settings.health_db_timeout_seconds,
+        cache_seconds=settings.health_cache_seconds,
+    )
+
+
+async def pool_stats(db: Prisma) -> Dict[str, Any]:
+    """Return connection pool usage from the Prisma engine metrics.
+
+    Needs the `metrics` preview feature of the Prisma client; without it the
+    values are reported as null.
+    """
+    size = configured_pool_size(get_settings().database_url)
+    stats: Dict[str, Any] = {"size": size, "busy": None, "idle": None, "waiting": None, "saturation": None}
+    try:
+        metrics = await db.get_metrics()
+    except Exception as e:
+        logger.debug(f"Prisma pool metrics unavailable: {e}")
+        return stats
+
+    gauges = {gauge.key: gauge.value for gauge in metrics.gauges}
+    stats["busy"] = int(gauges.get("prisma_pool_connections_busy", 0))
+    stats["idle"] = int(gauges.get("prisma_pool_connections_idle", 0))
+    stats["waiting"] = int(gauges.get("prisma_client_queries_wait", 0))
+    if size:
+        stats["saturation"] = round(stats["busy"] / size, 3)
+    return stats
+
+
+async def readiness(db: Prisma) -> Dict[str, Any]:
+    """Run the readiness checks and return their results with an overall verdict."""
+    settings = get_settings()
+    database = await get_database_probe().check(db)
+    pool = await pool_stats(db)
+    p50, p99 = query_latency_quantiles(0.5, 0.99)
+    loop_lag = get_loop_lag_monitor().take_max_lag()
+
+    problems = []
+    if not database["ok"]:
+        problems.append(f"database unreachable: {database['error']}")
+    if pool["waiting"] and pool["saturation"] is not None and pool["saturation"] >= 1:
+        problems.append(f"connection pool exhausted ({pool['waiting']} queries waiting)")
+    if p99 is not None and p99 > settings.health_max_query_p99_seconds:
+        problems.append(f"query p99 {p99:.3f}s above {settings.health_max_query_p99_seconds}s")
+    if loop_lag > settings.health_max_loop_lag_seconds:
+        problems.append(f"event loop lag {loop_lag:.3f}s above {settings.health_max_loop_lag_seconds}s")
+
+    return {
+        "status": "ready" if not problems else "unavailable",
+        "problems": problems,
+        "database": database,
+        "pool": pool,
+        "query_latency_ms": {
+            "p50": round(p50 * 1000, 2) if p50 is not None else None,
+            "p99": round(p99 * 1000, 2) if p99 is not None else None,
+        },
+        "event_loop_lag_ms": round(loop_lag * 1000, 2),
+    }
@@ -0,0 +1,75 @@
+"""
+Conditional GET support for per-user read endpoints.
+
+ETags are weak validators derived from the per-user data versions in
+`app.core.versions`, which every write bumps in its own database transaction. A
+route reads that single row, and answers `If-None-Match` with 304 before it loads
+or serializes the payload.
+
+The version is read before the data, so a write racing with a request can only
+make the ETag older than the body, which costs the client one extra full fetch
+and never serves stale data.
+"""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response, status
+from prisma import Prisma
+
+from app.core.versions import RECEIPTS, TRANSACTIONS, get_data_versions
+
+# Cache-Control policies; every payload is per user, so shared caches must not store it
+PRIVATE_REVALIDATE = "private, no-cache"
+
+# Bump to invalidate all ETags after a change to response serialization
+ETAG_FORMAT_VERSION = "1"
+
+
+def make_etag(*parts: Any) -> str:
+    """Return a weak ETag over the given version parts."""
+    digest = hashlib.sha1(
+        "|".join([ETAG_FORMAT_VERSION] + [str(part) for part in parts]).encode("utf-8")
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True if an If-None-Match header matches an ETag (weak comparison).
+
+    `*` matches any ETag; routes for a single resource must check that the resource
+    exists before answering 304 to it.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str, cache_control: str) -> dict:
+    """Return the validator and caching headers of a cacheable response."""
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Return an empty 304 response carrying the caching headers."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=cache_headers(etag, cache_control),
+    )
+
+
+async def receipts_etag(db: Prisma, user_id: str, *extra: Any) -> str:
+    """ETag over the receipts and items of a user; extra parts narrow it to one resource."""
+    versions = await get_data_versions(db, user_id)
+    return make_etag(RECEIPTS, user_id, versions.receipts, *extra)
+
+
+async def transactions_etag(db: Prisma, user_id: str, *extra: Any) -> str:
+    """ETag over the transactions of a user; extra parts cover time-relative responses."""
+    versions = await get_data_versions(db, user_id)
+    return make_etag(TRANSACTIONS, user_id, versions.transactions, *extra)
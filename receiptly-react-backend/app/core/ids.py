@@ -0,0 +1,49 @@
+"""
+Record IDs generated in the application.
+
+Prisma fills `@default(cuid())` IDs on the client, but `create_many` returns only
+a count, so bulk inserts that link rows assign the IDs themselves. They use the
+same cuid layout as Prisma so IDs look alike whichever path created the row.
+"""
+
+import itertools
+import os
+import secrets
+import socket
+import time
+
+_BASE = 36
+_BLOCK = 4
+_BLOCK_SIZE = _BASE ** _BLOCK
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+_counter = itertools.count(secrets.randbelow(_BLOCK_SIZE))
+
+
+def _base36(value: int, width: int) -> str:
+    digits = []
+    while value:
+        value, digit = divmod(value, _BASE)
+        digits.append(_DIGITS[digit])
+    return "".join(reversed(digits)).rjust(width, "0")[-width:]
+
+
+def _fingerprint() -> str:
+    host = socket.gethostname()
+    host_id = sum(ord(char) for char in host) + len(host) + _BASE
+    return _base36(os.getpid(), 2) + _base36(host_id, 2)
+
+
+_FINGERPRINT = _fingerprint()
+
+
+def cuid() -> str:
+    """Return a collision-resistant ID in the cuid format Prisma uses for `@default(cuid())`."""
+    return (
+        "c"
+        + _base36(int(time.time() * 1000), 8)
+        + _base36(next(_counter) % _BLOCK_SIZE, _BLOCK)
+        + _FINGERPRINT
+        + _base36(secrets.randbelow(_BLOCK_SIZE), _BLOCK)
+        + _base36(secrets.randbelow(_BLOCK_SIZE), _BLOCK)
+    )
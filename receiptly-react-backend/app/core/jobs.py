@@ -0,0 +1,243 @@
+"""
+Background job queue for CPU-heavy work such as OCR.
+
+Jobs run on a process pool of the web worker that accepted them, so they never
+block the event loop. The number of queued or running jobs per web worker is
+bounded; submitting beyond that limit fails fast so callers can answer with 503
+instead of building an unbounded backlog.
+
+Every status change is written to the `jobs` table, so any web worker can answer
+a poll for a job. The worker running a job also keeps it in memory to wake its
+own event streams without polling the database.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from prisma import Prisma
+from prisma.fields import Json
+
+from app.core.config import get_settings
+from app.core.metrics import job_duration_seconds, job_wait_seconds
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = {JOB_SUCCEEDED, JOB_FAILED}
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the queue already holds the maximum number of pending jobs."""
+
+
+@dataclass
+class Job:
+    """State of a background job."""
+    id: str
+    user_id: str
+    kind: str
+    status: str = JOB_QUEUED
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    version: int = 0
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @classmethod
+    def from_record(cls, record) -> "Job":
+        """Build a job from a row of the jobs table."""
+        return cls(
+            id=record.id,
+            user_id=record.userId,
+            kind=record.kind,
+            status=record.status,
+            created_at=record.createdAt,
+            started_at=record.startedAt,
+            finished_at=record.finishedAt,
+            result=record.result,
+            error=record.error,
+        )
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def _update(self, **changes) -> None:
+        for name, value in changes.items():
+            setattr(self, name, value)
+        self.version += 1
+        # Wake up everyone waiting for a change and re-arm the event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class JobQueue:
+    """Runs jobs on a process pool with bounded concurrency and backlog."""
+
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        # Jobs queued or running on this worker; finished ones are only in the database
+        self._jobs: Dict[str, Job] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running jobs on this worker."""
+        return self._pending
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            # Forking this process would copy the held locks of its threads (uvicorn's
+            # threadpool, the Prisma engine, the event loop) into the children
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._slots = asyncio.Semaphore(self.workers)
+
+    async def _prune(self, db: Prisma) -> None:
+        # Jobs left unfinished this long belonged to a worker that died
+        cutoff = datetime.fromtimestamp(time.time() - self.ttl_seconds, timezone.utc)
+        await db.job.delete_many(
+            where={
+                "createdAt": {"lt": cutoff},
+                "OR": [{"finishedAt": None}, {"finishedAt": {"lt": cutoff}}],
+            }
+        )
+
+    async def submit(
+        self,
+        db: Prisma,
+        user_id: str,
+        kind: str,
+        func: Callable[..., Any],
+        *args: Any,
+        on_done: Optional[Callable[[Job], None]] = None,
+    ) -> Job:
+        """Record a picklable function call as a job, queue it and return the job."""
+        if self._pending >= self.max_pending:
+            raise JobQueueFullError(f"Too many pending jobs ({self._pending})")
+
+        # Hold the slot while the row is written, so concurrent submits cannot overshoot
+        self._pending += 1
+        try:
+            await self._prune(db)
+            # Timestamped by this clock like startedAt and finishedAt, not the database's
+            record = await db.job.create(
+                data={"userId": user_id, "kind": kind, "createdAt": datetime.now(timezone.utc)}
+            )
+            job = Job.from_record(record)
+        except BaseException:
+            self._pending -= 1
+            raise
+        self._ensure_started()
+        self._jobs[job.id] = job
+        asyncio.create_task(self._run(db, job, func, args, on_done))
+        return job
+
+    async def _save(self, db: Prisma, job: Job, **changes) -> None:
+        """Apply changes to a job and write them to its row."""
+        job._update(**changes)
+        data = {
+            "status": job.status,
+            "startedAt": job.started_at,
+            "finishedAt": job.finished_at,
+            "error": job.error,
+        }
+        if job.result is not None:
+            data["result"] = Json(job.result)
+        try:
+            await db.job.update(where={"id": job.id}, data=data)
+        except Exception as e:
+            # Pollers on this worker still see the change; others see it with the next one
+            logger.warning(f"Could not save job {job.id}: {e}")
+
+    async def _run(self, db: Prisma, job: Job, func, args, on_done) -> None:
+        queued = time.perf_counter()
+        started = None
+        try:
+            async with self._slots:
+                started = time.perf_counter()
+                job_wait_seconds.observe(started - queued, job.kind)
+                await self._save(db, job, status=JOB_RUNNING, started_at=datetime.now(timezone.utc))
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, func, *args)
+            await self._save(db, job, status=JOB_SUCCEEDED, result=result, finished_at=datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+            await self._save(db, job, status=JOB_FAILED, error=str(e), finished_at=datetime.now(timezone.utc))
+        finally:
+            self._pending -= 1
+            self._jobs.pop(job.id, None)
+            if started is not None:
+                job_duration_seconds.observe(time.perf_counter() - started, job.kind, job.status)
+            if on_done is not None:
+                try:
+                    on_done(job)
+                except Exception as e:
+                    logger.warning(f"Job {job.id} cleanup failed: {e}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by ID if it is queued or running on this worker."""
+        return self._jobs.get(job_id)
+
+    async def load(self, db: Prisma, job_id: str, user_id: str) -> Optional[Job]:
+        """Return a job of the user from the database, wherever it runs."""
+        record = await db.job.find_first(where={"id": job_id, "userId": user_id})
+        return Job.from_record(record) if record else None
+
+    async def wait_for_change(self, job: Job, since_version: int, timeout: float) -> bool:
+        """Wait until the job changes after since_version; return False on timeout."""
+        if job.version != since_version:
+            return True
+        try:
+            await asyncio.wait_for(job.changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def fail_unfinished(self, db: Prisma) -> None:
+        """Mark the jobs of this worker failed before it shuts down."""
+        if not self._jobs:
+            return
+        await db.job.update_many(
+            where={"id": {"in": list(self._jobs)}},
+            data={
+                "status": JOB_FAILED,
+                "error": "Server shut down before the job finished",
+                "finishedAt": datetime.now(timezone.utc),
+            },
+        )
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache()
+def get_job_queue() -> JobQueue:
+    """Get the job queue of this worker process."""
+    settings = get_settings()
+    return JobQueue(
+        workers=settings.ocr_workers,
+        max_pending=settings.ocr_max_pending_jobs,
+        ttl_seconds=settings.ocr_job_ttl_seconds,
+    )
@@ -0,0 +1,580 @@
+"""
+Prometheus-style request, database and job metrics.
+
+A small in-process registry renders the Prometheus text exposition format without
+an extra dependency. Recording a sample is a dict lookup plus a bisect, so the
+middleware and query hooks add negligible overhead to the hot path. Metrics live
+in memory and are therefore per worker process; with several web workers,
+`SharedMetrics` exchanges them through a directory so every worker can answer a
+scrape for all of them.
+"""
+
+import asyncio
+import contextvars
+import glob
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+JOB_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# Number of most recent query durations kept for latency percentiles
+RECENT_QUERY_WINDOW = 1024
+
+# Label used for requests that did not match any route, so unknown paths
+# cannot blow up the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+# Seconds between the snapshots a web worker writes to the shared metrics directory
+SNAPSHOT_INTERVAL = 5.0
+
+# Snapshots older than this belong to a worker that exited without removing its file
+SNAPSHOT_MAX_AGE = 3 * SNAPSHOT_INTERVAL
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _join_labels(*labels: str) -> str:
+    return ",".join(label for label in labels if label)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class of a metric family with an optional set of labels."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _child(self, labels: Tuple[str, ...]):
+        child = self._children.get(labels)
+        if child is None:
+            if len(labels) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[labels] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, extra: str = "") -> Iterable[str]:
+        """Sample lines of every child, with `extra` added to their labels."""
+        raise NotImplementedError
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def render(self) -> str:
+        return "\n".join(self.header() + list(self._samples()))
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    type = "counter"
+
+    def _new_child(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._child(labels)[0] += amount
+
+    def _samples(self, extra: str = "") -> Iterable[str]:
+        for labels, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels, extra)} {_format_value(child[0])}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def _new_child(self) -> List[float]:
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._child(labels)[0] += amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._child(labels)[0] -= amount
+
+    def set(self, *labels: str, value: float) -> None:
+        self._child(labels)[0] = value
+
+    def _samples(self, extra: str = "") -> Iterable[str]:
+        for labels, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels, extra)} {_format_value(child[0])}"
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        # One slot per bucket plus the implicit +Inf bucket
+        return _HistogramChild(len(self.buckets) + 1)
+
+    def observe(self, value: float, *labels: str) -> None:
+        child = self._child(labels)
+        child.counts[bisect_left(self.buckets, value)] += 1
+        child.sum += value
+
+    def _samples(self, extra: str = "") -> Iterable[str]:
+        bounds = self.buckets + (float("inf"),)
+        for labels, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, _join_labels(extra, f'le="{_format_value(bound)}"'))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            label_text = _format_labels(self.labelnames, labels, extra)
+            yield f"{self.name}_sum{label_text} {_format_value(child.sum)}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """Metric whose samples are read at render time from state kept elsewhere.
+
+    `collect` returns `(label values, value)` pairs. Used for counters that a
+    component already maintains itself, such as cache hits or pool usage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]],
+        type: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self._collect = collect
+
+    def _samples(self, extra: str = "") -> Iterable[str]:
+        for labels, value in self._collect():
+            yield f"{self.name}{_format_labels(self.labelnames, labels, extra)} {_format_value(value)}"
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def samples(self, extra: str = "") -> Dict[str, List[str]]:
+        """Return the sample lines of every family, with `extra` added to their labels."""
+        return {name: list(metric._samples(extra)) for name, metric in self._metrics.items()}
+
+    def render_with(self, samples: Dict[str, List[str]]) -> str:
+        """Render the families of this registry with the given sample lines."""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.header())
+            lines.extend(samples.get(name, ()))
+        return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """Metrics of all web workers of a server, exchanged through a shared directory.
+
+    Every worker writes the samples of its registry, labelled with its pid, to
+    `worker-<pid>.json` in the directory every `interval` seconds. The worker that
+    answers a scrape renders its own live samples together with the recent
+    snapshots of the others, so a scrape covers the whole server whichever worker
+    answers it, and counters of a worker are never summed into another's series.
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float = SNAPSHOT_INTERVAL):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        """Snapshot file of this worker process."""
+        return os.path.join(self.directory, f"worker-{os.getpid()}.json")
+
+    def _own_samples(self) -> Dict[str, List[str]]:
+        return self.registry.samples(f'worker="{os.getpid()}"')
+
+    def write(self) -> None:
+        """Write the snapshot of this worker, replacing the previous one atomically."""
+        snapshot = {"written": time.time(), "samples": self._own_samples()}
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, self.path)
+
+    def render(self) -> str:
+        """Render the live samples of this worker and the snapshots of the others."""
+        samples = self._own_samples()
+        now = time.time()
+        for path in sorted(glob.glob(os.path.join(self.directory, "worker-*.json"))):
+            if path == self.path:
+                continue
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                # Removed by its worker while we listed the directory
+                continue
+            if now - snapshot["written"] > SNAPSHOT_MAX_AGE:
+                continue
+            for name, lines in snapshot["samples"].items():
+                if name in samples:
+                    samples[name].extend(lines)
+        return self.registry.render_with(samples)
+
+    def start(self) -> None:
+        if self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._write_periodically())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    async def _write_periodically(self) -> None:
+        while True:
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write metrics snapshot {self.path}: {e}")
+            await asyncio.sleep(self.interval)
+
+
+REGISTRY = Registry()
+
+http_requests_total = REGISTRY.register(Counter(
+    "receiptly_http_requests_total",
+    "HTTP requests by route template, method and status code",
+    ("method", "route", "status"),
+))
+http_request_duration_seconds = REGISTRY.register(Histogram(
+    "receiptly_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+))
+http_response_size_bytes = REGISTRY.register(Histogram(
+    "receiptly_http_response_size_bytes",
+    "HTTP response body size by route template",
+    ("method", "route"),
+    SIZE_BUCKETS,
+))
+http_requests_in_flight = REGISTRY.register(Gauge(
+    "receiptly_http_requests_in_flight",
+    "HTTP requests currently being served",
+))
+http_request_db_queries = REGISTRY.register(Histogram(
+    "receiptly_http_request_db_queries",
+    "Database queries issued per HTTP request by route template",
+    ("method", "route"),
+    COUNT_BUCKETS,
+))
+http_request_db_seconds = REGISTRY.register(Histogram(
+    "receiptly_http_request_db_seconds",
+    "Time spent in database queries per HTTP request by route template",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+))
+db_query_duration_seconds = REGISTRY.register(Histogram(
+    "receiptly_db_query_duration_seconds",
+    "Database query latency by model and Prisma method",
+    ("model", "method"),
+    QUERY_BUCKETS,
+))
+db_query_errors_total = REGISTRY.register(Counter(
+    "receiptly_db_query_errors_total",
+    "Database queries that raised an error by model and Prisma method",
+    ("model", "method"),
+))
+job_duration_seconds = REGISTRY.register(Histogram(
+    "receiptly_job_duration_seconds",
+    "Background job run time by kind and final status",
+    ("kind", "status"),
+    JOB_BUCKETS,
+))
+job_wait_seconds = REGISTRY.register(Histogram(
+    "receiptly_job_wait_seconds",
+    "Time background jobs spent queued before a worker picked them up",
+    ("kind",),
+    JOB_BUCKETS,
+))
+password_hash_seconds = REGISTRY.register(Histogram(
+    "receiptly_password_hash_seconds",
+    "Time a password pool thread spent hashing or verifying, by operation",
+    ("operation",),
+    LATENCY_BUCKETS,
+))
+password_request_seconds = REGISTRY.register(Histogram(
+    "receiptly_password_request_seconds",
+    "Time from submitting a password operation to its result, including the queue wait",
+    ("operation",),
+    LATENCY_BUCKETS,
+))
+password_rejected_total = REGISTRY.register(Counter(
+    "receiptly_password_rejected_total",
+    "Password operations rejected because the pool queue was full, by operation",
+    ("operation",),
+))
+password_pool_pending = REGISTRY.register(Gauge(
+    "receiptly_password_pool_pending",
+    "Password operations running or queued on the pool",
+))
+password_pool_capacity = REGISTRY.register(Gauge(
+    "receiptly_password_pool_capacity",
+    "Password operations the pool accepts before rejecting new ones",
+))
+
+# In-process caches exported by name, see register_cache()
+_caches: Dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Export the hit, miss and eviction counters and the size of a `TTLCache`."""
+    _caches[name] = cache
+
+
+def _cache_stat(stat: str) -> Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]:
+    return lambda: [((name,), cache.stats()[stat]) for name, cache in _caches.items()]
+
+
+cache_hits_total = REGISTRY.register(CallbackMetric(
+    "receiptly_cache_hits_total",
+    "In-process cache lookups that found a live entry, by cache",
+    ("cache",),
+    _cache_stat("hits"),
+    "counter",
+))
+cache_misses_total = REGISTRY.register(CallbackMetric(
+    "receiptly_cache_misses_total",
+    "In-process cache lookups that found no entry or an expired one, by cache",
+    ("cache",),
+    _cache_stat("misses"),
+    "counter",
+))
+cache_evictions_total = REGISTRY.register(CallbackMetric(
+    "receiptly_cache_evictions_total",
+    "In-process cache entries evicted to stay within the size limit, by cache",
+    ("cache",),
+    _cache_stat("evictions"),
+    "counter",
+))
+cache_size = REGISTRY.register(CallbackMetric(
+    "receiptly_cache_size",
+    "Entries currently held by an in-process cache, by cache",
+    ("cache",),
+    _cache_stat("size"),
+))
+
+
+@dataclass
+class RequestStats:
+    """Database work done on behalf of the current request."""
+    queries: int = 0
+    query_seconds: float = 0.0
+    # Queries per "Model.method", only collected when a consumer asks for detail
+    calls: Optional[Dict[str, int]] = None
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+# Set while health checks query the database, see probe_queries()
+_probing: contextvars.ContextVar[bool] = contextvars.ContextVar("probing", default=False)
+
+_recent_query_seconds: deque = deque(maxlen=RECENT_QUERY_WINDOW)
+
+
+@contextmanager
+def probe_queries() -> Iterator[None]:
+    """Record the queries issued inside the block as health probes.
+
+    They are counted under the `probe` model only, and stay out of the recent
+    latency window and the per-request stats, so frequent readiness checks do not
+    skew the query percentiles they report.
+    """
+    token = _probing.set(True)
+    try:
+        yield
+    finally:
+        _probing.reset(token)
+
+
+def record_query(model: str, method: str, seconds: float, failed: bool = False) -> None:
+    """Record one database query and attribute it to the current request, if any."""
+    if _probing.get():
+        model = "probe"
+    db_query_duration_seconds.observe(seconds, model, method)
+    if failed:
+        db_query_errors_total.inc(model, method)
+    if model == "probe":
+        return
+    _recent_query_seconds.append(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += seconds
+        if stats.calls is not None:
+            key = f"{model}.{method}"
+            stats.calls[key] = stats.calls.get(key, 0) + 1
+
+
+def begin_request_stats(
+    detailed: bool = False,
+) -> Tuple[RequestStats, Optional[contextvars.Token]]:
+    """Return the query stats of the current request, starting them if needed.
+
+    Middlewares share one `RequestStats` per request: an inner middleware reuses
+    the stats an outer one started and gets no token back.
+    """
+    stats = _request_stats.get()
+    if stats is not None:
+        if detailed and stats.calls is None:
+            stats.calls = {}
+        return stats, None
+    stats = RequestStats(calls={} if detailed else None)
+    return stats, _request_stats.set(stats)
+
+
+def end_request_stats(token: Optional[contextvars.Token]) -> None:
+    """Stop attributing queries to the request started by `begin_request_stats`."""
+    if token is not None:
+        _request_stats.reset(token)
+
+
+def query_latency_quantiles(*quantiles: float) -> Tuple[Optional[float], ...]:
+    """Return quantiles of the most recent query durations, or None without samples."""
+    samples = sorted(_recent_query_seconds)
+    if not samples:
+        return tuple(None for _ in quantiles)
+    return tuple(samples[min(len(samples) - 1, int(q * len(samples)))] for q in quantiles)
+
+
+def route_template(scope: dict) -> str:
+    """Return the path template of the route that handled a request."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size, status and queries per route.
+
+    Implemented as plain ASGI rather than `BaseHTTPMiddleware` so streaming
+    responses (image downloads, job events) are passed through untouched.
+    """
+
+    def __init__(self, app, excluded_paths: Sequence[str] = ()):
+        self.app = app
+        self.excluded_paths = frozenset(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+        size = 0
+        stats, token = begin_request_stats()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            end_request_stats(token)
+
+            # FastAPI stores the matched route in the scope while routing
+            method = scope["method"]
+            route = route_template(scope)
+            http_requests_total.inc(method, route, status)
+            http_request_duration_seconds.observe(elapsed, method, route)
+            http_response_size_bytes.observe(size, method, route)
+            http_request_db_queries.observe(stats.queries, method, route)
+            http_request_db_seconds.observe(stats.query_seconds, method, route)
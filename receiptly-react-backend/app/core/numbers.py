@@ -0,0 +1,109 @@
+"""
+Locale-tolerant parsing of money and quantity strings.
+
+Receipts are typed in or OCR'd in many formats ("12.50", "12,50", "1.234,56 €",
+"$1,234.56", "2x"), so amounts are normalized to `Decimal` before they are stored.
+
+A plain number such as "1.500" always has '.' as its decimal point. The
+numeric_money_columns migration converts exactly these strings in SQL and
+leaves the rest to backfill_decimal_columns.py, so both paths agree on them.
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Callable, Optional, Tuple
+
+_NON_NUMERIC_RE = re.compile(r"[^\d,.\-]")
+# Numbers the migration converts with a plain cast: digits with an optional '.' decimal part
+_PLAIN_NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+
+MONEY_PLACES = Decimal("0.01")
+QUANTITY_PLACES = Decimal("0.001")
+
+
+def parse_decimal(
+    value: Any,
+    places: Optional[Decimal] = None,
+    parse_string: Optional[Callable[[str], Decimal]] = None,
+) -> Decimal:
+    """Parse a number written with any common decimal/thousands separators.
+
+    Plain numbers use '.' as the decimal point. Otherwise the last of '.' or ','
+    is the decimal separator when both appear, and a lone ',' followed by exactly
+    three digits is a thousands separator. Raises ValueError if no number can be
+    read.
+    """
+    if isinstance(value, Decimal):
+        number = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = Decimal(str(value))
+    elif isinstance(value, str):
+        number = (parse_string or _parse_decimal_string)(value)
+    else:
+        raise ValueError(f"Cannot parse a number from {value!r}")
+
+    if not number.is_finite():
+        raise ValueError(f"Cannot parse a number from {value!r}")
+    if places is not None:
+        number = number.quantize(places, rounding=ROUND_HALF_UP)
+    return number
+
+
+def _split_sign(value: str) -> Tuple[str, bool]:
+    """Strip currency symbols and units; return the digits and separators and the sign."""
+    text = value.strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = _NON_NUMERIC_RE.sub("", text)
+    if text.startswith("-"):
+        negative = True
+    return text.replace("-", ""), negative
+
+
+def _to_decimal(text: str, negative: bool, value: str) -> Decimal:
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Cannot parse a number from {value!r}")
+    return -number if negative else number
+
+
+def _parse_decimal_string(value: str) -> Decimal:
+    text, negative = _split_sign(value)
+    if _PLAIN_NUMBER_RE.match(text):
+        return _to_decimal(text, negative, value)
+
+    if "," in text and "." in text:
+        decimal_sep = "," if text.rfind(",") > text.rfind(".") else "."
+        thousands_sep = "." if decimal_sep == "," else ","
+        text = text.replace(thousands_sep, "").replace(decimal_sep, ".")
+    elif "," in text or "." in text:
+        sep = "," if "," in text else "."
+        head, _, tail = text.rpartition(sep)
+        if text.count(sep) > 1 or (len(tail) == 3 and head not in ("", "0")):
+            text = text.replace(sep, "")
+        else:
+            text = f"{head.replace(sep, '')}.{tail}"
+
+    return _to_decimal(text, negative, value)
+
+
+def _parse_quantity_string(value: str) -> Decimal:
+    """Parse a quantity without guessing thousands grouping.
+
+    '.' is the decimal point; ',' is one only when no '.' is present. Anything
+    with more than one separator is rejected rather than guessed.
+    """
+    text, negative = _split_sign(value)
+    if text.count(".") + text.count(",") > 1:
+        raise ValueError(f"Cannot parse a quantity from {value!r}")
+    return _to_decimal(text.replace(",", "."), negative, value)
+
+
+def parse_money(value: Any) -> Decimal:
+    """Parse a money amount rounded to cents."""
+    return parse_decimal(value, MONEY_PLACES)
+
+
+def parse_quantity(value: Any) -> Decimal:
+    """Parse an item quantity rounded to three decimal places, e.g. "1.500" as 1.5."""
+    return parse_decimal(value, QUANTITY_PLACES, _parse_quantity_string)
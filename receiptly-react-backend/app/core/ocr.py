@@ -0,0 +1,48 @@
+"""
+Server-side OCR built on the pipeline in ocr_script.py.
+
+The functions here run inside the job queue's worker processes. The OCR script
+is loaded from the configured path once per worker process.
+"""
+
+import importlib.util
+import os
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Dict
+
+from app.core.config import get_settings
+
+
+@lru_cache()
+def load_ocr_module(script_path: str) -> ModuleType:
+    """Import the OCR script from a file path."""
+    spec = importlib.util.spec_from_file_location("receiptly_ocr_script", script_path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError(f"Cannot load OCR script from {script_path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ocr_script_path() -> str:
+    """Return the absolute path of the configured OCR script."""
+    return os.path.abspath(get_settings().ocr_script_path)
+
+
+def ocr_available() -> bool:
+    """Return True if the configured OCR script exists."""
+    return os.path.isfile(ocr_script_path())
+
+
+def run_ocr_job(script_path: str, image_path: str, profile: str) -> Dict[str, Any]:
+    """Run the OCR pipeline on an image file and return the extracted text.
+
+    Executed in a worker process, so it only takes picklable arguments.
+    """
+    module = load_ocr_module(script_path)
+    record = module.ocr_image_record(image_path, profile)
+    if "error" in record:
+        raise RuntimeError(record["error"])
+    record.pop("path", None)
+    return record
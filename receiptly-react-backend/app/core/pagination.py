@@ -0,0 +1,76 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+A cursor encodes the sort key of the last row of a page, e.g. `(createdAt, id)`.
+The next page continues strictly after that key, so deep pages cost the same as
+the first one and rows inserted concurrently never shift the page boundaries.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from fastapi import HTTPException, status
+
+from app.core.database import parse_raw_datetime
+
+T = TypeVar("T")
+
+
+def encode_cursor(sort_value: Optional[Union[datetime, str]], row_id: str) -> str:
+    """Encode the sort key of a row into an opaque cursor token.
+
+    Raw queries return timestamps as ISO strings, which are accepted as-is.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = [sort_value, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    """Decode a cursor token into its sort key.
+
+    Raises an HTTP 400 error if the token is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if not isinstance(row_id, str):
+            raise ValueError("Cursor ID must be a string")
+        return (parse_raw_datetime(sort_value) if sort_value is not None else None), row_id
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {str(e)}",
+        )
+
+
+def paginate(
+    rows: Sequence[T],
+    limit: int,
+    key: Callable[[T], Tuple[Optional[Union[datetime, str]], str]],
+) -> Tuple[List[T], Optional[str]]:
+    """Trim a page fetched with `limit + 1` rows and compute the next cursor."""
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(*key(page[-1]))
+
+
+def keyset_where(field: str, cursor: Optional[str], descending: bool = True) -> dict:
+    """Build a Prisma filter that continues after a `(field, id)` cursor."""
+    if not cursor:
+        return {}
+    sort_value, row_id = decode_cursor(cursor)
+    op = "lt" if descending else "gt"
+    return {
+        "OR": [
+            {field: {op: sort_value}},
+            {field: sort_value, "id": {op: row_id}},
+        ]
+    }
+
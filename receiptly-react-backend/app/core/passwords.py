@@ -0,0 +1,84 @@
+"""
+Password hashing on a bounded worker pool.
+
+bcrypt is deliberately slow, so hashing and verifying passwords on the event
+loop would stall every other request. The work runs on a dedicated thread pool
+(bcrypt releases the GIL) and callers beyond the queue limit are rejected
+immediately instead of piling up.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, TypeVar
+
+from passlib.context import CryptContext
+
+from app.core.metrics import (
+    password_hash_seconds,
+    password_pool_capacity,
+    password_pool_pending,
+    password_rejected_total,
+    password_request_seconds,
+)
+
+T = TypeVar("T")
+
+
+class PasswordPoolSaturatedError(RuntimeError):
+    """Raised when too many password operations are already queued."""
+
+
+class PasswordHasher:
+    """Runs password hashing and verification on a dedicated thread pool."""
+
+    def __init__(self, context: CryptContext, workers: int, max_queue: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._pending = 0
+        password_pool_capacity.set(value=self.max_pending)
+
+    @staticmethod
+    def _timed(func: Callable[..., T], *args, elapsed: List[float]) -> Callable[[], T]:
+        # Runs on a pool thread, the duration is recorded back on the event loop
+        def run() -> T:
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed.append(time.perf_counter() - start)
+
+        return run
+
+    async def _submit(self, operation: str, func: Callable[..., T], *args) -> T:
+        if self._pending >= self.max_pending:
+            password_rejected_total.inc(operation)
+            raise PasswordPoolSaturatedError("Too many password operations in progress")
+
+        self._pending += 1
+        password_pool_pending.inc()
+        elapsed: List[float] = []
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed(func, *args, elapsed=elapsed))
+        finally:
+            self._pending -= 1
+            password_pool_pending.dec()
+            password_request_seconds.observe(time.perf_counter() - start, operation)
+            if elapsed:
+                password_hash_seconds.observe(elapsed[0], operation)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop."""
+        return await self._submit("hash", self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash off the event loop."""
+        return await self._submit("verify", self.context.verify, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=False)
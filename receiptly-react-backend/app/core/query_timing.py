@@ -0,0 +1,70 @@
+"""
+Opt-in per-request database query instrumentation.
+
+Every query of the instrumented Prisma client (see `InstrumentedPrisma`) is
+attributed to the request that issued it. This middleware reports the count and
+time in a `Server-Timing` header, visible in the browser's network panel, and in
+debug mode warns about requests that exceed the query budget together with the
+most repeated queries, which is usually an N+1 pattern.
+"""
+
+import logging
+import time
+from typing import Optional
+
+from app.core.metrics import begin_request_stats, end_request_stats, route_template
+
+logger = logging.getLogger(__name__)
+
+# Number of most repeated queries listed in a budget warning
+TOP_REPEATED_QUERIES = 5
+
+
+def server_timing(queries: int, query_seconds: float, total_seconds: float) -> str:
+    """Build a `Server-Timing` header value for the database and total time."""
+    return (
+        f'db;dur={query_seconds * 1000:.2f};desc="{queries} queries", '
+        f"total;dur={total_seconds * 1000:.2f}"
+    )
+
+
+class QueryTimingMiddleware:
+    """ASGI middleware adding query counts and timings to each response.
+
+    `query_budget` enables the budget warning; pass None to only send headers.
+    """
+
+    def __init__(self, app, query_budget: Optional[int] = None):
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_request_stats(detailed=self.query_budget is not None)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Queries issued while a streaming body is sent are not included
+                header = server_timing(stats.queries, stats.query_seconds, time.perf_counter() - start)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_stats(token)
+            if self.query_budget is not None and stats.queries > self.query_budget:
+                repeated = sorted(stats.calls.items(), key=lambda item: item[1], reverse=True)
+                summary = ", ".join(
+                    f"{call} x{count}" for call, count in repeated[:TOP_REPEATED_QUERIES]
+                )
+                logger.warning(
+                    f"{scope['method']} {route_template(scope)} issued {stats.queries} queries "
+                    f"(budget {self.query_budget}, {stats.query_seconds * 1000:.1f} ms): {summary}"
+                )
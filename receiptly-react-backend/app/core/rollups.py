@@ -0,0 +1,147 @@
+"""
+Incrementally maintained per-user monthly transaction totals.
+
+The `user_monthly_totals` table holds one row per (user, year, month, type) with
+the sum and count of the matching transactions. Every write path that creates,
+updates or deletes a transaction applies the matching delta inside the same
+database transaction, so the tracker stats read O(months) rows instead of
+aggregating the raw transactions.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prisma import Prisma
+
+
+def month_key(date: datetime) -> Tuple[int, int]:
+    """Return the (year, month) bucket of a transaction date in UTC."""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc)
+    return date.year, date.month
+
+
+async def apply_rollup_delta(
+    db: Prisma,
+    user_id: str,
+    date: datetime,
+    type: str,
+    amount: float,
+    count: int,
+) -> None:
+    """Add an amount and count delta to the rollup bucket of a date."""
+    year, month = month_key(date)
+    await db.execute_raw(
+        """
+        INSERT INTO "public"."user_monthly_totals" ("userId", "year", "month", "type", "total", "count")
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT ("userId", "year", "month", "type") DO UPDATE SET
+            "total" = "user_monthly_totals"."total" + EXCLUDED."total",
+            "count" = "user_monthly_totals"."count" + EXCLUDED."count"
+        """,
+        user_id,
+        year,
+        month,
+        type,
+        amount,
+        count,
+    )
+
+
+async def add_to_rollup(db: Prisma, transaction: Any) -> None:
+    """Account for a newly created transaction in the rollup."""
+    await apply_rollup_delta(
+        db, transaction.userId, transaction.date, transaction.type, transaction.amount, 1
+    )
+
+
+async def remove_from_rollup(db: Prisma, transaction: Any) -> None:
+    """Remove a deleted transaction from the rollup."""
+    await apply_rollup_delta(
+        db, transaction.userId, transaction.date, transaction.type, -transaction.amount, -1
+    )
+
+
+async def add_many_to_rollup(
+    db: Prisma, user_id: str, transactions: Iterable[Tuple[datetime, str, float]]
+) -> None:
+    """Account for a batch of new (date, type, amount) transactions of one user.
+
+    Deltas are summed per bucket first, so a bulk insert costs one upsert per
+    touched month and type instead of one per transaction.
+    """
+    buckets: Dict[Tuple[int, int, str], List[float]] = {}
+    for date, type, amount in transactions:
+        bucket = buckets.setdefault((*month_key(date), type), [0.0, 0])
+        bucket[0] += amount
+        bucket[1] += 1
+    for (year, month, type), (amount, count) in buckets.items():
+        await apply_rollup_delta(
+            db, user_id, datetime(year, month, 1, tzinfo=timezone.utc), type, amount, count
+        )
+
+
+async def rebuild_rollups(db: Prisma, user_id: Optional[str] = None) -> int:
+    """Recompute the rollup from the raw transactions, optionally for a single user.
+
+    Returns the number of rollup rows written.
+    """
+    async with db.tx() as tx:
+        if user_id:
+            await tx.execute_raw(
+                'DELETE FROM "public"."user_monthly_totals" WHERE "userId" = $1', user_id
+            )
+            return await tx.execute_raw(
+                """
+                INSERT INTO "public"."user_monthly_totals" ("userId", "year", "month", "type", "total", "count")
+                SELECT "userId", EXTRACT(YEAR FROM "date")::int, EXTRACT(MONTH FROM "date")::int,
+                       "type", SUM("amount"), COUNT(*)
+                FROM "public"."transactions"
+                WHERE "userId" = $1
+                GROUP BY "userId", EXTRACT(YEAR FROM "date"), EXTRACT(MONTH FROM "date"), "type"
+                """,
+                user_id,
+            )
+
+        await tx.execute_raw('DELETE FROM "public"."user_monthly_totals"')
+        return await tx.execute_raw(
+            """
+            INSERT INTO "public"."user_monthly_totals" ("userId", "year", "month", "type", "total", "count")
+            SELECT "userId", EXTRACT(YEAR FROM "date")::int, EXTRACT(MONTH FROM "date")::int,
+                   "type", SUM("amount"), COUNT(*)
+            FROM "public"."transactions"
+            GROUP BY "userId", EXTRACT(YEAR FROM "date"), EXTRACT(MONTH FROM "date"), "type"
+            """
+        )
+
+
+async def verify_rollups(db: Prisma, tolerance: float = 0.005) -> List[dict]:
+    """Compare the rollup with the raw transactions and return mismatching buckets."""
+    return await db.query_raw(
+        """
+        WITH actual AS (
+            SELECT "userId", EXTRACT(YEAR FROM "date")::int AS "year",
+                   EXTRACT(MONTH FROM "date")::int AS "month", "type",
+                   SUM("amount") AS "total", COUNT(*)::int AS "count"
+            FROM "public"."transactions"
+            GROUP BY 1, 2, 3, 4
+        )
+        SELECT
+            COALESCE(a."userId", r."userId") AS "userId",
+            COALESCE(a."year", r."year") AS "year",
+            COALESCE(a."month", r."month") AS "month",
+            COALESCE(a."type", r."type") AS "type",
+            COALESCE(a."total", 0)::float8 AS "expectedTotal",
+            COALESCE(r."total", 0)::float8 AS "rollupTotal",
+            COALESCE(a."count", 0) AS "expectedCount",
+            COALESCE(r."count", 0) AS "rollupCount"
+        FROM actual a
+        FULL OUTER JOIN "public"."user_monthly_totals" r
+            ON r."userId" = a."userId" AND r."year" = a."year"
+            AND r."month" = a."month" AND r."type" = a."type"
+        WHERE COALESCE(a."count", 0) <> COALESCE(r."count", 0)
+           OR ABS(COALESCE(a."total", 0) - COALESCE(r."total", 0)) > $1
+        ORDER BY 1, 2, 3, 4
+        """,
+        tolerance,
+    )
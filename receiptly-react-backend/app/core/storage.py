@@ -0,0 +1,191 @@
+"""
+Content-addressed blob storage for receipt images.
+
+Blobs are keyed by the SHA-256 digest of their content, so storing the same
+image twice only keeps a single copy. Receipt rows reference blobs by digest.
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from app.core.config import get_settings
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URL_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(?:;[^,]*)?,", re.IGNORECASE)
+
+
+class BlobNotFoundError(KeyError):
+    """Raised when a blob digest is not present in the store."""
+
+
+class BlobTooLargeError(ValueError):
+    """Raised when a blob exceeds the configured maximum size."""
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    """Reference and metadata of a stored blob."""
+    sha256: str
+    size: int
+
+
+class BlobStore(ABC):
+    """Interface for content-addressed blob storage backends."""
+
+    @abstractmethod
+    def put_stream(self, stream: BinaryIO, max_size: Optional[int] = None) -> BlobInfo:
+        """Store the content of a binary stream and return its reference."""
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool:
+        """Return True if a blob with the given digest is stored."""
+
+    @abstractmethod
+    def size(self, sha256: str) -> int:
+        """Return the size of a stored blob in bytes."""
+
+    @abstractmethod
+    def iter_range(
+        self,
+        sha256: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        """Yield the bytes of a blob between start and end (inclusive)."""
+
+    @abstractmethod
+    def delete(self, sha256: str) -> None:
+        """Remove a blob from the store if it exists."""
+
+    def put(self, data: bytes, max_size: Optional[int] = None) -> BlobInfo:
+        """Store raw bytes and return their reference."""
+        return self.put_stream(io.BytesIO(data), max_size=max_size)
+
+    def read(self, sha256: str) -> bytes:
+        """Read a whole blob into memory."""
+        return b"".join(self.iter_range(sha256))
+
+
+class LocalBlobStore(BlobStore):
+    """Blob store backed by a directory on the local filesystem."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    def _path(self, sha256: str) -> str:
+        if not _SHA256_RE.match(sha256):
+            raise BlobNotFoundError(sha256)
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def put_stream(self, stream: BinaryIO, max_size: Optional[int] = None) -> BlobInfo:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLargeError(f"Blob exceeds maximum size of {max_size} bytes")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            sha256 = digest.hexdigest()
+            path = self._path(sha256)
+            if os.path.exists(path):
+                # Identical content is already stored
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return BlobInfo(sha256=sha256, size=size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, sha256: str) -> bool:
+        try:
+            return os.path.isfile(self._path(sha256))
+        except BlobNotFoundError:
+            return False
+
+    def size(self, sha256: str) -> int:
+        try:
+            return os.path.getsize(self._path(sha256))
+        except OSError:
+            raise BlobNotFoundError(sha256)
+
+    def iter_range(
+        self,
+        sha256: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> Iterator[bytes]:
+        try:
+            handle = open(self._path(sha256), "rb")
+        except OSError:
+            raise BlobNotFoundError(sha256)
+
+        def _iterate() -> Iterator[bytes]:
+            with handle:
+                handle.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    to_read = chunk_size if remaining is None else min(chunk_size, remaining)
+                    chunk = handle.read(to_read)
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return _iterate()
+
+    def delete(self, sha256: str) -> None:
+        try:
+            os.remove(self._path(sha256))
+        except (OSError, BlobNotFoundError):
+            pass
+
+
+def decode_image_data(image_data: str) -> Tuple[bytes, str]:
+    """Decode a base64 string or data URL into raw bytes and a content type."""
+    content_type = DEFAULT_CONTENT_TYPE
+    payload = image_data.strip()
+    match = _DATA_URL_RE.match(payload)
+    if match:
+        content_type = match.group("type") or content_type
+        payload = payload[match.end():]
+    try:
+        return base64.b64decode(payload, validate=True), content_type
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image data: {e}")
+
+
+@lru_cache()
+def get_blob_store() -> BlobStore:
+    """Get the configured blob store."""
+    settings = get_settings()
+    if settings.blob_storage_backend == "local":
+        return LocalBlobStore(settings.blob_storage_path)
+    raise RuntimeError(f"Unknown blob storage backend: {settings.blob_storage_backend}")
@@ -0,0 +1,198 @@
+"""
+Incremental parsing of large JSON request bodies.
+
+Bulk endpoints accept either newline-delimited JSON (one record per line) or a
+single JSON array of records. Both are parsed record by record from the request
+stream, so memory is bounded by the largest record instead of the whole body.
+Each byte is scanned once: consumed input is dropped and a record is only decoded
+once its end has been found, however many chunks it spans.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, List, Tuple, Union
+
+_WHITESPACE = " \t\r\n"
+# Next character that can end a string, change the nesting depth or end a bare scalar
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_SCALAR_END = re.compile(r"[\s,\]]")
+
+
+class RecordParseError(ValueError):
+    """Raised when a record cannot be parsed; the rest of the body is unusable."""
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_record_bytes: int
+) -> AsyncIterator[Tuple[int, Union[Any, ValueError]]]:
+    """Yield (row number, record) for each non-empty line of an NDJSON stream.
+
+    A line that is not valid JSON is yielded as a ValueError so the caller can
+    report it and carry on with the next line.
+    """
+    buffer = bytearray()
+    scanned = 0  # bytes of the buffer known to contain no newline
+    row = 0
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            return ValueError(f"Invalid JSON: {e}")
+
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", scanned)) >= 0:
+            line = bytes(buffer[start:end])
+            start = scanned = end + 1
+            if line.strip():
+                row += 1
+                yield row, parse(line)
+        del buffer[:start]
+        scanned = len(buffer)
+        if len(buffer) > max_record_bytes:
+            raise RecordParseError(f"Row {row + 1} exceeds {max_record_bytes} bytes")
+
+    if buffer.strip():
+        row += 1
+        yield row, parse(bytes(buffer))
+
+
+async def iter_json_array(
+    chunks: AsyncIterator[bytes], max_record_bytes: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row number, record) for each element of a streamed JSON array.
+
+    The end of each element is found by tracking string and nesting state, then
+    the element's text is decoded in one go.
+    """
+    chunks = chunks.__aiter__()
+    # Chunks may end in the middle of a multi-byte character
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    pos = 0
+    eof = False
+    row = 0
+    started = False
+    expect_comma = False
+
+    # State of the element being scanned
+    in_record = False
+    parts: List[str] = []  # text of the element from earlier chunks
+    parts_size = 0
+    record_start = 0
+    depth = 0
+    in_string = False
+    escaped = False
+    scalar = False
+
+    while True:
+        if pos >= len(text):
+            if in_record:
+                parts.append(text[record_start:])
+                parts_size += len(text) - record_start
+                record_start = 0
+                if parts_size > max_record_bytes:
+                    raise RecordParseError(f"Row {row + 1} exceeds {max_record_bytes} bytes")
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                eof = True
+            if eof:
+                if not (in_record and scalar):
+                    raise RecordParseError("Unexpected end of JSON array")
+                text, pos = "", 0
+            else:
+                try:
+                    text = text_decoder.decode(chunk)
+                except UnicodeDecodeError as e:
+                    raise RecordParseError(f"Body is not valid UTF-8: {e}")
+                pos = 0
+                if escaped:
+                    escaped = False
+                    pos = 1
+                continue
+
+        complete = False
+        if not in_record:
+            char = text[pos]
+            if char in _WHITESPACE:
+                pos += 1
+                continue
+            if not started:
+                if char != "[":
+                    raise RecordParseError("Body must be a JSON array or NDJSON")
+                started = True
+                pos += 1
+                continue
+            if char == "]":
+                return
+            if expect_comma:
+                if char != ",":
+                    raise RecordParseError(f"Expected ',' after row {row}")
+                expect_comma = False
+                pos += 1
+                continue
+
+            in_record = True
+            record_start = pos
+            depth = 0
+            in_string = char == '"'
+            scalar = char not in '"[{'
+            if char in "[{":
+                depth = 1
+            if not scalar:
+                pos += 1
+        elif eof:
+            # A bare scalar such as a number ends with the body
+            complete = True
+        elif in_string:
+            match = _STRING_SPECIAL.search(text, pos)
+            if match is None:
+                pos = len(text)
+            elif match.group() == "\\":
+                pos = match.end() + 1
+                escaped = pos > len(text)
+            else:
+                pos = match.end()
+                in_string = False
+                complete = depth == 0
+        elif scalar:
+            match = _SCALAR_END.search(text, pos)
+            if match is None:
+                pos = len(text)
+            else:
+                pos = match.start()
+                complete = True
+        else:
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = len(text)
+            else:
+                pos = match.end()
+                char = match.group()
+                if char == '"':
+                    in_string = True
+                elif char in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    complete = depth == 0
+
+        if not complete:
+            continue
+        parts.append(text[record_start:pos])
+        record_text = "".join(parts)
+        parts, parts_size, in_record = [], 0, False
+        if len(record_text) > max_record_bytes:
+            raise RecordParseError(f"Row {row + 1} exceeds {max_record_bytes} bytes")
+        try:
+            record = json.loads(record_text)
+        except json.JSONDecodeError as e:
+            raise RecordParseError(f"Invalid JSON in row {row + 1}: {e}")
+        row += 1
+        expect_comma = True
+        yield row, record
@@ -0,0 +1,138 @@
+"""
+Streaming of multipart file uploads to temporary files.
+
+An `UploadFile` parameter makes FastAPI read and spool the whole multipart body
+before the route runs, so a route cannot turn a request away cheaply. Routes that
+need to (a full OCR queue) take the `Request` instead, run their checks and then
+read the body with `spool_multipart_file`, which copies a single file field to
+disk and stops as soon as it exceeds its size limit.
+"""
+
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart before 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+from app.core.storage import BlobTooLargeError
+
+
+class MultipartUploadError(ValueError):
+    """Raised when the body is not multipart/form-data or lacks the file field."""
+
+
+class _FileFieldSpooler:
+    """Multipart parser callbacks copying the first part of one file field to disk."""
+
+    def __init__(self, field: str, max_size: int, prefix: str):
+        self.field = field
+        self.max_size = max_size
+        self.prefix = prefix
+        self.path: Optional[str] = None
+        self.filename = ""
+        self.complete = False
+        self._file = None
+        self._size = 0
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        if self.path is not None:
+            return
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != self.field.encode() or b"filename" not in options:
+            return
+        self.filename = options[b"filename"].decode("utf-8", errors="replace")
+        fd, self.path = tempfile.mkstemp(prefix=self.prefix, suffix=os.path.splitext(self.filename)[1])
+        self._file = os.fdopen(fd, "wb")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is None:
+            return
+        self._size += end - start
+        if self._size > self.max_size:
+            raise BlobTooLargeError(f"Image exceeds maximum size of {self.max_size} bytes")
+        self._file.write(data[start:end])
+
+    def on_part_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.complete = True
+
+    def discard(self) -> None:
+        """Close and delete the partial file, if one was started."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def spool_multipart_file(
+    request: Request, field: str, max_size: int, prefix: str = "receiptly-upload-"
+) -> Tuple[str, str]:
+    """Stream a file field of a multipart request body to a temporary file.
+
+    Returns the path and the client's file name. Raises `BlobTooLargeError` as soon
+    as the file passes `max_size` and `MultipartUploadError` for a malformed body
+    or a missing field; no temporary file is left behind in either case.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise MultipartUploadError("Expected a multipart/form-data body")
+
+    spooler = _FileFieldSpooler(field, max_size, prefix)
+    parser = multipart.MultipartParser(boundary, spooler.callbacks())
+    try:
+        async for chunk in request.stream():
+            # The callbacks write to disk, keep that off the event loop
+            await run_in_threadpool(parser.write, chunk)
+        parser.finalize()
+        if not spooler.complete:
+            raise MultipartUploadError(f"Missing file field '{field}'")
+    except (BlobTooLargeError, MultipartUploadError):
+        spooler.discard()
+        raise
+    except ValueError as e:
+        # python-multipart parse errors derive from ValueError
+        spooler.discard()
+        raise MultipartUploadError(f"Malformed multipart body: {e}")
+    except BaseException:
+        spooler.discard()
+        raise
+    return spooler.path, spooler.filename
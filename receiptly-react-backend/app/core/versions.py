@@ -0,0 +1,54 @@
+"""
+Per-user data versions backing the ETags of the read endpoints.
+
+The `user_data_versions` table holds one row per user with a counter for receipt
+data (receipts and their items) and one for transactions. Every write path bumps
+the matching counters inside the same database transaction as the write, so a
+conditional GET reads a single row by primary key instead of aggregating the
+user's history.
+"""
+
+from typing import NamedTuple
+
+from prisma import Prisma
+
+RECEIPTS = "receipts"
+TRANSACTIONS = "transactions"
+
+
+class DataVersions(NamedTuple):
+    """Current data versions of a user."""
+    receipts: int
+    transactions: int
+
+
+async def bump_data_version(db: Prisma, user_id: str, *scopes: str) -> None:
+    """Increment the given version counters of a user, creating the row if needed."""
+    await db.userdataversion.upsert(
+        where={"userId": user_id},
+        data={
+            "create": {"userId": user_id, **{scope: 1 for scope in scopes}},
+            "update": {scope: {"increment": 1} for scope in scopes},
+        },
+    )
+
+
+async def get_data_versions(db: Prisma, user_id: str) -> DataVersions:
+    """Return the data versions of a user; users who never wrote anything are at 0."""
+    row = await db.userdataversion.find_unique(where={"userId": user_id})
+    if row is None:
+        return DataVersions(receipts=0, transactions=0)
+    return DataVersions(receipts=row.receipts, transactions=row.transactions)
+
+
+async def bump_all_data_versions(db: Prisma) -> int:
+    """Increment every user's versions after a maintenance script rewrote data.
+
+    Returns the number of users whose cached responses were invalidated.
+    """
+    return await db.execute_raw(
+        """
+        UPDATE "public"."user_data_versions"
+        SET "receipts" = "receipts" + 1, "transactions" = "transactions" + 1
+        """
+    )
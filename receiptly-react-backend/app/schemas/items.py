@@ -2,16 +2,18 @@
 Pydantic schemas for item-related operations.
 """
 
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
+from .numbers import Money, Quantity
+
 
 class ItemBase(BaseModel):
     """Base item schema."""
     name: str = Field(..., description="Item name")
-    price: str = Field(..., description="Item price as string")
-    quantity: str = Field(..., description="Item quantity as string")
+    price: Money = Field(..., description="Item price")
+    quantity: Quantity = Field(..., description="Item quantity")
 
 
 class ItemCreate(ItemBase):
@@ -22,8 +24,8 @@ class ItemCreate(ItemBase):
 class ItemUpdate(BaseModel):
     """Schema for updating an existing item."""
     name: Optional[str] = Field(None, description="Item name")
-    price: Optional[str] = Field(None, description="Item price as string")
-    quantity: Optional[str] = Field(None, description="Item quantity as string")
+    price: Optional[Money] = Field(None, description="Item price")
+    quantity: Optional[Quantity] = Field(None, description="Item quantity")
     receiptId: Optional[str] = Field(None, description="ID of the receipt this item belongs to")
 
 
@@ -33,4 +35,29 @@ class Item(ItemBase):
     receiptId: str = Field(..., description="ID of the receipt this item belongs to")
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ItemMonthSpend(BaseModel):
+    """Schema for the spend and prices of one item in one month."""
+    year: int = Field(..., description="Purchase year")
+    month: int = Field(..., description="Purchase month (1-12)")
+    spend: Money = Field(..., description="Sum of price times quantity")
+    quantity: Quantity = Field(..., description="Quantity bought")
+    purchases: int = Field(..., description="Number of receipt lines")
+    avgPrice: Money = Field(..., description="Average unit price")
+    minPrice: Money = Field(..., description="Lowest unit price")
+    maxPrice: Money = Field(..., description="Highest unit price")
+
+
+class ItemSpend(BaseModel):
+    """Schema for the spend on one normalized item name."""
+    name: str = Field(..., description="Normalized item name (lower case, collapsed whitespace)")
+    spend: Money = Field(..., description="Sum of price times quantity over the period")
+    quantity: Quantity = Field(..., description="Quantity bought over the period")
+    purchases: int = Field(..., description="Number of receipt lines over the period")
+    months: List[ItemMonthSpend] = Field(default=[], description="Spend and price series by month")
+
+
+class ItemAnalytics(BaseModel):
+    """Schema for item spend analytics."""
+    items: List[ItemSpend] = Field(..., description="Top items by spend, highest first")
@@ -0,0 +1,34 @@
+"""
+Pydantic schemas for background jobs.
+"""
+
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Job(BaseModel):
+    """Schema for the state of a background job."""
+    id: str = Field(..., description="Job ID")
+    kind: str = Field(..., description="Kind of work, e.g. ocr")
+    status: str = Field(..., description="queued, running, succeeded or failed")
+    createdAt: datetime = Field(..., description="When the job was submitted")
+    startedAt: Optional[datetime] = Field(None, description="When a worker picked up the job")
+    finishedAt: Optional[datetime] = Field(None, description="When the job finished")
+    result: Optional[Any] = Field(None, description="Job result once it succeeded")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
+    @classmethod
+    def from_job(cls, job) -> "Job":
+        """Build the response schema from a job of the job queue."""
+        return cls(
+            id=job.id,
+            kind=job.kind,
+            status=job.status,
+            createdAt=job.created_at,
+            startedAt=job.started_at,
+            finishedAt=job.finished_at,
+            result=job.result,
+            error=job.error,
+        )
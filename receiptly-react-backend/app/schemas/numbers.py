@@ -0,0 +1,32 @@
+"""
+Decimal field types shared by the receipt and item schemas.
+
+Amounts are stored as Decimal but keep travelling as strings in JSON, so clients
+written against the old string columns keep working unchanged. Input is parsed
+locale-tolerantly, e.g. "12,50" and 12.5 are both accepted.
+"""
+
+from decimal import Decimal
+
+from pydantic import BeforeValidator, PlainSerializer
+from typing_extensions import Annotated
+
+from app.core.numbers import parse_money, parse_quantity
+
+
+def format_quantity(value: Decimal) -> str:
+    """Format a quantity without trailing zeros, e.g. 1.000 as "1"."""
+    return format(value.normalize(), "f")
+
+
+Money = Annotated[
+    Decimal,
+    BeforeValidator(parse_money),
+    PlainSerializer(str, return_type=str, when_used="json"),
+]
+
+Quantity = Annotated[
+    Decimal,
+    BeforeValidator(parse_quantity),
+    PlainSerializer(format_quantity, return_type=str, when_used="json"),
+]
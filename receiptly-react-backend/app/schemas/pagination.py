@@ -0,0 +1,17 @@
+"""
+Pydantic schemas for paginated responses.
+"""
+
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Schema for a page of results in cursor pagination mode."""
+    items: List[T] = Field(..., description="Results on this page")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor for the next page, null when there are no more results"
+    )
@@ -5,21 +5,25 @@ Pydantic schemas for receipt-related operations.
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
 
 from .items import Item, ItemCreate
+from .numbers import Money
 
 
 class ReceiptBase(BaseModel):
     """Base receipt schema."""
     date: str = Field(..., description="Receipt date as string")
     time: str = Field(..., description="Receipt time as string")
-    total: str = Field(..., description="Receipt total as string")
-    imageData: Optional[str] = Field(None, description="Base64 encoded image data")
+    total: Money = Field(..., description="Receipt total")
 
 
 class ReceiptCreate(ReceiptBase):
     """Schema for creating a new receipt."""
+    purchasedAt: Optional[datetime] = Field(
+        None, description="Purchase timestamp, parsed from date and time when omitted"
+    )
+    imageData: Optional[str] = Field(None, description="Base64 encoded image data or data URL")
     items: List[ItemCreate] = Field(default=[], description="List of items in the receipt")
 
 
@@ -27,16 +31,47 @@ class ReceiptUpdate(BaseModel):
     """Schema for updating an existing receipt."""
     date: Optional[str] = Field(None, description="Receipt date as string")
     time: Optional[str] = Field(None, description="Receipt time as string")
-    total: Optional[str] = Field(None, description="Receipt total as string")
-    imageData: Optional[str] = Field(None, description="Base64 encoded image data")
+    total: Optional[Money] = Field(None, description="Receipt total")
+    purchasedAt: Optional[datetime] = Field(
+        None, description="Purchase timestamp, re-parsed from date and time when omitted"
+    )
+    imageData: Optional[str] = Field(None, description="Base64 encoded image data or data URL")
 
 
 class Receipt(ReceiptBase):
     """Schema for receipt responses."""
     id: str = Field(..., description="Receipt ID")
+    purchasedAt: datetime = Field(..., description="Purchase timestamp")
     createdAt: datetime = Field(..., description="Receipt creation timestamp")
     updatedAt: datetime = Field(..., description="Receipt last update timestamp")
+    imageSha256: Optional[str] = Field(None, description="SHA-256 digest of the stored receipt image")
+    imageContentType: Optional[str] = Field(None, description="Content type of the stored receipt image")
+    imageSize: Optional[int] = Field(None, description="Size of the stored receipt image in bytes")
+    imageData: Optional[str] = Field(None, exclude=True, description="Legacy inline image data")
     items: List[Item] = Field(default=[], description="List of items in the receipt")
 
+    @computed_field
+    @property
+    def hasImage(self) -> bool:
+        """Whether an image can be downloaded from the receipt image endpoint."""
+        return bool(self.imageSha256 or self.imageData)
+
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ReceiptSummary(BaseModel):
+    """Schema for projected receipt list responses (only requested fields are set)."""
+    id: str = Field(..., description="Receipt ID")
+    date: Optional[str] = Field(None, description="Receipt date as string")
+    time: Optional[str] = Field(None, description="Receipt time as string")
+    total: Optional[Money] = Field(None, description="Receipt total")
+    purchasedAt: Optional[datetime] = Field(None, description="Purchase timestamp")
+    createdAt: Optional[datetime] = Field(None, description="Receipt creation timestamp")
+    updatedAt: Optional[datetime] = Field(None, description="Receipt last update timestamp")
+    imageSha256: Optional[str] = Field(None, description="SHA-256 digest of the stored receipt image")
+    imageContentType: Optional[str] = Field(None, description="Content type of the stored receipt image")
+    imageSize: Optional[int] = Field(None, description="Size of the stored receipt image in bytes")
+    hasImage: Optional[bool] = Field(None, description="Whether the receipt has an image")
+    itemCount: Optional[int] = Field(None, description="Number of items in the receipt")
+    items: Optional[List[Item]] = Field(None, description="List of items in the receipt")
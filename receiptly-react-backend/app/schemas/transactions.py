@@ -3,7 +3,7 @@ Pydantic schemas for transaction-related operations.
 """
 
 from datetime import datetime
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -61,3 +61,23 @@ class MonthlyStats(BaseModel):
     totalExpenses: float
     netBalance: float
     transactionCount: int
+
+
+class TransactionImportError(BaseModel):
+    """Schema for a row that could not be imported."""
+    row: Optional[int] = Field(None, description="Row (CSV line or OFX transaction number), null for file errors")
+    error: str = Field(..., description="Why the row was skipped")
+
+
+class TransactionImportResult(BaseModel):
+    """Schema for the result of a bank export import."""
+    format: str = Field(..., description="Detected file format: csv or ofx")
+    rows: int = Field(..., description="Rows read from the file")
+    imported: int = Field(..., description="Transactions created")
+    duplicates: int = Field(..., description="Rows skipped because the transaction already exists")
+    failed: int = Field(..., description="Rows that could not be read")
+    errors: List[TransactionImportError] = Field(
+        default=[], description="The first errors, for reporting back to the user"
+    )
+    seconds: float = Field(..., description="Import duration")
+    rowsPerSecond: float = Field(..., description="Import throughput")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Parse the legacy string amounts left behind by the numeric money migration.
+
+The migration converts values that are plain numbers in SQL and keeps everything
+else in the `totalText`, `priceText` and `quantityText` columns. This script parses
+those strings locale-tolerantly ("12,50", "1.234,56 €", "2x") in batches, writes the
+numeric column and clears the text. Values that still cannot be parsed are left in
+place and logged for manual review.
+
+Usage: python backfill_decimal_columns.py [--batch-size 500] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from prisma import Prisma
+
+from app.core.numbers import parse_money, parse_quantity
+from app.core.versions import bump_all_data_versions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_receipts(db: Prisma, batch_size: int, dry_run: bool) -> None:
+    """Backfill `receipts.total` from `totalText`."""
+    converted = 0
+    failed = 0
+    last_id = ""
+
+    while True:
+        receipts = await db.receipt.find_many(
+            where={"totalText": {"not": None}, "id": {"gt": last_id}},
+            take=batch_size,
+            order={"id": "asc"},
+        )
+        if not receipts:
+            break
+        last_id = receipts[-1].id
+
+        updates = []
+        for receipt in receipts:
+            try:
+                total = parse_money(receipt.totalText)
+            except ValueError:
+                logger.warning(f"Receipt {receipt.id}: cannot parse total {receipt.totalText!r}")
+                failed += 1
+                continue
+            updates.append((receipt.id, {"total": total, "totalText": None}))
+
+        if updates and not dry_run:
+            async with db.batch_() as batcher:
+                for receipt_id, data in updates:
+                    batcher.receipt.update(where={"id": receipt_id}, data=data)
+        converted += len(updates)
+        logger.info(f"Receipts: {converted} converted so far")
+
+    logger.info(f"Receipts done: {converted} converted, {failed} left for review")
+
+
+async def backfill_items(db: Prisma, batch_size: int, dry_run: bool) -> None:
+    """Backfill `items.price` and `items.quantity` from their text columns."""
+    converted = 0
+    failed = 0
+    last_id = ""
+
+    while True:
+        items = await db.item.find_many(
+            where={
+                "OR": [{"priceText": {"not": None}}, {"quantityText": {"not": None}}],
+                "id": {"gt": last_id},
+            },
+            take=batch_size,
+            order={"id": "asc"},
+        )
+        if not items:
+            break
+        last_id = items[-1].id
+
+        updates = []
+        for item in items:
+            data = {}
+            for text_field, field, parse in (
+                ("priceText", "price", parse_money),
+                ("quantityText", "quantity", parse_quantity),
+            ):
+                text = getattr(item, text_field)
+                if text is None:
+                    continue
+                try:
+                    data[field] = parse(text)
+                    data[text_field] = None
+                except ValueError:
+                    logger.warning(f"Item {item.id}: cannot parse {field} {text!r}")
+                    failed += 1
+            if data:
+                updates.append((item.id, data))
+
+        if updates and not dry_run:
+            async with db.batch_() as batcher:
+                for item_id, data in updates:
+                    batcher.item.update(where={"id": item_id}, data=data)
+        converted += len(updates)
+        logger.info(f"Items: {converted} converted so far")
+
+    logger.info(f"Items done: {converted} converted, {failed} values left for review")
+
+
+async def run(batch_size: int, dry_run: bool) -> None:
+    db = Prisma()
+    await db.connect()
+    try:
+        await backfill_receipts(db, batch_size, dry_run)
+        await backfill_items(db, batch_size, dry_run)
+        if not dry_run:
+            # Responses now carry the new columns, so cached ETags must not match
+            await bump_all_data_versions(db)
+    finally:
+        await db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill numeric receipt and item amounts")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and report without writing")
+    args = parser.parse_args()
+    asyncio.run(run(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Fill `receipts.purchasedAt` from the free-form `date` and `time` strings.
+
+Streams over all receipts in id order with keyset batches, so memory stays
+bounded and the script can be interrupted and re-run at any time. Receipts whose
+date cannot be parsed keep their current value (the creation time after the
+migration) and are logged.
+
+Usage: python backfill_purchased_at.py [--batch-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from prisma import Prisma
+
+from app.core.dates import parse_purchased_at
+from app.core.versions import bump_all_data_versions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def backfill_purchased_at(batch_size: int, dry_run: bool) -> None:
+    """Parse and store the purchase timestamp of every receipt."""
+    db = Prisma()
+    await db.connect()
+    updated = 0
+    unparsed = 0
+    seen = 0
+    last_id = ""
+
+    try:
+        while True:
+            receipts = await db.receipt.find_many(
+                where={"id": {"gt": last_id}},
+                take=batch_size,
+                order={"id": "asc"},
+            )
+            if not receipts:
+                break
+            last_id = receipts[-1].id
+            seen += len(receipts)
+
+            updates = []
+            for receipt in receipts:
+                purchased_at = parse_purchased_at(receipt.date, receipt.time)
+                if purchased_at is None:
+                    logger.warning(
+                        f"Receipt {receipt.id}: cannot parse date {receipt.date!r} / time {receipt.time!r}"
+                    )
+                    unparsed += 1
+                elif purchased_at != receipt.purchasedAt:
+                    updates.append((receipt.id, purchased_at))
+
+            if updates and not dry_run:
+                async with db.batch_() as batcher:
+                    for receipt_id, purchased_at in updates:
+                        batcher.receipt.update(
+                            where={"id": receipt_id}, data={"purchasedAt": purchased_at}
+                        )
+            updated += len(updates)
+            logger.info(f"Processed {seen} receipts, {updated} updated so far")
+
+        if updated and not dry_run:
+            await bump_all_data_versions(db)
+    finally:
+        await db.disconnect()
+
+    logger.info(f"Done: {seen} receipts, {updated} updated, {unparsed} left unparsed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill receipt purchase timestamps")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Receipts per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and report without writing")
+    args = parser.parse_args()
+    asyncio.run(backfill_purchased_at(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-user query shapes against a seeded database.
+
+Optionally seeds synthetic users, receipts, items and transactions (e.g. 1M rows
+per table), then prints the EXPLAIN ANALYZE plan and latency of every list, stats and
+ownership query shape. With --compare the same queries are also planned with the
+per-user indexes dropped inside a rolled back transaction.
+
+Run it against a scratch database only:
+
+    python benchmark_indexes.py --rows 1000000 --users 1000 --compare
+    python benchmark_indexes.py --cleanup
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from prisma import Prisma
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+USER_PREFIX = "bench-user-"
+SEED_CHUNK = 100_000
+
+# Per-user indexes added by the 20261017110000 and 20261017130000 migrations
+PER_USER_INDEXES = [
+    "receipts_userId_createdAt_id_idx",
+    "receipts_userId_purchasedAt_id_idx",
+    "items_receiptId_idx",
+    "transactions_userId_date_id_idx",
+    "transactions_userId_type_date_idx",
+    "transactions_receiptId_idx",
+]
+
+# Query shapes issued by the API, with {user} and {receipt} placeholders
+QUERIES = {
+    "receipt list page": """
+        SELECT r."id", r."date", r."total", r."createdAt"
+        FROM "public"."receipts" r
+        WHERE r."userId" = '{user}'
+        ORDER BY r."createdAt" DESC, r."id" DESC
+        LIMIT 51
+    """,
+    "receipt list cursor page": """
+        SELECT r."id", r."date", r."total", r."createdAt"
+        FROM "public"."receipts" r
+        WHERE r."userId" = '{user}'
+          AND (r."createdAt", r."id") < (now() - interval '180 days', 'zzz')
+        ORDER BY r."createdAt" DESC, r."id" DESC
+        LIMIT 51
+    """,
+    "receipts purchased in a date range": """
+        SELECT r."id", r."date", r."total", r."purchasedAt"
+        FROM "public"."receipts" r
+        WHERE r."userId" = '{user}'
+          AND r."purchasedAt" >= now() - interval '90 days' AND r."purchasedAt" <= now()
+        ORDER BY r."purchasedAt" DESC, r."id" DESC
+        LIMIT 51
+    """,
+    "transaction list page": """
+        SELECT * FROM "public"."transactions"
+        WHERE "userId" = '{user}'
+        ORDER BY "date" DESC, "id" DESC
+        LIMIT 101
+    """,
+    "transaction list by type and date range": """
+        SELECT * FROM "public"."transactions"
+        WHERE "userId" = '{user}' AND "type" = 'expense'
+          AND "date" >= now() - interval '90 days' AND "date" <= now()
+        ORDER BY "date" DESC
+        LIMIT 100
+    """,
+    "transaction stats for date range": """
+        SELECT "type", SUM("amount"), COUNT(*)
+        FROM "public"."transactions"
+        WHERE "userId" = '{user}'
+          AND "date" >= now() - interval '365 days' AND "date" <= now()
+        GROUP BY "type"
+    """,
+    "items of a user": """
+        SELECT i.* FROM "public"."items" i
+        JOIN "public"."receipts" r ON r."id" = i."receiptId"
+        WHERE r."userId" = '{user}'
+        ORDER BY i."id"
+        LIMIT 100
+    """,
+    "transactions linked to a receipt": """
+        SELECT "id" FROM "public"."transactions" WHERE "receiptId" = '{receipt}'
+    """,
+}
+
+
+class _Rollback(Exception):
+    """Raised to roll back the comparison transaction."""
+
+
+async def seed(db: Prisma, rows: int, users: int) -> None:
+    """Insert synthetic users, receipts, items and transactions."""
+    logger.info(f"Seeding {users} users")
+    await db.execute_raw(
+        f"""
+        INSERT INTO "public"."users" ("id", "name", "email", "password", "createdAt", "updatedAt")
+        SELECT '{USER_PREFIX}' || g, 'Bench ' || g, 'bench-' || g || '@example.invalid', '-', now(), now()
+        FROM generate_series(1, $1) g
+        ON CONFLICT DO NOTHING
+        """,
+        users,
+    )
+
+    for start in range(1, rows + 1, SEED_CHUNK):
+        end = min(start + SEED_CHUNK - 1, rows)
+        await db.execute_raw(
+            f"""
+            INSERT INTO "public"."receipts"
+                ("id", "date", "time", "total", "userId", "purchasedAt", "createdAt", "updatedAt")
+            SELECT 'bench-r-' || g, '2025-01-01', '12:00', (random() * 100)::numeric(10, 2),
+                   '{USER_PREFIX}' || (g % $3 + 1), now() - random() * interval '730 days',
+                   now() - random() * interval '730 days', now()
+            FROM generate_series($1::int, $2::int) g
+            """,
+            start,
+            end,
+            users,
+        )
+        await db.execute_raw(
+            """
+            INSERT INTO "public"."items" ("id", "name", "price", "quantity", "receiptId")
+            SELECT 'bench-i-' || g, 'Item ' || g, (random() * 20)::numeric(10, 2), 1, 'bench-r-' || g
+            FROM generate_series($1::int, $2::int) g
+            """,
+            start,
+            end,
+        )
+        await db.execute_raw(
+            f"""
+            INSERT INTO "public"."transactions"
+                ("id", "userId", "type", "amount", "category", "date", "receiptId", "createdAt", "updatedAt")
+            SELECT 'bench-t-' || g, '{USER_PREFIX}' || (g % $3 + 1),
+                   CASE WHEN random() < 0.3 THEN 'income' ELSE 'expense' END,
+                   (random() * 100)::numeric(10, 2), 'Bench',
+                   now() - random() * interval '730 days',
+                   CASE WHEN g % 2 = 0 THEN 'bench-r-' || g END, now(), now()
+            FROM generate_series($1::int, $2::int) g
+            """,
+            start,
+            end,
+            users,
+        )
+        logger.info(f"Seeded {end} / {rows} rows per table")
+
+    await db.execute_raw('ANALYZE "public"."receipts", "public"."items", "public"."transactions"')
+
+
+async def cleanup(db: Prisma) -> None:
+    """Delete all seeded data (receipts, items and transactions cascade with the users)."""
+    deleted = await db.execute_raw(
+        f"""DELETE FROM "public"."users" WHERE "id" LIKE '{USER_PREFIX}%'"""
+    )
+    logger.info(f"Deleted {deleted} benchmark users and their data")
+
+
+async def explain(db: Prisma, sql: str) -> str:
+    """Return the EXPLAIN ANALYZE plan of a query."""
+    rows = await db.query_raw(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+    return "\n".join(row["QUERY PLAN"] for row in rows)
+
+
+async def measure(db: Prisma, sql: str, repeat: int) -> dict:
+    """Run a query repeatedly and return its latency in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await db.query_raw(sql)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min": min(timings),
+        "p50": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+async def run_queries(db: Prisma, user: str, receipt: str, repeat: int, label: str) -> None:
+    """Print the plan and latency of every query shape."""
+    for name, template in QUERIES.items():
+        sql = template.format(user=user, receipt=receipt)
+        print(f"\n=== {name} ({label}) ===")
+        print(await explain(db, sql))
+        if repeat:
+            latency = await measure(db, sql, repeat)
+            print(
+                f"latency over {repeat} runs: min {latency['min']:.2f} ms, "
+                f"p50 {latency['p50']:.2f} ms, max {latency['max']:.2f} ms"
+            )
+
+
+async def run(args) -> None:
+    db = Prisma()
+    await db.connect()
+    try:
+        if args.cleanup:
+            await cleanup(db)
+            return
+
+        if args.rows:
+            await seed(db, args.rows, args.users)
+
+        user = f"{USER_PREFIX}1"
+        receipt = "bench-r-2"
+        await run_queries(db, user, receipt, args.repeat, "with indexes")
+
+        if args.compare:
+            # DROP INDEX is transactional in PostgreSQL, so rolling back restores them
+            try:
+                async with db.tx(timeout=timedelta(minutes=10)) as tx:
+                    for index in PER_USER_INDEXES:
+                        await tx.execute_raw(f'DROP INDEX IF EXISTS "public"."{index}"')
+                    await run_queries(tx, user, receipt, 0, "without indexes")
+                    raise _Rollback()
+            except _Rollback:
+                pass
+    finally:
+        await db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-user query shapes")
+    parser.add_argument("--rows", type=int, default=0, help="Rows to seed per table, e.g. 1000000")
+    parser.add_argument("--users", type=int, default=1000, help="Users to spread the rows over")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--compare", action="store_true", help="Also plan the queries without the indexes")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the seeded data and exit")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Load test the read endpoints of a running backend.
+
+Runs a fixed number of concurrent clients for a fixed duration against the
+receipt list, item list and transaction stats endpoints and prints throughput
+and latency percentiles. Run it against `python serve.py --workers N` for
+several N to check how read throughput scales with the worker count:
+
+    python load_test.py --url http://localhost:8000 --email a@b.c --password secret \\
+        --concurrency 64 --duration 30
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+ENDPOINTS = [
+    "/api/receipts/?limit=20&include=",
+    "/api/items/?limit=50",
+    "/api/transactions/stats",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of a list of values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+async def worker(
+    client: httpx.AsyncClient, deadline: float, latencies: Dict[str, List[float]], errors: Dict[str, int]
+) -> None:
+    index = 0
+    while time.perf_counter() < deadline:
+        endpoint = ENDPOINTS[index % len(ENDPOINTS)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(endpoint)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        else:
+            errors[endpoint] += 1
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+        token = args.token or await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+        errors: Dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(worker(client, deadline, latencies, errors) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s at concurrency {args.concurrency}")
+    for endpoint, values in latencies.items():
+        print(
+            f"  {endpoint:40} {len(values) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(values) if values else 0:7.1f} ms  "
+            f"p99 {percentile(values, 99):7.1f} ms  errors {errors[endpoint]}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the read endpoints")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--token", default=None, help="Bearer token (otherwise log in)")
+    parser.add_argument("--email", default=None, help="Login email")
+    parser.add_argument("--password", default=None, help="Login password")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    args = parser.parse_args()
+    if not args.token and not (args.email and args.password):
+        parser.error("pass --token or --email and --password")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
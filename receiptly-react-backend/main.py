@@ -2,16 +2,23 @@
 Main FastAPI application entry point for Receiptly backend.
 """
 
+import hmac
 import logging
+import os
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from prisma import Prisma
+from fastapi.responses import Response
 
-from app.api.routes import receipts, items, auth, transactions
+from app.api.routes import receipts, items, auth, transactions, jobs, health
+from app.core.auth import password_hasher
 from app.core.config import get_settings
-from app.core.database import set_database
+from app.core.database import InstrumentedPrisma, set_database
+from app.core.health import get_loop_lag_monitor
+from app.core.jobs import get_job_queue
+from app.core.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, SharedMetrics
+from app.core.query_timing import QueryTimingMiddleware
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -20,8 +27,15 @@ logger = logging.getLogger(__name__)
 # Get application settings
 settings = get_settings()
 
-# Global Prisma instance
-db = Prisma()
+# Global Prisma instance, timing every query for /metrics
+db = InstrumentedPrisma()
+
+# With several web workers each one answers /metrics for all of them
+shared_metrics = (
+    SharedMetrics(REGISTRY, settings.metrics_dir)
+    if settings.metrics_enabled and settings.metrics_dir
+    else None
+)
 
 
 @asynccontextmanager
@@ -32,11 +46,23 @@ async def lifespan(app: FastAPI):
     await db.connect()
     # Set the global database instance for dependency injection
     set_database(db)
-    logger.info("Database connected successfully")
+    logger.info(f"Database connected successfully (worker pid {os.getpid()})")
+    get_loop_lag_monitor().start()
+    if shared_metrics is not None:
+        shared_metrics.start()
     yield
     # Shutdown
     logger.info("Shutting down Receiptly backend...")
+    get_loop_lag_monitor().stop()
+    if shared_metrics is not None:
+        shared_metrics.stop()
+    try:
+        await get_job_queue().fail_unfinished(db)
+    except Exception as e:
+        logger.warning(f"Could not mark unfinished jobs as failed: {e}")
     await db.disconnect()
+    password_hasher.shutdown()
+    get_job_queue().shutdown()
     logger.info("Database disconnected")
 
 
@@ -59,11 +85,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request query counts in a Server-Timing header, with the budget warning in debug
+if settings.query_timing_enabled:
+    app.add_middleware(
+        QueryTimingMiddleware,
+        query_budget=settings.query_budget if settings.debug else None,
+    )
+
+# Record per-route metrics; added last so it wraps CORS and sees every response
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, excluded_paths=["/metrics"])
+
 # Include API routes
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(receipts.router, prefix="/api/receipts", tags=["receipts"])
 app.include_router(items.router, prefix="/api/items", tags=["items"])
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(health.router, prefix="/health", tags=["health"])
 
 
 @app.get("/")
@@ -72,10 +111,16 @@ async def root():
     return {"message": "Receiptly API is running!", "version": "1.0.0"}
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "database": "connected"}
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus metrics of all worker processes, for scrapers holding the metrics token."""
+    if not settings.metrics_enabled or not settings.metrics_token:
+        return Response(status_code=404)
+    expected = f"Bearer {settings.metrics_token}".encode()
+    if not hmac.compare_digest(request.headers.get("authorization", "").encode(), expected):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    content = shared_metrics.render() if shared_metrics is not None else REGISTRY.render()
+    return Response(content=content, media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
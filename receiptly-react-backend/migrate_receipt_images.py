@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Move legacy inline receipt images from the `receipts.imageData` column into the
+blob store. Rows are processed in small batches so memory stays bounded.
+
+Usage: python migrate_receipt_images.py [--batch-size 50]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from prisma import Prisma
+
+from app.core.storage import decode_image_data, get_blob_store
+from app.core.versions import bump_all_data_versions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate_receipt_images(batch_size: int) -> None:
+    """Migrate all receipts that still store their image inline."""
+    db = Prisma()
+    await db.connect()
+    store = get_blob_store()
+    migrated = 0
+    failed = 0
+    last_id = ""
+
+    try:
+        while True:
+            receipts = await db.receipt.find_many(
+                where={"imageData": {"not": None}, "id": {"gt": last_id}},
+                take=batch_size,
+                order={"id": "asc"},
+            )
+            if not receipts:
+                break
+
+            for receipt in receipts:
+                last_id = receipt.id
+                try:
+                    content, content_type = decode_image_data(receipt.imageData)
+                except ValueError as e:
+                    logger.warning(f"Skipping receipt {receipt.id}: {e}")
+                    failed += 1
+                    continue
+
+                blob = store.put(content)
+                await db.receipt.update(
+                    where={"id": receipt.id},
+                    data={
+                        "imageData": None,
+                        "imageSha256": blob.sha256,
+                        "imageContentType": content_type,
+                        "imageSize": blob.size,
+                    },
+                )
+                migrated += 1
+
+            logger.info(f"Migrated {migrated} receipt images so far")
+
+        if migrated:
+            await bump_all_data_versions(db)
+    finally:
+        await db.disconnect()
+
+    logger.info(f"Done: {migrated} migrated, {failed} skipped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=50, help="Receipts per batch")
+    args = parser.parse_args()
+    asyncio.run(migrate_receipt_images(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
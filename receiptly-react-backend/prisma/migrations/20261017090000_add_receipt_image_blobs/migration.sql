@@ -0,0 +1,4 @@
+-- AlterTable
+ALTER TABLE "public"."receipts" ADD COLUMN     "imageContentType" TEXT,
+ADD COLUMN     "imageSha256" TEXT,
+ADD COLUMN     "imageSize" INTEGER;
@@ -0,0 +1,26 @@
+-- CreateTable
+CREATE TABLE "public"."user_monthly_totals" (
+    "userId" TEXT NOT NULL,
+    "year" INTEGER NOT NULL,
+    "month" INTEGER NOT NULL,
+    "type" TEXT NOT NULL,
+    "total" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "count" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "user_monthly_totals_pkey" PRIMARY KEY ("userId","year","month","type")
+);
+
+-- AddForeignKey
+ALTER TABLE "public"."user_monthly_totals" ADD CONSTRAINT "user_monthly_totals_userId_fkey" FOREIGN KEY ("userId") REFERENCES "public"."users"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Backfill from existing transactions
+INSERT INTO "public"."user_monthly_totals" ("userId", "year", "month", "type", "total", "count")
+SELECT
+    "userId",
+    EXTRACT(YEAR FROM "date")::int,
+    EXTRACT(MONTH FROM "date")::int,
+    "type",
+    SUM("amount"),
+    COUNT(*)
+FROM "public"."transactions"
+GROUP BY "userId", EXTRACT(YEAR FROM "date"), EXTRACT(MONTH FROM "date"), "type";
@@ -0,0 +1,14 @@
+-- CreateIndex
+CREATE INDEX "receipts_userId_createdAt_id_idx" ON "public"."receipts"("userId", "createdAt" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "items_receiptId_idx" ON "public"."items"("receiptId");
+
+-- CreateIndex
+CREATE INDEX "transactions_userId_date_id_idx" ON "public"."transactions"("userId", "date" DESC, "id" DESC);
+
+-- CreateIndex
+CREATE INDEX "transactions_userId_type_date_idx" ON "public"."transactions"("userId", "type", "date");
+
+-- CreateIndex
+CREATE INDEX "transactions_receiptId_idx" ON "public"."transactions"("receiptId");
@@ -0,0 +1,24 @@
+-- Keep the legacy string values next to the new numeric columns until they are backfilled
+ALTER TABLE "public"."receipts" RENAME COLUMN "total" TO "totalText";
+ALTER TABLE "public"."receipts" ALTER COLUMN "totalText" DROP NOT NULL,
+ADD COLUMN "total" DECIMAL(12,2) NOT NULL DEFAULT 0;
+
+ALTER TABLE "public"."items" RENAME COLUMN "price" TO "priceText";
+ALTER TABLE "public"."items" RENAME COLUMN "quantity" TO "quantityText";
+ALTER TABLE "public"."items" ALTER COLUMN "priceText" DROP NOT NULL,
+ALTER COLUMN "quantityText" DROP NOT NULL,
+ADD COLUMN "price" DECIMAL(12,2) NOT NULL DEFAULT 0,
+ADD COLUMN "quantity" DECIMAL(12,3) NOT NULL DEFAULT 1;
+
+-- Convert values that are plain numbers; backfill_decimal_columns.py parses the rest
+UPDATE "public"."receipts"
+SET "total" = TRIM("totalText")::DECIMAL(12,2), "totalText" = NULL
+WHERE TRIM("totalText") ~ '^-?[0-9]{1,10}(\.[0-9]+)?$';
+
+UPDATE "public"."items"
+SET "price" = TRIM("priceText")::DECIMAL(12,2), "priceText" = NULL
+WHERE TRIM("priceText") ~ '^-?[0-9]{1,10}(\.[0-9]+)?$';
+
+UPDATE "public"."items"
+SET "quantity" = TRIM("quantityText")::DECIMAL(12,3), "quantityText" = NULL
+WHERE TRIM("quantityText") ~ '^-?[0-9]{1,9}(\.[0-9]+)?$';
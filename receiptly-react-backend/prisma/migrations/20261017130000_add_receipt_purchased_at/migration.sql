@@ -0,0 +1,8 @@
+-- AlterTable
+ALTER TABLE "public"."receipts" ADD COLUMN "purchasedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- Start from the creation time; backfill_purchased_at.py then parses date and time
+UPDATE "public"."receipts" SET "purchasedAt" = "createdAt";
+
+-- CreateIndex
+CREATE INDEX "receipts_userId_purchasedAt_id_idx" ON "public"."receipts"("userId", "purchasedAt" DESC, "id" DESC);
@@ -0,0 +1,14 @@
+-- AlterTable
+ALTER TABLE "public"."transactions" ADD COLUMN "fingerprint" TEXT;
+
+-- Backfill; must match transaction_fingerprint() in app/core/bank_import.py
+UPDATE "public"."transactions"
+SET "fingerprint" = md5(
+    "userId" || '|' ||
+    to_char("date", 'YYYY-MM-DD') || '|' ||
+    to_char(CASE WHEN "type" = 'income' THEN "amount" ELSE -"amount" END, 'FM999999999990.00') || '|' ||
+    LOWER(REGEXP_REPLACE(TRIM(COALESCE("description", '')), '\s+', ' ', 'g'))
+);
+
+-- CreateIndex
+CREATE INDEX "transactions_userId_fingerprint_idx" ON "public"."transactions"("userId", "fingerprint");
@@ -0,0 +1,14 @@
+-- CreateTable
+CREATE TABLE "public"."user_data_versions" (
+    "userId" TEXT NOT NULL,
+    "receipts" INTEGER NOT NULL DEFAULT 0,
+    "transactions" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "user_data_versions_pkey" PRIMARY KEY ("userId")
+);
+
+-- AddForeignKey
+ALTER TABLE "public"."user_data_versions" ADD CONSTRAINT "user_data_versions_userId_fkey" FOREIGN KEY ("userId") REFERENCES "public"."users"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- Seed a row for every existing user so maintenance scripts can bump them
+INSERT INTO "public"."user_data_versions" ("userId") SELECT "id" FROM "public"."users";
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Rebuild and verify the per-user monthly transaction rollup (`user_monthly_totals`).
+
+Usage:
+    python rebuild_rollups.py               # rebuild for all users, then verify
+    python rebuild_rollups.py --user <id>   # rebuild a single user
+    python rebuild_rollups.py --verify-only # only report mismatching buckets
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from prisma import Prisma
+
+from app.core.rollups import rebuild_rollups, verify_rollups
+from app.core.versions import bump_all_data_versions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run(user_id: str, verify_only: bool) -> int:
+    """Rebuild the rollup unless verify_only is set and return the number of mismatches."""
+    db = Prisma()
+    await db.connect()
+    try:
+        if not verify_only:
+            rows = await rebuild_rollups(db, user_id=user_id)
+            logger.info(f"Rebuilt rollup: {rows} rows written")
+            # The stats endpoints read the rollup, so their ETags must change too
+            await bump_all_data_versions(db)
+
+        mismatches = await verify_rollups(db)
+        if user_id:
+            mismatches = [m for m in mismatches if m["userId"] == user_id]
+        for mismatch in mismatches:
+            logger.warning(f"Rollup mismatch: {mismatch}")
+        logger.info(f"Verification finished: {len(mismatches)} mismatching buckets")
+        return len(mismatches)
+    finally:
+        await db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild and verify the monthly rollup")
+    parser.add_argument("--user", dest="user_id", default=None, help="Only rebuild this user ID")
+    parser.add_argument("--verify-only", action="store_true", help="Do not rebuild, only verify")
+    args = parser.parse_args()
+    mismatches = asyncio.run(run(args.user_id, args.verify_only))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the Receiptly backend.
+
+Starts WEB_WORKERS uvicorn worker processes, one per available CPU by default.
+Every worker imports main.py and so owns its own event loop, Prisma client,
+in-process caches and password hashing and OCR pools (sized per worker). State
+another worker may need is shared: OCR jobs and the data versions that invalidate
+the caches live in the database, and the workers exchange their metrics through a
+temporary METRICS_DIR so any of them answers /metrics for all, with a `worker`
+label per process.
+
+The database connection budget (DB_CONNECTION_BUDGET) is split evenly across the
+workers through the Prisma `connection_limit` URL parameter, so the deployment as
+a whole stays below Postgres `max_connections`. On SIGTERM the workers stop
+accepting connections and drain in-flight requests for up to
+GRACEFUL_SHUTDOWN_SECONDS before disconnecting from the database.
+
+Usage: python serve.py [--workers N] [--db-connections TOTAL]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from app.core.config import get_settings
+from app.core.database import with_connection_limit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """Return the CPUs this process may use, honouring affinity and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Containers limited with --cpus expose the quota in cgroup v2
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the backend with multiple worker processes")
+    parser.add_argument("--workers", type=int, default=settings.web_workers, help="Worker processes (0 = per CPU)")
+    parser.add_argument(
+        "--db-connections",
+        type=int,
+        default=settings.db_connection_budget,
+        help="Database connections shared by all workers",
+    )
+    args = parser.parse_args()
+
+    workers = args.workers or available_cpus()
+    per_worker = max(1, args.db_connections // workers)
+    if per_worker * workers > args.db_connections:
+        logger.warning(
+            f"{workers} workers need at least {workers} connections, "
+            f"more than the budget of {args.db_connections}"
+        )
+
+    # Workers inherit the environment, Prisma reads DATABASE_URL when it connects
+    os.environ["DATABASE_URL"] = with_connection_limit(
+        settings.database_url, per_worker, settings.db_pool_timeout
+    )
+    logger.info(
+        f"Starting {workers} workers with {per_worker} database connections each "
+        f"(budget {args.db_connections})"
+    )
+
+    # Workers exchange their metrics snapshots here, see SharedMetrics
+    metrics_dir = None
+    if workers > 1 and not settings.metrics_dir:
+        metrics_dir = os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="receiptly-metrics-")
+
+    try:
+        uvicorn.run(
+            "main:app",
+            host=settings.host,
+            port=settings.port,
+            workers=workers,
+            timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+            proxy_headers=True,
+            log_level="info",
+        )
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+In-memory stand-in for the generated Prisma client.
+
+Implements the subset of model actions, filters and raw queries the routes use,
+so they can be exercised without a Postgres database. Rows are plain dicts and
+are returned as attribute objects like Prisma models. `tx()` snapshots all
+tables and restores them when the block raises, like an interactive transaction.
+"""
+
+import copy
+import re
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prisma.fields import Json
+
+# Timestamps handed out by the fake clock start here and advance one second per write
+BASE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# Column defaults and relations of each model (a subset of prisma/schema.prisma)
+MODELS = {
+    "user": {
+        "prefix": "u",
+        "key": "id",
+        "defaults": {},
+        "timestamps": ("createdAt", "updatedAt"),
+    },
+    "receipt": {
+        "prefix": "r",
+        "key": "id",
+        "defaults": {
+            "total": Decimal("0"),
+            "totalText": None,
+            "imageData": None,
+            "imageSha256": None,
+            "imageContentType": None,
+            "imageSize": None,
+        },
+        "timestamps": ("createdAt", "updatedAt", "purchasedAt"),
+    },
+    "item": {
+        "prefix": "i",
+        "key": "id",
+        "defaults": {
+            "price": Decimal("0"),
+            "priceText": None,
+            "quantity": Decimal("1"),
+            "quantityText": None,
+        },
+        "timestamps": (),
+    },
+    "transaction": {
+        "prefix": "t",
+        "key": "id",
+        "defaults": {"description": None, "receiptId": None, "fingerprint": None},
+        "timestamps": ("createdAt", "updatedAt"),
+    },
+    "job": {
+        "prefix": "j",
+        "key": "id",
+        "defaults": {"status": "queued", "result": None, "error": None, "startedAt": None, "finishedAt": None},
+        "timestamps": ("createdAt", "updatedAt"),
+    },
+    "userdataversion": {
+        "prefix": "",
+        "key": "userId",
+        "defaults": {"receipts": 0, "transactions": 0},
+        "timestamps": (),
+    },
+}
+
+# model -> {relation field: (related model, foreign key on this model)}
+RELATIONS = {
+    "item": {"receipt": ("receipt", "receiptId")},
+    "transaction": {"receipt": ("receipt", "receiptId")},
+}
+
+
+class InjectedFailure(Exception):
+    """Raised by a model action that a test asked to fail."""
+
+
+def _to_record(row: dict) -> SimpleNamespace:
+    return SimpleNamespace(**copy.deepcopy(row))
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == "equals":
+        return value == operand
+    if op == "in":
+        return value in operand
+    if op == "not_in":
+        return value not in operand
+    if op == "not":
+        return value != operand
+    if value is None:
+        return False
+    if op == "gt":
+        return value > operand
+    if op == "gte":
+        return value >= operand
+    if op == "lt":
+        return value < operand
+    if op == "lte":
+        return value <= operand
+    raise NotImplementedError(f"Filter operator {op} is not supported by the fake client")
+
+
+class FakeModel:
+    """Model actions of one table, e.g. `db.receipt`."""
+
+    def __init__(self, client: "FakePrisma", name: str):
+        self.client = client
+        self.name = name
+        self.config = MODELS[name]
+
+    @property
+    def rows(self) -> Dict[str, dict]:
+        return self.client.tables[self.name]
+
+    def _check_failure(self, method: str) -> None:
+        self.client.calls.append((self.name, method))
+        if (self.name, method) in self.client.failures:
+            raise InjectedFailure(f"Injected failure in {self.name}.{method}")
+
+    def _matches(self, row: dict, where: Optional[dict]) -> bool:
+        for key, condition in (where or {}).items():
+            if key == "OR":
+                if not any(self._matches(row, sub) for sub in condition):
+                    return False
+            elif key == "AND":
+                if not all(self._matches(row, sub) for sub in condition):
+                    return False
+            elif key == "NOT":
+                if self._matches(row, condition):
+                    return False
+            elif key in RELATIONS.get(self.name, {}):
+                related_name, foreign_key = RELATIONS[self.name][key]
+                related = self.client.tables[related_name].get(row.get(foreign_key))
+                model = getattr(self.client, related_name)
+                if related is None or not model._matches(related, condition.get("is")):
+                    return False
+            elif isinstance(condition, dict):
+                if not all(_compare(row.get(key), op, operand) for op, operand in condition.items()):
+                    return False
+            elif row.get(key) != condition:
+                return False
+        return True
+
+    def _select(self, where: Optional[dict]) -> List[dict]:
+        return [row for row in self.rows.values() if self._matches(row, where)]
+
+    def _include(self, row: dict, include: Optional[dict]) -> SimpleNamespace:
+        record = _to_record(row)
+        if include and include.get("items"):
+            items = [item for item in self.client.tables["item"].values() if item["receiptId"] == row["id"]]
+            record.items = [_to_record(item) for item in sorted(items, key=lambda item: item["id"])]
+        return record
+
+    def _insert(self, data: dict) -> dict:
+        data = dict(data)
+        nested_items = data.pop("items", None)
+        row = {**copy.deepcopy(self.config["defaults"]), **data}
+        key = self.config["key"]
+        if row.get(key) is None:
+            row[key] = self.client.next_id(self.config["prefix"])
+        for field in self.config["timestamps"]:
+            row.setdefault(field, self.client.now())
+        if row[key] in self.rows:
+            raise InjectedFailure(f"Unique constraint failed on {self.name}.{key}")
+        self.rows[row[key]] = row
+        for item in (nested_items or {}).get("create", []):
+            self.client.item._insert({**item, "receiptId": row["id"]})
+        return row
+
+    def _apply(self, row: dict, data: dict) -> None:
+        for field, value in data.items():
+            if isinstance(value, dict) and "increment" in value:
+                row[field] = row.get(field, 0) + value["increment"]
+            elif isinstance(value, Json):
+                row[field] = copy.deepcopy(value.data)
+            else:
+                row[field] = value
+        if "updatedAt" in self.config["timestamps"]:
+            row["updatedAt"] = self.client.now()
+
+    def _remove(self, row: dict) -> None:
+        del self.rows[row[self.config["key"]]]
+        if self.name == "receipt":
+            for item in [i for i in self.client.tables["item"].values() if i["receiptId"] == row["id"]]:
+                del self.client.tables["item"][item["id"]]
+            for transaction in self.client.tables["transaction"].values():
+                if transaction["receiptId"] == row["id"]:
+                    transaction["receiptId"] = None
+
+    async def find_unique(self, where: dict, include: Optional[dict] = None):
+        self._check_failure("find_unique")
+        rows = self._select(where)
+        return self._include(rows[0], include) if rows else None
+
+    async def find_first(self, where: Optional[dict] = None, include: Optional[dict] = None, order=None):
+        self._check_failure("find_first")
+        rows = self._ordered(self._select(where), order)
+        return self._include(rows[0], include) if rows else None
+
+    def _ordered(self, rows: List[dict], order) -> List[dict]:
+        if order is None:
+            return sorted(rows, key=lambda row: row[self.config["key"]])
+        orders = order if isinstance(order, list) else [order]
+        for spec in reversed(orders):
+            (field, direction), = spec.items()
+            rows = sorted(rows, key=lambda row: row[field], reverse=direction == "desc")
+        return rows
+
+    async def find_many(
+        self,
+        where: Optional[dict] = None,
+        take: Optional[int] = None,
+        skip: Optional[int] = None,
+        order=None,
+        include: Optional[dict] = None,
+    ):
+        self._check_failure("find_many")
+        rows = self._ordered(self._select(where), order)[skip or 0:]
+        if take is not None:
+            rows = rows[:take]
+        return [self._include(row, include) for row in rows]
+
+    async def count(self, where: Optional[dict] = None) -> int:
+        self._check_failure("count")
+        return len(self._select(where))
+
+    async def create(self, data: dict, include: Optional[dict] = None):
+        self._check_failure("create")
+        return self._include(self._insert(data), include)
+
+    async def create_many(self, data: List[dict], skip_duplicates: bool = False) -> int:
+        self._check_failure("create_many")
+        for row in data:
+            self._insert(row)
+        return len(data)
+
+    async def update(self, where: dict, data: dict, include: Optional[dict] = None):
+        self._check_failure("update")
+        rows = self._select(where)
+        if not rows:
+            return None
+        self._apply(rows[0], data)
+        return self._include(rows[0], include)
+
+    async def update_many(self, where: dict, data: dict) -> int:
+        self._check_failure("update_many")
+        rows = self._select(where)
+        for row in rows:
+            self._apply(row, data)
+        return len(rows)
+
+    async def upsert(self, where: dict, data: dict, include: Optional[dict] = None):
+        self._check_failure("upsert")
+        rows = self._select(where)
+        if rows:
+            self._apply(rows[0], data["update"])
+            return self._include(rows[0], include)
+        return self._include(self._insert(data["create"]), include)
+
+    async def delete(self, where: dict, include: Optional[dict] = None):
+        self._check_failure("delete")
+        rows = self._select(where)
+        if not rows:
+            return None
+        record = self._include(rows[0], include)
+        self._remove(rows[0])
+        return record
+
+    async def delete_many(self, where: Optional[dict] = None) -> int:
+        self._check_failure("delete_many")
+        rows = self._select(where)
+        for row in rows:
+            self._remove(row)
+        return len(rows)
+
+
+class _Transaction:
+    def __init__(self, client: "FakePrisma"):
+        self.client = client
+
+    async def __aenter__(self) -> "FakePrisma":
+        self.snapshot = copy.deepcopy((self.client.tables, self.client.monthly_totals))
+        return self.client
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None:
+            self.client.tables, self.client.monthly_totals = self.snapshot
+            self.client.rollbacks += 1
+        return False
+
+
+RawHandler = Callable[..., Any]
+
+
+class FakePrisma:
+    """In-memory Prisma client with the model accessors and raw queries used by the app."""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, dict]] = {name: {} for name in MODELS}
+        # (userId, year, month, type) -> [total, count], maintained by the rollup upserts
+        self.monthly_totals: Dict[Tuple[str, int, int, str], List[float]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self.raw_calls: List[Tuple[str, tuple]] = []
+        self.failures = set()
+        self.rollbacks = 0
+        self._ids = 0
+        self._ticks = 0
+        self._raw_handlers: List[Tuple[str, RawHandler]] = [
+            ('INSERT INTO "public"."user_monthly_totals"', self._rollup_upsert),
+            ('WHERE "receiptId" = $1', self._lock_receipt_transactions),
+            ('FOR UPDATE', self._lock_transaction),
+            ('FROM "public"."receipts" r', self._receipt_list),
+            ('FROM buckets', self._monthly_stats),
+            ('UPDATE "public"."user_data_versions"', self._bump_all_versions),
+        ]
+        for name in MODELS:
+            setattr(self, name, FakeModel(self, name))
+
+    def next_id(self, prefix: str) -> str:
+        self._ids += 1
+        return f"{prefix}{self._ids:08d}"
+
+    def now(self) -> datetime:
+        self._ticks += 1
+        return BASE_TIME + timedelta(seconds=self._ticks)
+
+    def fail_on(self, model: str, method: str) -> None:
+        """Make every later call of a model action raise `InjectedFailure`."""
+        self.failures.add((model, method))
+
+    def tx(self, timeout: Optional[timedelta] = None, **kwargs) -> _Transaction:
+        return _Transaction(self)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def _raw(self, query: str, args: tuple) -> Any:
+        self.raw_calls.append((query, args))
+        if ("raw", "query") in self.failures:
+            raise InjectedFailure("Injected failure in raw query")
+        for marker, handler in self._raw_handlers:
+            if marker in query:
+                return handler(query, *args)
+        return None
+
+    async def query_raw(self, query: str, *args) -> List[dict]:
+        return self._raw(query, args) or []
+
+    async def query_first(self, query: str, *args) -> Optional[dict]:
+        rows = self._raw(query, args)
+        if isinstance(rows, list):
+            return rows[0] if rows else None
+        return rows
+
+    async def execute_raw(self, query: str, *args) -> int:
+        return self._raw(query, args) or 0
+
+    # Raw queries issued by the app, answered from the in-memory tables.
+    # Timestamps are returned as ISO strings, like Prisma does for raw queries.
+
+    def _rollup_upsert(self, query, user_id, year, month, type, amount, count) -> int:
+        bucket = self.monthly_totals.setdefault((user_id, year, month, type), [0.0, 0])
+        bucket[0] += amount
+        bucket[1] += count
+        return 1
+
+    def _lock_transaction(self, query, transaction_id, user_id) -> List[dict]:
+        row = self.tables["transaction"].get(transaction_id)
+        if row is None or row["userId"] != user_id:
+            return []
+        fields = ("id", "userId", "type", "amount", "date", "description")
+        return [{**{f: row[f] for f in fields}, "date": row["date"].isoformat()}]
+
+    def _lock_receipt_transactions(self, query, receipt_id, user_id) -> List[dict]:
+        return [
+            {"id": row["id"], "type": row["type"], "amount": row["amount"], "date": row["date"].isoformat()}
+            for row in self.tables["transaction"].values()
+            if row["receiptId"] == receipt_id and row["userId"] == user_id
+        ]
+
+    def _monthly_stats(
+        self, query, user_id, start, after_start_month, end_month_start, end, start_year, start_month, end_year, end_month
+    ) -> List[dict]:
+        """Answer `GET /api/transactions/monthly`: rollup for whole months, raw rows at the edges."""
+        buckets: Dict[Tuple[int, int], dict] = {}
+
+        def add(year, month, type, total, count):
+            bucket = buckets.setdefault((year, month), {"year": year, "month": month, "income": 0.0, "expenses": 0.0, "count": 0})
+            bucket["income" if type == "income" else "expenses"] += total
+            bucket["count"] += count
+
+        for (owner, year, month, type), (total, count) in self.monthly_totals.items():
+            if owner == user_id and (start_year, start_month) < (year, month) < (end_year, end_month):
+                add(year, month, type, total, count)
+        for row in self.tables["transaction"].values():
+            date = row["date"]
+            if row["userId"] == user_id and (start <= date < after_start_month or end_month_start <= date <= end):
+                add(date.year, date.month, row["type"], row["amount"], 1)
+        return [bucket for _, bucket in sorted(buckets.items()) if bucket["count"] > 0]
+
+    def _bump_all_versions(self, query) -> int:
+        for row in self.tables["userdataversion"].values():
+            row["receipts"] += 1
+            row["transactions"] += 1
+        return len(self.tables["userdataversion"])
+
+    def _receipt_list(self, query: str, *args) -> List[dict]:
+        """Answer the projected receipt list query of `GET /api/receipts/`."""
+        params = {f"${n}": value for n, value in enumerate(args, start=1)}
+        sort_field = re.search(r'ORDER BY r\."(\w+)" DESC', query).group(1)
+        rows = [row for row in self.tables["receipt"].values() if row["userId"] == params["$1"]]
+        for op, param in re.findall(r'r\."purchasedAt" (>=|<=) (\$\d+)', query):
+            bound = params[param]
+            rows = [row for row in rows if (row["purchasedAt"] >= bound if op == ">=" else row["purchasedAt"] <= bound)]
+        cursor = re.search(r"< \((\$\d+)::timestamp\(3\), (\$\d+)\)", query)
+        if cursor:
+            key = (params[cursor.group(1)], params[cursor.group(2)])
+            rows = [row for row in rows if (row[sort_field], row["id"]) < key]
+        rows.sort(key=lambda row: (row[sort_field], row["id"]), reverse=True)
+        limit = re.search(r"LIMIT (\$\d+)(?: OFFSET (\$\d+))?", query)
+        offset = params[limit.group(2)] if limit.group(2) else 0
+        rows = rows[offset:offset + params[limit.group(1)]]
+
+        columns = re.findall(r'AS "(\w+)"', query.split('FROM "public"."receipts" r')[0])
+        result = []
+        for row in rows:
+            values = {
+                **row,
+                "hasImage": bool(row["imageSha256"] or row["imageData"]),
+                "itemCount": sum(1 for i in self.tables["item"].values() if i["receiptId"] == row["id"]),
+                "_cursorSortKey": row[sort_field],
+            }
+            result.append({
+                column: values[column].isoformat() if isinstance(values[column], datetime) else values[column]
+                for column in columns
+            })
+        return result
@@ -0,0 +1,22 @@
+"""
+Functions run by the job queue tests.
+
+Spawned worker processes import them by module, so this module must not import
+the app: its Prisma client only exists after `prisma generate`, which the tests
+work around in conftest.py but the workers cannot.
+"""
+
+import time
+
+
+def add(a, b):
+    return a + b
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def sleep_then_return(seconds, value):
+    time.sleep(seconds)
+    return value
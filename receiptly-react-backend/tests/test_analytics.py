@@ -0,0 +1,93 @@
+"""
+Item analytics cache: results are keyed by the user's receipts data version.
+"""
+
+import pytest
+
+from app.api.routes import items
+from app.core.analytics import analytics_cache, get_cached_analytics, set_cached_analytics
+from app.core.versions import RECEIPTS, bump_data_version
+
+ROW = {
+    "name": "milk",
+    "year": 2026,
+    "month": 3,
+    "spend": 3.0,
+    "quantity": 2.0,
+    "purchases": 1,
+    "avgPrice": 1.5,
+    "minPrice": 1.5,
+    "maxPrice": 1.5,
+    "totalSpend": 3.0,
+    "totalQuantity": 2.0,
+    "totalPurchases": 1,
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    analytics_cache.clear()
+    yield
+    analytics_cache.clear()
+
+
+def test_result_is_served_while_its_version_is_current():
+    set_cached_analytics("u1", ("key",), "fresh", 3)
+    assert get_cached_analytics("u1", ("key",), 3) == "fresh"
+    assert get_cached_analytics("u1", ("key",), 4) is None
+
+
+def test_result_of_an_older_version_does_not_replace_a_newer_one():
+    set_cached_analytics("u1", ("key",), "new", 4)
+    set_cached_analytics("u1", ("key",), "stale", 3)
+
+    assert get_cached_analytics("u1", ("key",), 4) == "new"
+
+
+def test_new_version_drops_every_variant():
+    set_cached_analytics("u1", ("a",), "a", 1)
+    set_cached_analytics("u1", ("b",), "b", 1)
+    set_cached_analytics("u1", ("a",), "a2", 2)
+
+    assert get_cached_analytics("u1", ("a",), 2) == "a2"
+    assert get_cached_analytics("u1", ("b",), 2) is None
+
+
+def test_write_during_the_query_is_not_hidden_by_the_cache(client, users, auth, db, monkeypatch):
+    calls = []
+
+    async def query_item_spend(db, user_id, top, **filters):
+        calls.append(user_id)
+        if len(calls) == 1:
+            # A receipt write commits while the first query is still running
+            await bump_data_version(db, user_id, RECEIPTS)
+        return [ROW]
+
+    monkeypatch.setattr(items, "query_item_spend", query_item_spend)
+
+    for _ in range(2):
+        response = client.get("/api/items/analytics", headers=auth["alice"])
+        assert response.status_code == 200, response.text
+
+    # The first result was not cached, the second was and serves the third request
+    assert client.get("/api/items/analytics", headers=auth["alice"]).json()["items"][0]["name"] == "milk"
+    assert calls == [users["alice"], users["alice"]]
+
+
+def test_write_on_another_worker_invalidates_the_cache(client, users, auth, db, monkeypatch):
+    calls = []
+
+    async def query_item_spend(db, user_id, top, **filters):
+        calls.append(user_id)
+        return [ROW]
+
+    monkeypatch.setattr(items, "query_item_spend", query_item_spend)
+    assert client.get("/api/items/analytics", headers=auth["alice"]).status_code == 200
+    assert client.get("/api/items/analytics", headers=auth["alice"]).status_code == 200
+    assert len(calls) == 1
+
+    # No in-process call tells this worker, only the shared version row changes
+    db.tables["userdataversion"][users["alice"]] = {"userId": users["alice"], "receipts": 7, "transactions": 0}
+
+    assert client.get("/api/items/analytics", headers=auth["alice"]).status_code == 200
+    assert len(calls) == 2
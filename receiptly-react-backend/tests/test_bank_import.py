@@ -0,0 +1,89 @@
+"""
+Bank export fingerprints and de-duplication of repeated imports.
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.api.routes import transactions
+from app.core.bank_import import transaction_fingerprint
+
+STATEMENT = """date,amount,description
+2026-03-02,-3.20,Coffee  Shop
+2026-03-02,-3.20,coffee shop
+2026-03-03,1500.00,Salary
+"""
+
+
+def test_fingerprint_normalizes_description_and_time_of_day():
+    morning = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)
+    evening = datetime(2026, 3, 2, 21, 0, tzinfo=timezone.utc)
+    assert transaction_fingerprint("u1", morning, "expense", Decimal("3.2"), "Coffee  Shop") == (
+        transaction_fingerprint("u1", evening, "expense", 3.20, " coffee shop")
+    )
+
+
+def test_fingerprint_separates_users_signs_and_days():
+    date = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    fingerprint = transaction_fingerprint("u1", date, "expense", 3.2, "Coffee")
+    assert fingerprint != transaction_fingerprint("u2", date, "expense", 3.2, "Coffee")
+    assert fingerprint != transaction_fingerprint("u1", date, "income", 3.2, "Coffee")
+    assert fingerprint != transaction_fingerprint("u1", date + timedelta(days=1), "expense", 3.2, "Coffee")
+
+
+def test_fingerprint_uses_the_utc_day():
+    local = datetime(2026, 3, 3, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+    utc = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+    assert transaction_fingerprint("u1", local, "expense", 1, None) == (
+        transaction_fingerprint("u1", utc, "expense", 1, "")
+    )
+
+
+def import_csv(client, auth, content: str) -> dict:
+    response = client.post(
+        "/api/transactions/import",
+        files={"file": ("statement.csv", content.encode(), "text/csv")},
+        headers=auth,
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture(params=[500, 1], ids=["one-batch", "batch-per-row"])
+def chunk_size(request, monkeypatch):
+    monkeypatch.setattr(transactions.settings, "bulk_import_chunk_size", request.param)
+    return request.param
+
+
+def test_identical_rows_in_one_file_are_all_imported(client, db, auth, chunk_size):
+    result = import_csv(client, auth["alice"], STATEMENT)
+
+    assert (result["rows"], result["imported"], result["duplicates"]) == (3, 3, 0)
+    assert len(db.tables["transaction"]) == 3
+
+
+def test_reimporting_the_same_file_adds_nothing(client, db, auth, chunk_size):
+    import_csv(client, auth["alice"], STATEMENT)
+    result = import_csv(client, auth["alice"], STATEMENT)
+
+    assert (result["imported"], result["duplicates"]) == (0, 3)
+    assert len(db.tables["transaction"]) == 3
+
+
+def test_extended_statement_only_adds_the_new_occurrences(client, db, auth, chunk_size):
+    import_csv(client, auth["alice"], STATEMENT)
+    extended = STATEMENT + "2026-03-02,-3.20,COFFEE SHOP\n2026-03-04,-9.99,Books\n"
+    result = import_csv(client, auth["alice"], extended)
+
+    assert (result["imported"], result["duplicates"]) == (2, 3)
+    coffees = [t for t in db.tables["transaction"].values() if t["amount"] == 3.2]
+    assert len(coffees) == 3
+
+
+def test_other_users_transactions_are_not_duplicates(client, db, auth):
+    import_csv(client, auth["bob"], STATEMENT)
+    result = import_csv(client, auth["alice"], STATEMENT)
+
+    assert (result["imported"], result["duplicates"]) == (3, 0)
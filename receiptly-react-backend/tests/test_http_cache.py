@@ -0,0 +1,158 @@
+"""
+Conditional GETs: ETags derived from the per-user data versions and 304 answers.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.core.http_cache import etag_matches, make_etag
+from app.core.versions import bump_all_data_versions
+
+RECEIPT = {"date": "01.03.2026", "time": "09:15", "total": "2.00", "items": [{"name": "Tea", "price": "2", "quantity": "1"}]}
+TRANSACTION = {"type": "income", "amount": 10.0, "category": "Gift", "date": "2026-03-01T10:00:00+00:00"}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"other", W/"abc"', True),
+        ('W/"abcd"', False),
+    ],
+)
+def test_etag_matches_uses_weak_comparison(header, expected):
+    assert etag_matches(header, 'W/"abc"') is expected
+
+
+def test_make_etag_depends_on_every_part():
+    assert make_etag("receipts", "u1", 1) != make_etag("receipts", "u1", 2)
+    assert make_etag("receipts", "u1", 1) != make_etag("receipts", "u2", 1)
+    assert make_etag("receipts", "u1", 1).startswith('W/"')
+
+
+def revalidate(client, path, headers):
+    """Fetch a resource, then revalidate it with its ETag."""
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200, first.text
+    etag = first.headers["ETag"]
+    return etag, client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/api/receipts/", "/api/transactions/", "/api/transactions/stats", "/api/transactions/monthly"],
+)
+def test_unchanged_data_is_not_modified(client, db, auth, path):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    etag, response = revalidate(client, path, auth["alice"])
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["Vary"] == "Authorization"
+
+
+def test_not_modified_reads_only_the_version_row(client, db, auth):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    etag = client.get("/api/receipts/", headers=auth["alice"]).headers["ETag"]
+    db.calls.clear()
+    db.raw_calls.clear()
+
+    response = client.get("/api/receipts/", headers={**auth["alice"], "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert db.calls == [("userdataversion", "find_unique")]
+    assert db.raw_calls == []
+
+
+@pytest.mark.parametrize(
+    "method, path, body, changed, unchanged",
+    [
+        ("POST", "/api/receipts/", RECEIPT, "/api/transactions/monthly", None),
+        ("PUT", "/api/items/{item}", {"name": "Green tea"}, "/api/receipts/", "/api/transactions/"),
+        ("DELETE", "/api/items/{item}", None, "/api/receipts/{receipt}", "/api/transactions/"),
+        ("PUT", "/api/receipts/{receipt}", {"total": "3"}, "/api/receipts/{receipt}", "/api/transactions/stats"),
+        ("POST", "/api/transactions/", TRANSACTION, "/api/transactions/stats", "/api/receipts/"),
+        ("DELETE", "/api/receipts/{receipt}", None, "/api/transactions/", None),
+    ],
+)
+def test_writes_change_only_the_affected_etags(client, db, auth, method, path, body, changed, unchanged):
+    created = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"]).json()
+    ids = {"receipt": created["id"], "item": created["items"][0]["id"]}
+    urls = [template.format(**ids) for template in (changed, unchanged) if template]
+    etags = {url: client.get(url, headers=auth["alice"]).headers["ETag"] for url in urls}
+
+    response = client.request(method, path.format(**ids), json=body, headers=auth["alice"])
+    assert response.status_code < 300, response.text
+
+    statuses = [
+        client.get(url, headers={**auth["alice"], "If-None-Match": etags[url]}).status_code
+        for url in urls
+    ]
+    assert statuses == [200, 304][:len(urls)]
+
+
+def test_deleted_receipt_is_not_found_despite_its_old_etag(client, db, auth):
+    receipt_id = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"]).json()["id"]
+    etag = client.get(f"/api/receipts/{receipt_id}", headers=auth["alice"]).headers["ETag"]
+    client.delete(f"/api/receipts/{receipt_id}", headers=auth["alice"])
+
+    response = client.get(f"/api/receipts/{receipt_id}", headers={**auth["alice"], "If-None-Match": etag})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("if_none_match", ["*", "etag"])
+def test_wildcard_or_etag_never_hides_a_missing_receipt(client, db, users, auth, if_none_match):
+    receipt_id = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"]).json()["id"]
+    own = client.get(f"/api/receipts/{receipt_id}", headers=auth["alice"])
+    if_none_match = own.headers["ETag"] if if_none_match == "etag" else if_none_match
+
+    missing = client.get("/api/receipts/missing", headers={**auth["alice"], "If-None-Match": if_none_match})
+    foreign = client.get(f"/api/receipts/{receipt_id}", headers={**auth["bob"], "If-None-Match": if_none_match})
+
+    assert (missing.status_code, foreign.status_code) == (404, 404)
+
+
+def test_wildcard_matches_an_existing_receipt(client, db, auth):
+    receipt_id = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"]).json()["id"]
+    response = client.get(f"/api/receipts/{receipt_id}", headers={**auth["alice"], "If-None-Match": "*"})
+    assert response.status_code == 304
+
+
+def test_etags_are_per_user(client, db, auth):
+    bob_etag = client.get("/api/receipts/", headers=auth["bob"]).headers["ETag"]
+    assert client.get("/api/receipts/", headers=auth["alice"]).headers["ETag"] != bob_etag
+
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    response = client.get("/api/receipts/", headers={**auth["bob"], "If-None-Match": bob_etag})
+    assert response.status_code == 304
+
+
+def test_maintenance_scripts_invalidate_every_etag(client, db, auth):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    etag = client.get("/api/receipts/", headers=auth["alice"]).headers["ETag"]
+
+    asyncio.run(bump_all_data_versions(db))
+
+    response = client.get("/api/receipts/", headers={**auth["alice"], "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_monthly_etag_changes_with_the_day(client, db, auth, monkeypatch):
+    first = client.get("/api/transactions/monthly", headers=auth["alice"]).headers["ETag"]
+
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2099, 1, 2, tzinfo=tz)
+
+    monkeypatch.setattr("app.api.routes.transactions.datetime", Later)
+    response = client.get("/api/transactions/monthly", headers={**auth["alice"], "If-None-Match": first})
+    assert response.status_code == 200
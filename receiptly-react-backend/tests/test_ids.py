@@ -0,0 +1,34 @@
+"""
+Application-generated record IDs.
+"""
+
+import re
+
+from app.core.ids import cuid
+
+CUID_RE = re.compile(r"^c[0-9a-z]{24}$")
+
+
+def test_cuid_matches_the_prisma_layout():
+    assert CUID_RE.match(cuid())
+
+
+def test_cuids_are_unique_and_time_ordered():
+    ids = [cuid() for _ in range(10000)]
+    assert len(set(ids)) == len(ids)
+    assert [i[1:9] for i in ids] == sorted(i[1:9] for i in ids)
+
+
+def test_bulk_import_links_rows_by_cuid(client, db, auth):
+    body = "\n".join([
+        '{"date": "01.03.2026", "time": "09:15", "total": "2.00", "items": [{"name": "Tea", "price": "2", "quantity": "1"}]}',
+        '{"date": "02.03.2026", "time": "10:00", "total": "1.00", "items": []}',
+    ])
+    response = client.post("/api/receipts/bulk", content=body, headers=auth["alice"])
+    assert response.status_code == 200, response.text
+
+    receipt_ids = set(db.tables["receipt"])
+    assert len(receipt_ids) == 2
+    assert all(CUID_RE.match(receipt_id) for receipt_id in receipt_ids)
+    assert {item["receiptId"] for item in db.tables["item"].values()} <= receipt_ids
+    assert {t["receiptId"] for t in db.tables["transaction"].values()} == receipt_ids
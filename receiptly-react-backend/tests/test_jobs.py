@@ -0,0 +1,168 @@
+"""
+Lifecycle of background jobs on the process-pool job queue and their rows in the
+jobs table, which every web worker reads.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes import jobs
+from app.core.jobs import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobQueue,
+    JobQueueFullError,
+)
+from tests.job_functions import add, fail, sleep_then_return
+
+
+@pytest.fixture
+async def queue():
+    job_queue = JobQueue(workers=1, max_pending=2, ttl_seconds=3600)
+    yield job_queue
+    job_queue.shutdown()
+
+
+async def wait_until_finished(queue: JobQueue, job, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, f"job still {job.status}"
+        await queue.wait_for_change(job, job.version, deadline - time.monotonic())
+    # Let the finally block of the runner release the slot and call on_done
+    await asyncio.sleep(0)
+
+
+async def test_job_moves_from_queued_to_succeeded(queue, db):
+    done = []
+    job = await queue.submit(db, "user-1", "test", add, 2, 3, on_done=done.append)
+    assert job.status == JOB_QUEUED
+    assert queue.pending == 1
+
+    await wait_until_finished(queue, job)
+
+    assert job.status == JOB_SUCCEEDED
+    assert job.result == 5
+    assert job.error is None
+    assert job.created_at <= job.started_at <= job.finished_at
+    assert queue.pending == 0
+    assert done == [job]
+    # Finished jobs are only kept in the database
+    assert queue.get(job.id) is None
+    row = db.tables["job"][job.id]
+    assert row["status"] == JOB_SUCCEEDED
+    assert row["result"] == 5
+    assert row["finishedAt"] == job.finished_at
+
+
+async def test_workers_are_spawned_not_forked(queue, db):
+    job = await queue.submit(db, "user-1", "test", add, 1, 1)
+    await wait_until_finished(queue, job)
+    assert queue._executor._mp_context.get_start_method() == "spawn"
+
+
+async def test_failing_job_records_the_error(queue, db):
+    done = []
+    job = await queue.submit(db, "user-1", "test", fail, "unreadable image", on_done=done.append)
+
+    await wait_until_finished(queue, job)
+
+    assert job.status == JOB_FAILED
+    assert job.error == "unreadable image"
+    assert job.result is None
+    assert queue.pending == 0
+    assert done == [job]
+    assert db.tables["job"][job.id]["error"] == "unreadable image"
+
+
+async def test_full_queue_rejects_new_jobs_until_one_finishes(queue, db):
+    first = await queue.submit(db, "user-1", "test", sleep_then_return, 0.2, "a")
+    await queue.submit(db, "user-1", "test", add, 1, 1)
+    with pytest.raises(JobQueueFullError):
+        await queue.submit(db, "user-1", "test", add, 1, 1)
+
+    await wait_until_finished(queue, first)
+    assert queue.pending < queue.max_pending
+    await queue.submit(db, "user-1", "test", add, 1, 1)
+
+
+async def test_jobs_wait_for_a_free_worker(queue, db):
+    slow = await queue.submit(db, "user-1", "test", sleep_then_return, 0.5, "slow")
+    waiting = await queue.submit(db, "user-1", "test", add, 1, 2)
+
+    while slow.status != JOB_RUNNING:
+        await queue.wait_for_change(slow, slow.version, 5.0)
+    assert waiting.status == JOB_QUEUED
+
+    await wait_until_finished(queue, waiting)
+    assert slow.status == JOB_SUCCEEDED
+    assert waiting.finished_at >= slow.finished_at
+
+
+async def test_wait_for_change_times_out_without_a_change(queue, db):
+    job = await queue.submit(db, "user-1", "test", sleep_then_return, 0.5, "x")
+    await wait_until_finished(queue, job)
+
+    assert await queue.wait_for_change(job, job.version, 0.05) is False
+    assert await queue.wait_for_change(job, job.version - 1, 0.05) is True
+
+
+async def test_expired_and_orphaned_jobs_are_pruned(queue, db):
+    old = datetime.now(timezone.utc) - timedelta(seconds=queue.ttl_seconds + 60)
+    expired = await db.job.create(data={"userId": "user-1", "kind": "test", "createdAt": old})
+    await db.job.update(where={"id": expired.id}, data={"status": JOB_SUCCEEDED, "finishedAt": old})
+    orphaned = await db.job.create(data={"userId": "user-1", "kind": "test", "createdAt": old, "status": JOB_RUNNING})
+    recent = await db.job.create(data={"userId": "user-1", "kind": "test", "createdAt": datetime.now(timezone.utc)})
+
+    job = await queue.submit(db, "user-1", "test", add, 1, 1)
+    await wait_until_finished(queue, job)
+
+    assert set(db.tables["job"]) == {recent.id, job.id}
+    assert orphaned.id not in db.tables["job"]
+
+
+async def test_failed_submit_releases_its_slot(queue, db):
+    db.fail_on("job", "create")
+    with pytest.raises(Exception):
+        await queue.submit(db, "user-1", "test", add, 1, 1)
+    assert queue.pending == 0
+
+
+async def test_unfinished_jobs_are_failed_on_shutdown(queue, db):
+    job = await queue.submit(db, "user-1", "test", sleep_then_return, 0.5, "x")
+    await queue.fail_unfinished(db)
+
+    row = db.tables["job"][job.id]
+    assert row["status"] == JOB_FAILED
+    assert row["finishedAt"] is not None
+    await wait_until_finished(queue, job)
+
+
+async def test_job_is_readable_by_a_worker_that_does_not_run_it(queue, db):
+    job = await queue.submit(db, "user-1", "test", add, 2, 3)
+    await wait_until_finished(queue, job)
+    other_worker = JobQueue(workers=1, max_pending=2, ttl_seconds=3600)
+
+    loaded = await other_worker.load(db, job.id, "user-1")
+    assert (loaded.status, loaded.result) == (JOB_SUCCEEDED, 5)
+    assert await other_worker.load(db, job.id, "user-2") is None
+
+
+async def test_event_stream_polls_a_job_of_another_worker(db, monkeypatch):
+    monkeypatch.setattr(jobs, "EVENT_POLL_SECONDS", 0.01)
+    record = await db.job.create(data={"userId": "user-1", "kind": "ocr", "createdAt": datetime.now(timezone.utc)})
+
+    response = await jobs.stream_job_events(record.id, db=db, current_user=SimpleNamespace(id="user-1"))
+    events = response.body_iterator
+    assert '"status":"queued"' in await events.__anext__()
+
+    db.tables["job"][record.id].update(status=JOB_SUCCEEDED, result={"items": []})
+    last = await asyncio.wait_for(events.__anext__(), 5)
+    assert '"status":"succeeded"' in last
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
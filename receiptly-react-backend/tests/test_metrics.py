@@ -0,0 +1,166 @@
+"""
+Prometheus exposition of the in-process metrics.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import TTLCache
+from app.core.health import DatabaseProbe
+from app.core.metrics import (
+    REGISTRY,
+    SNAPSHOT_MAX_AGE,
+    Counter,
+    Histogram,
+    Registry,
+    SharedMetrics,
+    begin_request_stats,
+    end_request_stats,
+    query_latency_quantiles,
+    record_query,
+    register_cache,
+)
+
+
+def sample(text: str, line_start: str) -> float:
+    """Value of the first sample whose line starts with `line_start`."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_start!r} in metrics")
+
+
+def test_cache_counters_are_exported(monkeypatch):
+    monkeypatch.setattr("app.core.metrics._caches", {})
+    cache: TTLCache[str, int] = TTLCache(max_size=1, ttl_seconds=60)
+    register_cache("test", cache)
+
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.set("b", 2)
+
+    text = REGISTRY.render()
+    assert "# TYPE receiptly_cache_hits_total counter" in text
+    assert "# TYPE receiptly_cache_size gauge" in text
+    assert sample(text, 'receiptly_cache_hits_total{cache="test"}') == 1
+    assert sample(text, 'receiptly_cache_misses_total{cache="test"}') == 1
+    assert sample(text, 'receiptly_cache_evictions_total{cache="test"}') == 1
+    assert sample(text, 'receiptly_cache_size{cache="test"}') == 1
+
+
+def test_application_caches_are_registered():
+    text = REGISTRY.render()
+    assert 'receiptly_cache_size{cache="users"}' in text
+    assert 'receiptly_cache_size{cache="analytics"}' in text
+
+
+@pytest.fixture
+def metrics_client(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.settings, "metrics_enabled", True)
+    monkeypatch.setattr(main.settings, "metrics_token", "scrape-secret")
+    # Without the context manager the lifespan, and so the database, is not started
+    return TestClient(main.app), main.settings
+
+
+def test_metrics_require_the_token(metrics_client):
+    client, _ = metrics_client
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "# TYPE receiptly_cache_size gauge" in response.text
+
+
+@pytest.mark.parametrize("enabled, token", [(True, ""), (False, "scrape-secret")])
+def test_metrics_are_not_found_without_a_token_or_when_disabled(metrics_client, monkeypatch, enabled, token):
+    client, settings = metrics_client
+    monkeypatch.setattr(settings, "metrics_enabled", enabled)
+    monkeypatch.setattr(settings, "metrics_token", token)
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 404
+
+
+class SlowPingDatabase:
+    """Stands in for the instrumented client: every raw query is recorded."""
+
+    async def query_raw(self, query: str):
+        record_query("raw", "query_raw", 30.0)
+        return [{"?column?": 1}]
+
+
+async def test_readiness_ping_stays_out_of_the_query_statistics(monkeypatch):
+    monkeypatch.setattr("app.core.metrics._recent_query_seconds", deque(maxlen=8))
+    record_query("Receipt", "find_many", 0.002)
+    stats, token = begin_request_stats()
+    try:
+        result = await DatabaseProbe(timeout=1, cache_seconds=0).check(SlowPingDatabase())
+    finally:
+        end_request_stats(token)
+
+    assert result["ok"]
+    assert (stats.queries, stats.query_seconds) == (0, 0.0)
+    assert query_latency_quantiles(0.5, 0.99) == (0.002, 0.002)
+    text = REGISTRY.render()
+    assert sample(text, 'receiptly_db_query_duration_seconds_count{model="probe",method="query_raw"}') >= 1
+
+
+@pytest.fixture
+def shared_registry():
+    registry = Registry()
+    requests = registry.register(Counter("test_requests_total", "Requests", ("route",)))
+    latency = registry.register(Histogram("test_latency_seconds", "Latency", (), buckets=(0.1,)))
+    requests.inc("/a", amount=3)
+    latency.observe(0.05)
+    return registry
+
+
+def write_snapshot(directory, pid: int, samples: dict, age: float = 0.0) -> None:
+    with open(os.path.join(directory, f"worker-{pid}.json"), "w") as f:
+        json.dump({"written": time.time() - age, "samples": samples}, f)
+
+
+def test_scrape_covers_the_live_snapshots_of_every_worker(shared_registry, tmp_path):
+    own = f'worker="{os.getpid()}"'
+    write_snapshot(tmp_path, 1, {"test_requests_total": ['test_requests_total{route="/a",worker="1"} 5']})
+    write_snapshot(
+        tmp_path,
+        2,
+        {"test_requests_total": ['test_requests_total{route="/a",worker="2"} 7']},
+        age=SNAPSHOT_MAX_AGE + 1,
+    )
+
+    text = SharedMetrics(shared_registry, str(tmp_path)).render()
+
+    assert text.count("# TYPE test_requests_total counter") == 1
+    assert sample(text, f'test_requests_total{{route="/a",{own}}}') == 3
+    assert sample(text, 'test_requests_total{route="/a",worker="1"}') == 5
+    assert 'worker="2"' not in text
+    assert sample(text, f'test_latency_seconds_bucket{{{own},le="0.1"}}') == 1
+    assert sample(text, f'test_latency_seconds_count{{{own}}}') == 1
+
+
+async def test_worker_snapshot_is_written_and_removed_on_stop(shared_registry, tmp_path):
+    directory = str(tmp_path / "metrics")
+    worker = SharedMetrics(shared_registry, directory, interval=60)
+
+    worker.start()
+    try:
+        await asyncio.sleep(0)
+        assert os.path.exists(worker.path)
+        with open(worker.path) as f:
+            samples = json.load(f)["samples"]
+        assert samples["test_requests_total"] == [f'test_requests_total{{route="/a",worker="{os.getpid()}"}} 3']
+    finally:
+        worker.stop()
+    assert not os.path.exists(worker.path)
@@ -0,0 +1,61 @@
+"""
+Monthly tracker statistics cover exactly the requested window.
+"""
+
+from datetime import datetime
+
+import pytest
+
+NOW = datetime.fromisoformat("2026-03-15T12:00:00+00:00")
+
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    class Frozen(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return NOW.astimezone(tz) if tz else NOW.replace(tzinfo=None)
+
+    monkeypatch.setattr("app.api.routes.transactions.datetime", Frozen)
+
+
+@pytest.fixture
+def history(client, auth):
+    for date, type, amount in [
+        ("2026-01-05T10:00:00+00:00", "expense", 1.0),   # before a two-month window
+        ("2026-01-20T10:00:00+00:00", "income", 2.0),
+        ("2026-02-01T10:00:00+00:00", "expense", 4.0),   # before a one-month window
+        ("2026-02-20T10:00:00+00:00", "expense", 8.0),
+        ("2026-03-10T10:00:00+00:00", "income", 16.0),
+        ("2026-03-20T10:00:00+00:00", "expense", 32.0),  # future-dated
+    ]:
+        response = client.post(
+            "/api/transactions/",
+            json={"type": type, "amount": amount, "category": "Test", "date": date},
+            headers=auth["alice"],
+        )
+        assert response.status_code < 300, response.text
+
+
+def monthly(client, auth, months: int) -> list:
+    response = client.get("/api/transactions/monthly", params={"months": months}, headers=auth["alice"])
+    assert response.status_code == 200, response.text
+    return [
+        (row["year"], row["month"], row["totalIncome"], row["totalExpenses"], row["transactionCount"])
+        for row in response.json()
+    ]
+
+
+def test_edge_months_only_count_days_inside_the_window(client, auth, frozen_now, history):
+    # One month back is 2026-02-12 12:00
+    assert monthly(client, auth, 1) == [(2026, 2, 0.0, 8.0, 1), (2026, 3, 16.0, 0.0, 1)]
+
+
+def test_whole_months_come_from_the_rollup(client, db, users, auth, frozen_now, history):
+    # Two months back is 2026-01-10 12:00, so February is complete
+    db.monthly_totals[(users["alice"], 2026, 2, "expense")][0] += 100.0
+    assert monthly(client, auth, 2) == [
+        (2026, 1, 2.0, 0.0, 1),
+        (2026, 2, 0.0, 112.0, 2),
+        (2026, 3, 16.0, 0.0, 1),
+    ]
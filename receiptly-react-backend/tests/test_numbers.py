@@ -0,0 +1,77 @@
+"""
+Money and quantity parsing, and its agreement with the numeric columns migration.
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+
+import pytest
+
+from app.core.numbers import parse_money, parse_quantity
+
+MIGRATION = (
+    Path(__file__).resolve().parent.parent
+    / "prisma" / "migrations" / "20261017120000_numeric_money_columns" / "migration.sql"
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("12.50", "12.50"),
+        ("12,50", "12.50"),
+        ("1.234,56 €", "1234.56"),
+        ("$1,234.56", "1234.56"),
+        ("1,500", "1500.00"),
+        ("1.500", "1.50"),
+        ("1.234.567", "1234567.00"),
+        ("(3.50)", "-3.50"),
+        ("-7", "-7.00"),
+        (12.345, "12.35"),
+        (Decimal("4"), "4.00"),
+    ],
+)
+def test_parse_money(value, expected):
+    assert parse_money(value) == Decimal(expected)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("1.500", "1.5"),
+        ("1,5", "1.5"),
+        ("1,500", "1.5"),
+        ("0.25 kg", "0.25"),
+        ("2x", "2"),
+        ("3", "3"),
+        (2, "2"),
+    ],
+)
+def test_parse_quantity_never_guesses_grouping(value, expected):
+    assert parse_quantity(value) == Decimal(expected)
+
+
+@pytest.mark.parametrize("value", ["1.234,5", "1,234.5", "1.000.000", "", "abc", None, True])
+def test_parse_quantity_rejects_ambiguous_values(value):
+    with pytest.raises(ValueError):
+        parse_quantity(value)
+
+
+@pytest.mark.parametrize("value", ["", "€", "abc", None, float("nan")])
+def test_parse_money_rejects_non_numbers(value):
+    with pytest.raises(ValueError):
+        parse_money(value)
+
+
+@pytest.mark.parametrize("value", ["1.500", "1.5", "12.345", "-0.125", "3", "1000.000"])
+def test_parsers_agree_with_the_migration_cast(value):
+    # Every value the migration converts with a plain SQL cast must parse to the same number
+    patterns = re.findall(r"~ '([^']+)'", MIGRATION.read_text())
+    assert len(patterns) == 3
+    for pattern, parse, places in zip(
+        patterns, (parse_money, parse_money, parse_quantity), ("0.01", "0.01", "0.001")
+    ):
+        assert re.match(pattern, value)
+        # Postgres rounds numeric casts half away from zero
+        assert parse(value) == Decimal(value).quantize(Decimal(places), rounding=ROUND_HALF_UP)
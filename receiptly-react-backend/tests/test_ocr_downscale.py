@@ -0,0 +1,57 @@
+"""
+Downscaling of receipt images before the fast OCR preprocessing.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from app.core.ocr import load_ocr_module
+
+# The OCR script needs the optional "ocr" extras
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+pytest.importorskip("pytesseract")
+pytest.importorskip("PIL")
+
+OCR_SCRIPT = Path(__file__).resolve().parents[2] / "ocr_script.py"
+
+
+@pytest.fixture(scope="module")
+def ocr():
+    return load_ocr_module(str(OCR_SCRIPT))
+
+
+def image(width: int, height: int):
+    return np.zeros((height, width), dtype=np.uint8)
+
+
+def test_scan_dpi_is_honoured(ocr):
+    small, scale = ocr.downscale_to_dpi(image(1200, 3000), dpi=(600, 600))
+    assert scale == pytest.approx(0.5)
+    assert small.shape == (1500, 600)
+
+
+@pytest.mark.parametrize("dpi", [(72, 72), (96, 96), (5000, 5000), None, (0, 0)])
+def test_implausible_dpi_falls_back_to_the_receipt_width(ocr, dpi):
+    _, scale = ocr.downscale_to_dpi(image(3000, 4000), dpi=dpi)
+    assert scale == pytest.approx(ocr.TARGET_DPI * ocr.RECEIPT_WIDTH_INCHES / 3000)
+
+
+def test_landscape_photo_with_camera_dpi_is_downscaled(ocr):
+    small, scale = ocr.downscale_to_dpi(image(4000, 3000), dpi=(72, 72))
+    assert scale < 1.0
+    assert max(small.shape) <= ocr.MAX_LONG_EDGE
+
+
+def test_long_edge_is_clamped(ocr):
+    # A 300 DPI scan of a very long receipt needs no DPI change but is still too large
+    small, scale = ocr.downscale_to_dpi(image(945, 9000), dpi=(300, 300))
+    assert scale < 1.0
+    assert max(small.shape) <= ocr.MAX_LONG_EDGE
+
+
+def test_small_images_are_never_upscaled(ocr):
+    small, scale = ocr.downscale_to_dpi(image(400, 800), dpi=(72, 72))
+    assert scale == 1.0
+    assert small.shape == (800, 400)
@@ -0,0 +1,150 @@
+"""
+OCR uploads: the queue check runs before the body is read, and the image is
+streamed to disk with its size limit enforced while reading.
+"""
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.api.routes import receipts
+from app.core.storage import BlobTooLargeError
+from app.core.uploads import MultipartUploadError, spool_multipart_file
+
+BOUNDARY = "receiptly-boundary"
+
+
+def multipart_body(fields: list) -> bytes:
+    """Encode (name, filename or None, content) fields as multipart/form-data."""
+    parts = []
+    for name, filename, content in fields:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        parts.append(
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n".encode()
+            + content
+            + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def make_request(body: bytes, chunk_size: int = 1024, content_type: str = None):
+    """A request whose body arrives in chunks; returns it with the list of chunks read."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    received = []
+
+    async def receive():
+        if len(received) < len(chunks):
+            received.append(chunks[len(received)])
+            return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(chunks)}
+        return {"type": "http.disconnect"}
+
+    content_type = content_type or f"multipart/form-data; boundary={BOUNDARY}"
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/receipts/analyze",
+        "headers": [(b"content-type", content_type.encode())],
+    }
+    return Request(scope, receive), received
+
+
+@pytest.fixture
+def temp_files(monkeypatch):
+    """Paths of the temporary files created during the test."""
+    created = []
+    original_mkstemp = tempfile.mkstemp
+
+    def mkstemp(**kwargs):
+        fd, path = original_mkstemp(**kwargs)
+        created.append(path)
+        return fd, path
+
+    monkeypatch.setattr(tempfile, "mkstemp", mkstemp)
+    return created
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+async def test_file_field_is_streamed_to_disk(chunk_size):
+    image = bytes(range(256)) * 40
+    body = multipart_body([("note", None, b"ignored"), ("file", "receipt.png", image)])
+    request, _ = make_request(body, chunk_size)
+
+    path, filename = await spool_multipart_file(request, "file", max_size=len(image))
+    try:
+        assert filename == "receipt.png"
+        assert path.endswith(".png")
+        with open(path, "rb") as f:
+            assert f.read() == image
+    finally:
+        os.remove(path)
+
+
+async def test_oversized_file_stops_reading_at_the_limit(temp_files):
+    request, received = make_request(multipart_body([("file", "big.jpg", b"x" * 100_000)]), 1024)
+
+    with pytest.raises(BlobTooLargeError):
+        await spool_multipart_file(request, "file", max_size=10_000)
+
+    assert sum(map(len, received)) < 12_000
+    assert temp_files and not any(os.path.exists(path) for path in temp_files)
+
+
+@pytest.mark.parametrize(
+    "body, content_type",
+    [
+        (multipart_body([("other", "a.png", b"png")]), None),
+        (multipart_body([("file", None, b"not a file")]), None),
+        (b"--receiptly-boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n\r\npng", None),
+        (b'{"file": "png"}', "application/json"),
+    ],
+    ids=["missing-field", "plain-field", "truncated", "not-multipart"],
+)
+async def test_malformed_uploads_are_rejected_without_leftovers(temp_files, body, content_type):
+    request, _ = make_request(body, content_type=content_type)
+
+    with pytest.raises(MultipartUploadError):
+        await spool_multipart_file(request, "file", max_size=1000)
+
+    assert not any(os.path.exists(path) for path in temp_files)
+
+
+@pytest.fixture
+def ocr_route(monkeypatch):
+    """The analyze route with OCR available and a queue that records submissions."""
+    queue = SimpleNamespace(pending=0, max_pending=1, submitted=[])
+
+    async def submit(*args, **kwargs):
+        queue.submitted.append(args)
+
+    queue.submit = submit
+    monkeypatch.setattr(receipts, "ocr_available", lambda: True)
+    monkeypatch.setattr(receipts, "get_job_queue", lambda: queue)
+    return queue
+
+
+async def test_full_queue_rejects_before_reading_the_upload(ocr_route):
+    ocr_route.pending = ocr_route.max_pending
+    request, received = make_request(multipart_body([("file", "r.png", b"x" * 10_000)]))
+
+    with pytest.raises(HTTPException) as error:
+        await receipts.analyze_receipt_image(request, db=None, current_user=SimpleNamespace(id="u1"))
+
+    assert error.value.status_code == 503
+    assert received == []
+
+
+async def test_oversized_upload_is_rejected_with_413(ocr_route, monkeypatch):
+    monkeypatch.setattr(receipts.settings, "max_image_upload_bytes", 1000)
+    request, _ = make_request(multipart_body([("file", "r.png", b"x" * 10_000)]))
+
+    with pytest.raises(HTTPException) as error:
+        await receipts.analyze_receipt_image(request, db=None, current_user=SimpleNamespace(id="u1"))
+
+    assert error.value.status_code == 413
+    assert ocr_route.submitted == []
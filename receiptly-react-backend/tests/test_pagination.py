@@ -0,0 +1,95 @@
+"""
+Cursor codec and keyset pagination across pages.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_where, paginate
+
+
+def test_cursor_round_trips_datetime():
+    created_at = datetime(2026, 3, 4, 5, 6, 7, 123000, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, "r1")) == (created_at, "r1")
+
+
+def test_cursor_accepts_iso_strings_from_raw_queries():
+    token = encode_cursor("2026-03-04T05:06:07.123+00:00", "r1")
+    assert decode_cursor(token) == (datetime(2026, 3, 4, 5, 6, 7, 123000, tzinfo=timezone.utc), "r1")
+
+
+def test_cursor_without_sort_value():
+    assert decode_cursor(encode_cursor(None, "i42")) == (None, "i42")
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "bm90IGpzb24", encode_cursor(None, "x")[:-3]])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token)
+    assert error.value.status_code == 400
+
+
+def test_paginate_sets_cursor_only_when_more_rows_exist():
+    rows = [("2026-01-03", "c"), ("2026-01-02", "b"), ("2026-01-01", "a")]
+    page, cursor = paginate(rows, 2, key=lambda row: row)
+    assert page == rows[:2]
+    assert decode_cursor(cursor)[1] == "b"
+    assert paginate(rows, 3, key=lambda row: row) == (rows, None)
+
+
+def test_keyset_where_breaks_ties_on_id():
+    sort_value = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert keyset_where("date", encode_cursor(sort_value, "t5")) == {
+        "OR": [{"date": {"lt": sort_value}}, {"date": sort_value, "id": {"lt": "t5"}}]
+    }
+    assert keyset_where("date", "") == {}
+
+
+def test_receipt_list_pages_through_all_receipts(client, db, users, auth):
+    created = [
+        db.receipt._insert({"userId": users["alice"], "date": "01.01.2026", "time": "10:00", "total": "1.00"})
+        for _ in range(5)
+    ]
+    db.receipt._insert({"userId": users["bob"], "date": "01.01.2026", "time": "10:00", "total": "9.00"})
+
+    first = client.get("/api/receipts/", params={"cursor": "", "limit": 3}, headers=auth["alice"])
+    assert first.status_code == 200, first.text
+    assert first.json()["next_cursor"]
+
+    second = client.get(
+        "/api/receipts/",
+        params={"cursor": first.json()["next_cursor"], "limit": 3},
+        headers=auth["alice"],
+    )
+    assert second.status_code == 200, second.text
+    assert second.json()["next_cursor"] is None
+
+    ids = [r["id"] for r in first.json()["items"] + second.json()["items"]]
+    assert ids == [row["id"] for row in reversed(created)]
+
+
+def test_transaction_list_pages_through_equal_dates(client, db, users, auth):
+    # Rows sharing a date are ordered by ID, so the cursor must break the tie
+    date = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    for offset in (0, 0, 0, 1):
+        db.transaction._insert({
+            "userId": users["alice"],
+            "type": "expense",
+            "amount": 5.0,
+            "category": "Food",
+            "date": date - timedelta(days=offset),
+        })
+
+    first = client.get("/api/transactions/", params={"cursor": "", "limit": 2}, headers=auth["alice"])
+    second = client.get(
+        "/api/transactions/",
+        params={"cursor": first.json()["next_cursor"], "limit": 2},
+        headers=auth["alice"],
+    )
+    assert second.status_code == 200, second.text
+
+    ids = [t["id"] for t in first.json()["items"] + second.json()["items"]]
+    assert len(ids) == len(set(ids)) == 4
+    assert second.json()["next_cursor"] is None
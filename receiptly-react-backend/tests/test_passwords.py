@@ -0,0 +1,67 @@
+"""
+Password pool limits and the metrics it exports.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.metrics import REGISTRY
+from app.core.passwords import PasswordHasher, PasswordPoolSaturatedError
+from tests.test_metrics import sample
+
+# Fast scheme, the pool does not care what it runs
+CONTEXT = CryptContext(schemes=["plaintext"])
+
+
+def metric(line_start: str) -> float:
+    try:
+        return sample(REGISTRY.render(), line_start)
+    except AssertionError:
+        return 0.0
+
+
+async def test_operations_are_timed_per_operation():
+    hasher = PasswordHasher(CONTEXT, workers=1, max_queue=0)
+    hashed_before = metric('receiptly_password_hash_seconds_count{operation="hash"}')
+    verified_before = metric('receiptly_password_request_seconds_count{operation="verify"}')
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify("secret", hashed)
+    finally:
+        hasher.shutdown()
+
+    assert metric('receiptly_password_hash_seconds_count{operation="hash"}') == hashed_before + 1
+    assert metric('receiptly_password_request_seconds_count{operation="verify"}') == verified_before + 1
+    assert metric("receiptly_password_pool_pending") == 0
+
+
+async def test_full_pool_rejects_and_counts():
+    hasher = PasswordHasher(CONTEXT, workers=1, max_queue=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_hash(password: str) -> str:
+        started.set()
+        release.wait(5)
+        return password
+
+    rejected_before = metric('receiptly_password_rejected_total{operation="hash"}')
+    try:
+        running = asyncio.create_task(hasher._submit("hash", blocking_hash, "a"))
+        await asyncio.to_thread(started.wait, 5)
+        assert metric("receiptly_password_pool_pending") == 1
+        assert metric("receiptly_password_pool_capacity") == 1
+
+        with pytest.raises(PasswordPoolSaturatedError):
+            await hasher.hash("b")
+        release.set()
+        assert await running == "a"
+    finally:
+        release.set()
+        hasher.shutdown()
+
+    assert metric('receiptly_password_rejected_total{operation="hash"}') == rejected_before + 1
+    assert metric("receiptly_password_pool_pending") == 0
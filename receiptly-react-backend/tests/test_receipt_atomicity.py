@@ -0,0 +1,130 @@
+"""
+Receipt create and delete commit the receipt, its items, the linked transaction,
+the rollup delta and the data version together or not at all.
+"""
+
+import copy
+from datetime import datetime, timezone
+
+import pytest
+
+RECEIPT = {
+    "date": "01.03.2026",
+    "time": "09:15",
+    "total": "4.50",
+    "items": [
+        {"name": "Bread", "price": "2.50", "quantity": "1"},
+        {"name": "Milk", "price": "1.00", "quantity": "2"},
+    ],
+}
+
+# Every write inside the create and delete transactions, as (model, method)
+CREATE_STEPS = [("receipt", "create"), ("transaction", "create"), ("raw", "query"), ("userdataversion", "upsert")]
+DELETE_STEPS = [
+    ("transaction", "delete_many"),
+    ("raw", "query"),
+    ("receipt", "delete_many"),
+    ("userdataversion", "upsert"),
+]
+
+
+def state(db) -> tuple:
+    return copy.deepcopy((db.tables, db.monthly_totals))
+
+
+def test_create_commits_every_part(client, db, users, auth):
+    response = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    assert response.status_code == 201, response.text
+
+    receipt_id = response.json()["id"]
+    assert len(response.json()["items"]) == 2
+    assert [t["receiptId"] for t in db.tables["transaction"].values()] == [receipt_id]
+    assert db.monthly_totals == {(users["alice"], 2026, 3, "expense"): [4.5, 1]}
+    assert db.tables["userdataversion"][users["alice"]]["receipts"] == 1
+
+
+@pytest.mark.parametrize("model, method", CREATE_STEPS)
+def test_failed_create_leaves_nothing_behind(client, db, auth, model, method):
+    before = state(db)
+    db.fail_on(model, method)
+
+    response = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+
+    assert response.status_code == 500
+    assert "Injected failure" in response.json()["detail"]
+    assert state(db) == before
+
+
+@pytest.fixture
+def stored_receipt(client, db, auth):
+    response = client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_delete_removes_every_part(client, db, users, auth, stored_receipt):
+    response = client.delete(f"/api/receipts/{stored_receipt}", headers=auth["alice"])
+    assert response.status_code == 204, response.text
+
+    assert not db.tables["receipt"]
+    assert not db.tables["item"]
+    assert not db.tables["transaction"]
+    assert db.monthly_totals == {(users["alice"], 2026, 3, "expense"): [0.0, 0]}
+    assert db.tables["userdataversion"][users["alice"]]["receipts"] == 2
+
+
+def test_delete_locks_the_linked_transactions_before_deleting(client, db, users, auth, stored_receipt):
+    db.calls.clear()
+    db.raw_calls.clear()
+
+    client.delete(f"/api/receipts/{stored_receipt}", headers=auth["alice"])
+
+    lock_query, lock_args = db.raw_calls[0]
+    assert "FOR UPDATE" in lock_query and '"receiptId" = $1' in lock_query
+    assert lock_args == (stored_receipt, users["alice"])
+    assert ("transaction", "find_many") not in db.calls
+    assert ("transaction", "delete_many") in db.calls
+
+
+def test_delete_takes_the_locked_amount_out_of_the_rollup(client, db, users, auth, stored_receipt):
+    # An update committed before the lock was taken must be what the delete subtracts
+    response = client.put(
+        f"/api/transactions/{next(iter(db.tables['transaction']))}",
+        json={"amount": 7.25},
+        headers=auth["alice"],
+    )
+    assert response.status_code == 200, response.text
+
+    client.delete(f"/api/receipts/{stored_receipt}", headers=auth["alice"])
+
+    assert db.monthly_totals == {(users["alice"], 2026, 3, "expense"): [0.0, 0]}
+
+
+@pytest.mark.parametrize("model, method", DELETE_STEPS)
+def test_failed_delete_keeps_every_part(client, db, auth, stored_receipt, model, method):
+    before = state(db)
+    db.fail_on(model, method)
+
+    response = client.delete(f"/api/receipts/{stored_receipt}", headers=auth["alice"])
+
+    assert response.status_code == 500
+    assert state(db) == before
+
+
+def test_delete_of_missing_receipt_rolls_back(client, db, users, auth):
+    # A linked transaction of another receipt ID must survive the 404
+    db.transaction._insert({
+        "userId": users["alice"],
+        "type": "expense",
+        "amount": 1.0,
+        "category": "Receipt",
+        "date": datetime(2026, 3, 1, tzinfo=timezone.utc),
+        "receiptId": "missing",
+    })
+    before = state(db)
+
+    response = client.delete("/api/receipts/missing", headers=auth["alice"])
+
+    assert response.status_code == 404
+    assert state(db) == before
+    assert db.rollbacks == 1
@@ -0,0 +1,40 @@
+"""
+Field projection of the receipt list.
+"""
+
+RECEIPT = {
+    "date": "01.03.2026",
+    "time": "09:15",
+    "total": "3.00",
+    "items": [
+        {"name": "Tea", "price": "2", "quantity": "1"},
+        {"name": "Milk", "price": "1", "quantity": "1"},
+    ],
+}
+
+
+def test_list_omits_items_by_default_but_counts_them(client, db, auth):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+    db.calls.clear()
+
+    rows = client.get("/api/receipts/", headers=auth["alice"]).json()
+
+    assert "items" not in rows[0]
+    assert rows[0]["itemCount"] == 2
+    assert ("item", "find_many") not in db.calls
+
+
+def test_items_are_included_on_request(client, auth):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+
+    rows = client.get("/api/receipts/", params={"include": "items"}, headers=auth["alice"]).json()
+
+    assert [item["name"] for item in rows[0]["items"]] == ["Tea", "Milk"]
+
+
+def test_requested_fields_only(client, auth):
+    client.post("/api/receipts/", json=RECEIPT, headers=auth["alice"])
+
+    rows = client.get("/api/receipts/", params={"fields": "total"}, headers=auth["alice"]).json()
+
+    assert rows == [{"id": rows[0]["id"], "total": "3.00"}]
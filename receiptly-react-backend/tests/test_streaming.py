@@ -0,0 +1,87 @@
+"""
+Incremental NDJSON and JSON-array parsing of bulk import bodies.
+"""
+
+import json
+
+import pytest
+
+from app.core.streaming import RecordParseError, iter_json_array, iter_ndjson
+
+RECORDS = [
+    {"date": "01.03.2026", "items": [{"name": "Brötchen \"groß\"", "price": "0.45"}]},
+    {"note": "braces } ] { [ and a backslash \\", "nested": {"a": [1, [2, {"b": None}]]}},
+    [],
+    "plain string with \\\" escapes",
+    12.5,
+    -3,
+    True,
+    None,
+]
+
+
+async def stream(body: bytes, size: int):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+async def collect(parse, body: bytes, size: int, max_record_bytes: int = 1 << 20):
+    return [record async for _, record in parse(stream(body, size), max_record_bytes)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 4096])
+async def test_json_array_records_span_any_chunking(size):
+    body = json.dumps(RECORDS, ensure_ascii=False, indent=1).encode()
+    assert await collect(iter_json_array, body, size) == RECORDS
+
+
+@pytest.mark.parametrize("size", [1, 3, 4096])
+async def test_ndjson_records_span_any_chunking(size):
+    body = "\n\n".join(json.dumps(record, ensure_ascii=False) for record in RECORDS).encode()
+    assert await collect(iter_ndjson, body, size) == RECORDS
+
+
+async def test_ndjson_reports_invalid_lines_and_continues():
+    rows = [row async for row in iter_ndjson(stream(b'{"a": 1}\nnot json\n{"b": 2}', 4), 100)]
+    assert [row for row, _ in rows] == [1, 2, 3]
+    assert isinstance(rows[1][1], ValueError)
+    assert rows[2][1] == {"b": 2}
+
+
+@pytest.mark.parametrize("parse, body", [(iter_ndjson, b'{"a": "%s"}\n'), (iter_json_array, b'[{"a": "%s"}]')])
+async def test_oversized_records_are_rejected(parse, body):
+    with pytest.raises(RecordParseError, match="exceeds"):
+        await collect(parse, body % (b"x" * 200), 16, max_record_bytes=100)
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b'{"a": 1}', "JSON array or NDJSON"),
+        (b'[{"a": 1}', "Unexpected end"),
+        (b'[1, 2', "Unexpected end"),
+        (b'[{"a": 1} {"b": 2}]', "Expected ','"),
+        (b'[{"a": tru}]', "Invalid JSON in row 1"),
+        (b'[{"a": 1]', "Invalid JSON in row 1"),
+        (b'[1, "\xff"]', "not valid UTF-8"),
+    ],
+)
+async def test_malformed_arrays_are_rejected(body, message):
+    with pytest.raises(RecordParseError, match=message):
+        await collect(iter_json_array, body, 3)
+
+
+async def test_array_is_not_rescanned_per_chunk(monkeypatch):
+    decoded = []
+    loads = json.loads
+
+    def counting_loads(text):
+        decoded.append(text)
+        return loads(text)
+
+    monkeypatch.setattr("app.core.streaming.json.loads", counting_loads)
+    record = {"data": "x" * 10000}
+    body = json.dumps([record, record]).encode()
+
+    assert await collect(iter_json_array, body, 8) == [record, record]
+    assert len(decoded) == 2
@@ -0,0 +1,120 @@
+"""
+Cross-tenant access matrix: no user can read or change another user's data.
+"""
+
+import copy
+from datetime import datetime, timezone
+
+import pytest
+
+
+@pytest.fixture
+def data(db, users):
+    """A receipt with an item, a linked transaction and a job per user."""
+    created = {}
+    for name, user_id in users.items():
+        receipt = db.receipt._insert({
+            "userId": user_id,
+            "date": "01.02.2026",
+            "time": "12:00",
+            "total": "3.00",
+            "imageSha256": "0" * 64,
+            "imageContentType": "image/png",
+            "imageSize": 1,
+        })
+        item = db.item._insert({"receiptId": receipt["id"], "name": "Milk", "price": "1.50", "quantity": "2"})
+        transaction = db.transaction._insert({
+            "userId": user_id,
+            "type": "expense",
+            "amount": 3.0,
+            "category": "Receipt",
+            "date": datetime(2026, 2, 1, tzinfo=timezone.utc),
+            "receiptId": receipt["id"],
+        })
+        job = db.job._insert({"userId": user_id, "kind": "ocr"})
+        created[name] = {"receipt": receipt["id"], "item": item["id"], "transaction": transaction["id"], "job": job["id"]}
+    return created
+
+
+# (method, path template, request kwargs) of every route addressing a single resource
+SINGLE_RESOURCE_REQUESTS = [
+    ("GET", "/api/receipts/{receipt}", {}),
+    ("PUT", "/api/receipts/{receipt}", {"json": {"total": "0.01"}}),
+    ("PUT", "/api/receipts/{receipt}", {"json": {"date": "02.02.2026"}}),
+    ("DELETE", "/api/receipts/{receipt}", {}),
+    ("GET", "/api/receipts/{receipt}/image", {}),
+    ("PUT", "/api/receipts/{receipt}/image", {"files": {"file": ("r.png", b"png", "image/png")}}),
+    ("GET", "/api/items/{item}", {}),
+    ("GET", "/api/items/?receipt_id={receipt}", {}),
+    ("PUT", "/api/items/{item}", {"json": {"name": "Stolen"}}),
+    ("DELETE", "/api/items/{item}", {}),
+    ("POST", "/api/items/", {"json": {"name": "Planted", "price": "1", "quantity": "1", "receiptId": "{receipt}"}}),
+    ("GET", "/api/transactions/{transaction}", {}),
+    ("PUT", "/api/transactions/{transaction}", {"json": {"amount": 99.0}}),
+    ("DELETE", "/api/transactions/{transaction}", {}),
+    ("GET", "/api/jobs/{job}", {}),
+    ("GET", "/api/jobs/{job}/events", {}),
+]
+
+
+def fill(value, ids: dict):
+    """Substitute resource IDs into a path or request body."""
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {key: fill(item, ids) for key, item in value.items()}
+    return value
+
+
+@pytest.mark.parametrize("method, path, kwargs", SINGLE_RESOURCE_REQUESTS)
+def test_foreign_resources_are_not_found_and_unchanged(client, db, auth, data, method, path, kwargs):
+    before = copy.deepcopy(db.tables)
+    response = client.request(method, fill(path, data["alice"]), headers=auth["bob"], **fill(kwargs, data["alice"]))
+
+    assert response.status_code == 404, response.text
+    assert db.tables == before
+
+
+@pytest.mark.parametrize("method, path, kwargs", SINGLE_RESOURCE_REQUESTS)
+def test_requests_without_a_token_are_rejected(client, data, method, path, kwargs):
+    response = client.request(method, fill(path, data["alice"]), **fill(kwargs, data["alice"]))
+    assert response.status_code in (401, 403)
+
+
+def test_own_item_cannot_be_moved_onto_a_foreign_receipt(client, db, auth, data):
+    response = client.put(
+        f"/api/items/{data['bob']['item']}",
+        json={"receiptId": data["alice"]["receipt"]},
+        headers=auth["bob"],
+    )
+    assert response.status_code == 404
+    assert db.tables["item"][data["bob"]["item"]]["receiptId"] == data["bob"]["receipt"]
+
+
+@pytest.mark.parametrize(
+    "path, key",
+    [
+        ("/api/receipts/", "receipt"),
+        ("/api/items/", "item"),
+        ("/api/transactions/", "transaction"),
+    ],
+)
+@pytest.mark.parametrize("cursor", [None, ""])
+def test_lists_only_contain_own_rows(client, auth, data, path, key, cursor):
+    params = {} if cursor is None else {"cursor": cursor}
+    response = client.get(path, params=params, headers=auth["bob"])
+    assert response.status_code == 200, response.text
+
+    rows = response.json() if cursor is None else response.json()["items"]
+    assert [row["id"] for row in rows] == [data["bob"][key]]
+
+
+def test_own_resources_remain_accessible(client, auth, data):
+    ids = data["bob"]
+    for path in (
+        f"/api/receipts/{ids['receipt']}",
+        f"/api/items/{ids['item']}",
+        f"/api/transactions/{ids['transaction']}",
+        f"/api/jobs/{ids['job']}",
+    ):
+        assert client.get(path, headers=auth["bob"]).status_code == 200, path
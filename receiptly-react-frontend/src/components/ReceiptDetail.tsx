@@ -14,6 +14,7 @@ const ReceiptDetail: React.FC = () => {
   const [error, setError] = useState<string | null>(null);
   const [saveMessage, setSaveMessage] = useState<string | null>(null);
   const [showImageModal, setShowImageModal] = useState(false);
+  const [imageUrl, setImageUrl] = useState<string | null>(null);
 
   useEffect(() => {
     const fetchReceipt = async () => {
@@ -48,6 +49,34 @@ const ReceiptDetail: React.FC = () => {
     fetchReceipt();
   }, [id]);
 
+  // Images are served from the blob store, fetch them with authentication
+  useEffect(() => {
+    if (!id || !receipt?.hasImage) {
+      return;
+    }
+
+    let objectUrl: string | null = null;
+    const fetchImage = async () => {
+      try {
+        const response = await authenticatedFetch(`/api/receipts/${id}/image`);
+        if (response.ok) {
+          objectUrl = URL.createObjectURL(await response.blob());
+          setImageUrl(objectUrl);
+        }
+      } catch (err) {
+        console.error('Image fetch error:', err);
+      }
+    };
+
+    fetchImage();
+
+    return () => {
+      if (objectUrl) {
+        URL.revokeObjectURL(objectUrl);
+      }
+    };
+  }, [id, receipt?.hasImage, receipt?.imageSha256]);
+
   // Handle keyboard events for image modal
   useEffect(() => {
     const handleKeyDown = (event: KeyboardEvent) => {
@@ -172,7 +201,6 @@ const ReceiptDetail: React.FC = () => {
         date: editedReceipt.date,
         time: editedReceipt.time,
         total: editedReceipt.total,
-        imageData: editedReceipt.imageData,
         store: editedReceipt.store,
         address: editedReceipt.address
       };
@@ -408,14 +436,14 @@ const ReceiptDetail: React.FC = () => {
 
       <div className="grid gap-6 lg:grid-cols-3">
         {/* Receipt Image */}
-        {receipt.imageData && (
+        {imageUrl && (
           <div className="lg:col-span-1">
             <div className="card bg-base-200 shadow-md">
               <div className="card-body">
                 <h2 className="card-title mb-4">Original Receipt</h2>
                 <div className="flex justify-center">
                   <img 
-                    src={receipt.imageData} 
+                    src={imageUrl} 
                     alt="Original Receipt" 
                     className="max-w-full max-h-96 object-contain rounded-lg shadow-sm cursor-pointer hover:opacity-80 transition-opacity"
                     onClick={openImageModal}
@@ -430,7 +458,7 @@ const ReceiptDetail: React.FC = () => {
         )}
 
         {/* Receipt Details */}
-        <div className={`space-y-6 ${receipt.imageData ? 'lg:col-span-2' : 'lg:col-span-3'}`}>
+        <div className={`space-y-6 ${imageUrl ? 'lg:col-span-2' : 'lg:col-span-3'}`}>
           {/* Items */}
           <div className="card bg-base-200 shadow-md">
             <div className="card-body">
@@ -654,7 +682,7 @@ const ReceiptDetail: React.FC = () => {
       </div>
 
       {/* Image Modal */}
-      {showImageModal && receipt?.imageData && (
+      {showImageModal && imageUrl && (
         <div className="fixed inset-0 z-50 flex items-center justify-center bg-black bg-opacity-75 p-4" onClick={closeImageModal}>
           <div className="relative max-w-full max-h-full">
             <button 
@@ -667,7 +695,7 @@ const ReceiptDetail: React.FC = () => {
               </svg>
             </button>
             <img 
-              src={receipt.imageData} 
+              src={imageUrl} 
               alt="Receipt Full Size" 
               className="max-w-full max-h-[90vh] object-contain rounded-lg shadow-2xl"
               onClick={(e) => e.stopPropagation()} // Prevent modal from closing when clicking on image
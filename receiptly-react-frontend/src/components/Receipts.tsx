@@ -17,7 +17,8 @@ const Receipts: React.FC = () => {
       try {
         console.log('Fetching receipts with authentication...');
         
-        const response = await authenticatedFetch('/api/receipts/');
+        // The list omits items unless asked for; the cards preview the first few
+        const response = await authenticatedFetch('/api/receipts/?include=items');
         const result = await response.json();
         
         console.log('Receipts API response:', { ok: response.ok, status: response.status, result });
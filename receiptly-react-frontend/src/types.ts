@@ -31,7 +31,12 @@ export const DatabaseReceiptSchema = z.object({
   total: z.string(),
   date: z.string(),
   time: z.string(),
+  purchasedAt: z.date().or(z.string()).optional(),
   imageData: z.string().optional(),
+  hasImage: z.boolean().optional(),
+  imageSha256: z.string().nullable().optional(),
+  imageContentType: z.string().nullable().optional(),
+  imageSize: z.number().nullable().optional(),
   store: z.string().optional(),
   address: z.string().optional(),
   processedAt: z.string().optional(),
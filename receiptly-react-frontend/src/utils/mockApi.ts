@@ -275,7 +275,7 @@ export const setupMockApi = () => {
         });
       }
       
-      if (url.includes('/api/receipts/') && url.match(/\/api\/receipts\/[^/]+$/) && (!init?.method || init?.method === 'GET')) {
+      if (url.includes('/api/receipts/') && url.match(/\/api\/receipts\/[^/?]+$/) && (!init?.method || init?.method === 'GET')) {
         // Handle single receipt by ID
         const receiptId = url.split('/').pop();
         const receipt = receipts.find(r => r.id === receiptId);